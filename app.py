@@ -6,8 +6,21 @@ def create_app():
 
     from routes.ml import ml
     from routes.trading import trading
+    from routes.jobs import jobs
+    from routes.system import system
     app.register_blueprint(blueprint=ml, url_prefix="/ml")
     app.register_blueprint(blueprint=trading, url_prefix="/trading")
+    app.register_blueprint(blueprint=jobs, url_prefix="/jobs")
+    app.register_blueprint(blueprint=system, url_prefix="/system")
+
+    from utils.metrics import init_metrics
+    init_metrics(app)
+
+    from utils.execution import configure_native_threads
+    configure_native_threads()
+
+    from utils.warmup import start_warm_up
+    start_warm_up()
 
     return app
 
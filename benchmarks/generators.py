@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+
+def generate_price_frame(
+    num_tickers: int,
+    num_days: int,
+    num_cointegrated_pairs: int = 5,
+    num_factors: int = 5,
+    seed: int = 0
+) -> Tuple[pd.DataFrame, List[Tuple[str, str]]]:
+    """
+    Generate a synthetic universe of prices driven by common factors, with planted cointegrated pairs.
+
+    Each ticker follows a random walk loaded on one of num_factors factors plus idiosyncratic noise.
+    The second ticker of each planted pair is a linear function of the first plus a mean-reverting
+    AR(1) spread, so the pair is cointegrated by construction.
+
+    :param num_tickers: Number of tickers, at least twice num_cointegrated_pairs
+    :param num_days: Number of business days
+    :param num_cointegrated_pairs: Number of planted cointegrated pairs
+    :param num_factors: Number of common factors
+    :param seed: Seed of the random generator
+    :return: A tuple of the price DataFrame (dates as index, tickers as columns) and the planted pairs
+    """
+    if num_tickers < 2 * num_cointegrated_pairs:
+        raise ValueError("num_tickers must be at least twice num_cointegrated_pairs")
+
+    rng = np.random.default_rng(seed)
+    factors = rng.standard_normal((num_days, num_factors)).cumsum(axis=0)
+    loadings = np.zeros((num_tickers, num_factors))
+    loadings[np.arange(num_tickers), np.arange(num_tickers) % num_factors] = rng.uniform(0.5, 1.5, num_tickers)
+    idiosyncratic = 0.5 * rng.standard_normal((num_days, num_tickers)).cumsum(axis=0)
+    prices = 100 + factors @ loadings.T + idiosyncratic
+
+    tickers = [f"T{ticker:05d}" for ticker in range(num_tickers)]
+    planted_pairs = []
+    for pair in range(num_cointegrated_pairs):
+        first, second = 2 * pair, 2 * pair + 1
+        spread = lfilter([1.0], [1.0, -0.5], rng.standard_normal(num_days))
+        prices[:, second] = rng.uniform(0.5, 2.0) * prices[:, first] + rng.uniform(-10, 10) + spread
+        planted_pairs.append((tickers[first], tickers[second]))
+
+    prices = np.maximum(prices, 1.0)
+    index = pd.DatetimeIndex(pd.bdate_range("2015-01-01", periods=num_days), name="date")
+
+    return pd.DataFrame(prices, index=index, columns=pd.Index(tickers, name="ticker")), planted_pairs
+
+def price_frame_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Convert a price DataFrame to the records the API receives.
+
+    :param df: A pandas DataFrame where the dates are the index, column names are the tickers and the values are the prices
+    :return: A list of dictionaries containing ticker, date and price values
+    """
+    dates = df.index.strftime("%Y-%m-%d").tolist()
+    return [
+        {"ticker": ticker, "date": date, "price": price}
+        for ticker, prices in zip(df.columns, df.to_numpy().T.tolist()) for date, price in zip(dates, prices)
+    ]
+
+def generate_universe(
+    num_tickers: int,
+    num_days: int,
+    num_cointegrated_pairs: int = 5,
+    seed: int = 0
+) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+    """
+    Generate the records of a synthetic universe with planted cointegrated pairs.
+
+    :param num_tickers: Number of tickers
+    :param num_days: Number of business days
+    :param num_cointegrated_pairs: Number of planted cointegrated pairs
+    :param seed: Seed of the random generator
+    :return: A tuple of the list of price records and the planted pairs
+    """
+    df, planted_pairs = generate_price_frame(num_tickers, num_days, num_cointegrated_pairs, seed=seed)
+    return price_frame_to_records(df), planted_pairs
+
+def generate_spread_series(length: int, mean_reversion: float = 0.9, trend: float = 0.0, seed: int = 0) -> np.ndarray:
+    """
+    Generate a scaled spread series following an AR(1) process around a linear trend.
+
+    :param length: Number of points
+    :param mean_reversion: AR(1) coefficient, below 1 for a mean-reverting spread
+    :param trend: Slope of the trend per point
+    :param seed: Seed of the random generator
+    :return: Array of spread values
+    """
+    rng = np.random.default_rng(seed)
+    spread = lfilter([1.0], [1.0, -mean_reversion], rng.standard_normal(length))
+
+    return spread + trend * np.arange(length)
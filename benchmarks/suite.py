@@ -0,0 +1,298 @@
+import argparse
+from dataclasses import asdict, dataclass
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from benchmarks.generators import generate_spread_series, generate_universe
+
+
+DEFAULT_SIZES = "50x250,100x500,200x1000"
+STAGES = (
+    "construct_df_from_ohlc",
+    "compute_returns",
+    "apply_pca_and_scaling",
+    "apply_optics",
+    "run_statistical_criteria_tests_for_pairs",
+    "rolling_regression_trend_with_confidence",
+    "trade_pair_using_model",
+    "api_pairs",
+    "api_trade_with_model"
+)
+
+@dataclass
+class BenchmarkResult:
+    """
+    Timing and memory of one stage on one universe size.
+    """
+    stage: str
+    size: str
+    records: int
+    seconds: float
+    mean_seconds: float
+    peak_mib: Optional[float]
+
+def parse_sizes(sizes: str) -> List[Tuple[int, int]]:
+    """
+    Parse universe sizes written as comma-separated TICKERSxDAYS values.
+
+    :param sizes: Sizes such as "50x250,100x500"
+    :return: List of (number of tickers, number of days) tuples
+    """
+    return [tuple(int(value) for value in size.lower().split("x")) for size in sizes.split(",") if size]
+
+def measure(run: Callable[[], Any], repeat: int = 3, trace_memory: bool = True) -> Tuple[float, float, Optional[float]]:
+    """
+    Time a function over several runs and measure the peak memory it allocates in one more run.
+
+    Memory is traced in a separate run because tracemalloc slows allocation-heavy code down.
+
+    :param run: Function to measure
+    :param repeat: Number of timed runs
+    :param trace_memory: Whether to measure the peak allocated memory
+    :return: A tuple of the best time and mean time in seconds, and the peak memory in MiB or None
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    peak_mib = None
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            run()
+            peak_mib = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+
+    return min(timings), float(np.mean(timings)), peak_mib
+
+def build_stages(num_tickers: int, num_days: int, seed: int = 0) -> Tuple[int, Dict[str, Callable[[], Any]]]:
+    """
+    Generate a universe and prepare a call of every benchmarked stage on it.
+
+    Each stage receives the output of the previous stages computed once up front, so it is timed
+    alone. The api_ stages go through the Flask test client with an empty stage cache.
+
+    :param num_tickers: Number of tickers
+    :param num_days: Number of business days
+    :param seed: Seed of the generators
+    :return: A tuple of the number of price records and a dictionary mapping each stage to its call
+    """
+    os.environ.setdefault("API_TOKEN", "benchmark")
+    from flask import Flask
+    from routes.ml import ml
+    from routes.trading import trading
+    from utils.cache import stage_cache
+    from utils.ml import apply_optics, apply_pca_and_scaling
+    from utils.preprocessing import compute_returns, construct_df_from_ohlc
+    from utils.router import API_TOKEN
+    from utils.spread_stats import run_statistical_criteria_tests_for_pairs
+    from utils.trading import rolling_regression_trend_with_confidence, trade_pair_using_model
+
+    records, planted_pairs = generate_universe(num_tickers, num_days, num_cointegrated_pairs=min(5, num_tickers // 2), seed=seed)
+    df = construct_df_from_ohlc(records)
+    df_returns = compute_returns(df)
+    scaled_principal_components = apply_pca_and_scaling(df_returns)
+    pairs = list(dict.fromkeys(apply_optics(scaled_principal_components, df_returns) + planted_pairs))
+    spread = generate_spread_series(len(records), seed=seed)
+    pair_records = [record for record in records if record["ticker"] in planted_pairs[0]]
+
+    app = Flask(__name__)
+    app.register_blueprint(ml, url_prefix="/ml")
+    app.register_blueprint(trading, url_prefix="/trading")
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {API_TOKEN}"}
+
+    def post(path: str, payload: Dict[str, Any]) -> None:
+        stage_cache.clear()
+        response = client.post(path, json=payload, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} answered {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+    return len(records), {
+        "construct_df_from_ohlc": lambda: construct_df_from_ohlc(records),
+        "compute_returns": lambda: compute_returns(df),
+        "apply_pca_and_scaling": lambda: apply_pca_and_scaling(df_returns),
+        "apply_optics": lambda: apply_optics(scaled_principal_components, df_returns),
+        "run_statistical_criteria_tests_for_pairs": lambda: run_statistical_criteria_tests_for_pairs(pairs, df),
+        "rolling_regression_trend_with_confidence": lambda: rolling_regression_trend_with_confidence(spread),
+        "trade_pair_using_model": lambda: trade_pair_using_model(df, *planted_pairs[0]),
+        "api_pairs": lambda: post("/ml/pairs", {"data": records}),
+        "api_trade_with_model": lambda: post("/trading/trade_with_model", {"data": pair_records})
+    }
+
+def run_suite(
+    sizes: Sequence[Tuple[int, int]],
+    stages: Sequence[str] = STAGES,
+    repeat: int = 3,
+    trace_memory: bool = True,
+    seed: int = 0
+) -> List[BenchmarkResult]:
+    """
+    Benchmark the stages on every universe size.
+
+    :param sizes: List of (number of tickers, number of days) tuples
+    :param stages: Stages to run, a subset of STAGES
+    :param repeat: Number of timed runs per stage
+    :param trace_memory: Whether to measure peak memory
+    :param seed: Seed of the generators
+    :return: One result per stage and size
+    """
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    results = []
+    for num_tickers, num_days in sizes:
+        records, calls = build_stages(num_tickers, num_days, seed=seed)
+        for stage in stages:
+            seconds, mean_seconds, peak_mib = measure(calls[stage], repeat=repeat, trace_memory=trace_memory)
+            results.append(BenchmarkResult(stage, f"{num_tickers}x{num_days}", records, seconds, mean_seconds, peak_mib))
+
+    return results
+
+def scaling_exponents(results: Sequence[BenchmarkResult]) -> Dict[str, float]:
+    """
+    Fit how the time of each stage grows with the number of price records.
+
+    :param results: Results of run_suite
+    :return: Dictionary mapping each stage measured on at least two sizes to the slope of log time against log records
+    """
+    by_stage: Dict[str, List[BenchmarkResult]] = {}
+    for result in results:
+        by_stage.setdefault(result.stage, []).append(result)
+
+    return {
+        stage: float(np.polyfit(np.log([r.records for r in stage_results]), np.log([max(r.seconds, 1e-9) for r in stage_results]), 1)[0])
+        for stage, stage_results in by_stage.items()
+        if len({r.records for r in stage_results}) > 1
+    }
+
+def environment() -> Dict[str, Any]:
+    """
+    Describe the machine and library versions a run was made with.
+
+    :return: Dictionary of the Python, NumPy and platform versions and the number of CPUs
+    """
+    from utils.execution import get_execution_settings
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": get_execution_settings().cpus
+    }
+
+def save_baseline(path: str, results: Sequence[BenchmarkResult]) -> None:
+    """
+    Save results as a baseline for later runs.
+
+    :param path: Path of the JSON file to write
+    :param results: Results of run_suite
+    """
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": [asdict(result) for result in results]}, f, indent=2)
+
+def compare_to_baseline(results: Sequence[BenchmarkResult], baseline: Dict[str, Any], tolerance: float = 0.25) -> List[Dict[str, Any]]:
+    """
+    Compare results with a saved baseline, stage by stage and size by size.
+
+    :param results: Results of run_suite
+    :param baseline: Contents of a file written by save_baseline
+    :param tolerance: Relative slowdown above which a stage counts as regressed
+    :return: One comparison per result found in the baseline, with the time ratio and whether it regressed
+    """
+    baseline_seconds = {(entry["stage"], entry["size"]): entry["seconds"] for entry in baseline["results"]}
+    comparisons = []
+    for result in results:
+        previous = baseline_seconds.get((result.stage, result.size))
+        if previous is None:
+            continue
+        ratio = result.seconds / previous if previous > 0 else float("inf")
+        comparisons.append({
+            "stage": result.stage,
+            "size": result.size,
+            "baseline_seconds": previous,
+            "seconds": result.seconds,
+            "ratio": ratio,
+            "regressed": ratio > 1 + tolerance
+        })
+
+    return comparisons
+
+def format_report(results: Sequence[BenchmarkResult], comparisons: Optional[List[Dict[str, Any]]] = None) -> str:
+    """
+    Render results, scaling exponents and baseline comparisons as a text table.
+
+    :param results: Results of run_suite
+    :param comparisons: Result of compare_to_baseline, if a baseline was given
+    :return: The report
+    """
+    ratios = {(c["stage"], c["size"]): c for c in comparisons or []}
+    lines = [f"{'stage':<42} {'size':>10} {'records':>9} {'best s':>9} {'mean s':>9} {'peak MiB':>9} {'vs base':>8}"]
+    for result in results:
+        comparison = ratios.get((result.stage, result.size))
+        versus = "" if comparison is None else f"{comparison['ratio']:.2f}x{' !' if comparison['regressed'] else ''}"
+        peak = "" if result.peak_mib is None else f"{result.peak_mib:.1f}"
+        lines.append(f"{result.stage:<42} {result.size:>10} {result.records:>9} {result.seconds:>9.4f} {result.mean_seconds:>9.4f} {peak:>9} {versus:>8}")
+
+    exponents = scaling_exponents(results)
+    if exponents:
+        lines.append("")
+        lines.append("Scaling exponent of time against records:")
+        lines.extend(f"  {stage:<42} {exponent:.2f}" for stage, exponent in exponents.items())
+
+    return "\n".join(lines)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Run the benchmark suite from the command line.
+
+    :param argv: Command line arguments, defaults to sys.argv
+    :return: Exit code, 1 if a stage regressed against the baseline
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on synthetic universes.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated TICKERSxDAYS universe sizes")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stages to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generators")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory measurement")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--save-baseline", help="Save the results as a baseline to this JSON file")
+    parser.add_argument("--compare", help="Compare the results with this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Relative slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_suite(
+        parse_sizes(args.sizes),
+        stages=[stage for stage in args.stages.split(",") if stage],
+        repeat=args.repeat,
+        trace_memory=not args.no_memory,
+        seed=args.seed
+    )
+
+    comparisons = None
+    if args.compare:
+        with open(args.compare) as f:
+            comparisons = compare_to_baseline(results, json.load(f), tolerance=args.tolerance)
+
+    print(format_report(results, comparisons))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "results": [asdict(result) for result in results], "comparisons": comparisons}, f, indent=2)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+
+    return 1 if comparisons and any(comparison["regressed"] for comparison in comparisons) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
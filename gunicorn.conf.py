@@ -0,0 +1,22 @@
+import os
+
+from utils.execution import get_execution_settings, in_process_state_warning, native_thread_environment
+
+
+# Sized from the container's CPUs and cgroup quota, see utils/execution.py. One worker by default:
+# jobs, cached stages, profiles and metrics are kept in its memory, so every request must reach it.
+settings = get_execution_settings()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+workers = settings.web_workers
+threads = settings.web_threads
+worker_class = "gthread"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 300))
+# Run the synthetic warm-up in each worker after it starts, see utils/warmup.py; it is off elsewhere.
+os.environ.setdefault("WARM_UP", "background")
+raw_env = [f"{name}={value}" for name, value in native_thread_environment(settings.native_threads).items() if name not in os.environ]
+
+def on_starting(server):
+    warning = in_process_state_warning(settings)
+    if warning:
+        server.log.warning(warning)
@@ -0,0 +1,115 @@
+from flask import Blueprint, jsonify, url_for
+from werkzeug.exceptions import BadRequest, Unauthorized
+from typing import Any, Dict, Optional, Tuple
+
+from utils.jobs import EXECUTION_MODES, JOB_CANCELLED, JOB_FAILED, JOB_SUCCEEDED, Job, job_store
+from utils.router import require_auth
+
+
+jobs = Blueprint('jobs', __name__)
+
+@jobs.errorhandler(BadRequest)
+def handle_bad_request(e: BadRequest) -> Tuple[Dict[str, str], int]:
+    """
+    Error handler for BadRequest exceptions.
+
+    :param e: The BadRequest exception
+    :returns: A JSON response with the error message and a 400 status code
+    """
+    return jsonify({"error": str(e)}), 400
+
+@jobs.errorhandler(Unauthorized)
+def handle_unauthorized(e: Unauthorized) -> Tuple[Dict[str, str], int]:
+    """
+    Error handler for Unauthorized exceptions.
+
+    :param e: The Unauthorized exception
+    :returns: A JSON response with the error message and a 401 status code
+    """
+    return jsonify({"error": str(e)}), 401
+
+def is_async_mode(mode: Optional[str]) -> bool:
+    """
+    Check whether a request asked to run as a background job.
+
+    :param mode: Value of the mode query parameter, "sync" when missing
+    :returns: True for mode=async
+    :raises BadRequest: If the mode is unknown
+    """
+    if mode is None:
+        return False
+    if mode not in EXECUTION_MODES:
+        raise BadRequest(f"Unknown mode: {mode}, expected one of {', '.join(EXECUTION_MODES)}")
+    return mode == "async"
+
+def job_accepted_response(job: Job) -> Tuple[Any, int, Dict[str, str]]:
+    """
+    Build the response to an accepted job submission.
+
+    :param job: The submitted job
+    :returns: A JSON response with the job status and a 202 status code, pointing to the status endpoint
+    """
+    status_url = url_for('jobs.get_job', job_id=job.job_id)
+    body = {**job.describe(), "status_url": status_url, "result_url": url_for('jobs.get_job_result', job_id=job.job_id)}
+    return jsonify(body), 202, {"Location": status_url}
+
+@jobs.route('', methods=['GET'])
+@require_auth
+def get_job_stats() -> Tuple[Dict[str, Any], int]:
+    """
+    Report the number of jobs per status and the settings of the job pool.
+
+    :returns: A tuple containing a dictionary with the job statistics, and the HTTP status code
+    """
+    return jsonify(job_store.stats()), 200
+
+@jobs.route('/<job_id>', methods=['GET'])
+@require_auth
+def get_job(job_id: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Report the status of a job.
+
+    :param job_id: Id returned when the job was submitted
+    :returns: A tuple containing a dictionary with the job status or error message, and the HTTP status code
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown or expired job: {job_id}"}), 404
+
+    return jsonify(job.describe()), 200
+
+@jobs.route('/<job_id>/result', methods=['GET'])
+@require_auth
+def get_job_result(job_id: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Return the result of a finished job, with the status code the synchronous request would have had.
+
+    :param job_id: Id returned when the job was submitted
+    :returns: A tuple containing the job result, its status while it runs, or an error message, and the HTTP status code
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown or expired job: {job_id}"}), 404
+    if job.status == JOB_SUCCEEDED:
+        return jsonify(job.result), 200
+    if job.status == JOB_FAILED:
+        return jsonify({"error": job.error}), job.error_status
+    if job.status == JOB_CANCELLED:
+        return jsonify({"error": f"Job {job_id} was cancelled"}), 409
+
+    return jsonify(job.describe()), 202
+
+@jobs.route('/<job_id>', methods=['DELETE'])
+@require_auth
+def cancel_job(job_id: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Cancel a job. A running job completes in the background but its result is discarded.
+
+    :param job_id: Id returned when the job was submitted
+    :returns: A tuple containing a dictionary with the job status or error message, and the HTTP status code
+    """
+    job = job_store.cancel(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown or expired job: {job_id}"}), 404
+
+    return jsonify(job.describe()), 200
@@ -1,16 +1,23 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.exceptions import BadRequest, Unauthorized
 from typing import Any, Dict, List, Tuple, Union
-import pendulum
+import numpy as np
+import pandas as pd
 
-from schemas.ml import rlrt_schema, pairs_schema
-from utils.ml import apply_optics, apply_pca_and_scaling, calculate_rlrt_trend_and_confidence
-from utils.preprocessing import compute_returns, construct_df_from_ohlc
-from utils.router import require_auth, validate_schema
-from utils.spread_stats import run_statistical_criteria_tests_for_pairs
+from routes.jobs import is_async_mode, job_accepted_response
+from schemas.ml import pair_state_init_schema, pair_state_update_schema, pairs_parameters_schema, pairs_schema, rlrt_batch_schema, rlrt_schema
+from utils.cache import hash_bytes, stage_cache, stage_key
+from utils.columnar import UnsupportedFormatError, is_columnar_upload, load_prices
+from utils.jobs import JobQueueFullError, job_store
+from utils.metrics import stage_timer
+from utils.preprocessing import construct_df_from_ohlc, construct_spread_series
+from utils.router import RESERVED_QUERY_PARAMETERS, parse_query_parameters, require_auth, validate_schema
+from utils.serialization import NotAcceptableError, encode_response, negotiate_response_format, records_to_columns
+from utils.validation import compile_schemas
 
 
 ml = Blueprint('ml', __name__)
+compile_schemas(rlrt_schema, rlrt_batch_schema, pairs_schema, pairs_parameters_schema, pair_state_init_schema, pair_state_update_schema)
 
 @ml.errorhandler(BadRequest)
 def handle_bad_request(e: BadRequest) -> Tuple[Dict[str, str], int]:
@@ -40,6 +47,8 @@ def compute_daily_rlrt_trend() -> Tuple[Dict[str, Union[str, List[Dict[str, Unio
 
     :returns: A tuple containing a dictionary with the results or error message, and the HTTP status code
     """
+    from utils.ml import calculate_rlrt_trends_and_confidences
+
     try:
         data: Dict[str, Any] = request.get_json()
         if not data:
@@ -50,58 +59,226 @@ def compute_daily_rlrt_trend() -> Tuple[Dict[str, Union[str, List[Dict[str, Unio
         
         validate_schema(data, rlrt_schema)
         
-        sorted_data: List[Dict[str, Union[str, float]]] = sorted(data['data'], key=lambda x: x['date'])
-        
-        dates: List[pendulum.DateTime] = [pendulum.parse(item['date']) for item in sorted_data]
-        spreads: List[float] = [item['spread'] for item in sorted_data]
-        
-        window_size: int = 10
-        results: List[Dict[str, Union[str, float]]] = []
-        
-        for i in range(len(sorted_data) - window_size + 1):
-            window_dates = dates[i:i+window_size]
-            window_spreads = spreads[i:i+window_size]
-            result = calculate_rlrt_trend_and_confidence(window_dates, window_spreads)
-            results.append(result)
+        dates, spreads = construct_spread_series(data['data'])
+        window_dates, positive, confidences = calculate_rlrt_trends_and_confidences(dates, spreads, window_size=10)
+
+        results: List[Dict[str, Union[str, float]]] = [
+            {"date": date, "trend": "positive" if is_positive else "negative", "confidence": confidence}
+            for date, is_positive, confidence in zip(window_dates.astype(str).tolist(), positive.tolist(), confidences.tolist())
+        ]
         
         return jsonify(results), 200
     except BadRequest as e:
         return jsonify({"error": str(e)}), 400
+    except ValueError as e:
+        return jsonify({"error": f"Invalid input data: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+    
+
+@ml.route('/rlrt/batch', methods=['POST'])
+@require_auth
+def compute_daily_rlrt_trends() -> Tuple[Dict[str, Any], int]:
+    """
+    Compute the daily RLRT trend for several spread series in one request.
+
+    :returns: A tuple containing a dictionary with the date axis, series ids, trend and confidence matrices or error message, and the HTTP status code
+    """
+    from utils.ml import calculate_rlrt_matrix
+
+    try:
+        data: Dict[str, Any] = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        validate_schema(data, rlrt_batch_schema)
+
+        series = [construct_spread_series(item['data']) for item in data['series']]
+        dates, trends, confidences = calculate_rlrt_matrix(series, window_size=10)
+
+        return jsonify({
+            "ids": [item['id'] for item in data['series']],
+            "dates": dates.astype(str).tolist(),
+            "trend": trends.tolist(),
+            "confidence": np.where(np.isnan(confidences), None, confidences).tolist()
+        }), 200
+    except BadRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except ValueError as e:
+        return jsonify({"error": f"Invalid input data: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
     
 
+def pairs_response(result: Dict[str, Any], response_format: str) -> Any:
+    """
+    Render the result of the pairs pipeline in the negotiated format.
+
+    :param result: Result of run_pairs_pipeline
+    :param response_format: One of the formats of negotiate_response_format
+    :returns: A JSON response of records, or a compact response with one column per pair statistic
+    """
+    if response_format == "records":
+        return jsonify(result), 200
+
+    columns = {**result, "suggested_pairs": records_to_columns(result["suggested_pairs"])}
+    return encode_response(columns, response_format, table_key="suggested_pairs")
+
+
 @ml.route('/pairs', methods=['POST'])
 @require_auth
 def suggest_pairs() -> Tuple[Dict[str, Union[List[Dict[str, Any]], str]], int]:
     """
     Suggest pairs of tickers based on the provided data using machine learning techniques.
 
+    Two correlation floors apply at different stages. min_return_correlation, with top_k_partners,
+    prunes the candidate pairs of each cluster by the correlation of their returns before any test
+    runs. min_correlation is one of the statistical criteria and rejects tested pairs whose prices
+    are correlated less than it.
+
     :returns: A tuple containing a dictionary with the suggested pairs or error message, and the HTTP status code
     """
+    from utils.pipeline import run_pairs_pipeline
+
+    try:
+        response_format = negotiate_response_format(request.args.get('format'), request.accept_mimetypes)
+        query_options = {name: value for name, value in request.args.items() if name not in RESERVED_QUERY_PARAMETERS}
+        request_key = stage_key(hash_bytes(request.get_data()), "suggested_pairs", **query_options)
+
+        if is_columnar_upload(request.mimetype):
+            data: Dict[str, Any] = parse_query_parameters(request.args, pairs_schema)
+            validate_schema(data, pairs_parameters_schema)
+
+            payload, mimetype = request.get_data(), request.mimetype
+
+            def load_uploaded_prices() -> pd.DataFrame:
+                df = load_prices(payload, mimetype)
+                if df.count().sum() < 30:
+                    raise ValueError("At least 30 data points are required for clustering")
+                return df
+
+            compute = lambda: stage_cache.get_or_compute(
+                request_key,
+                "suggested_pairs",
+                lambda: run_pairs_pipeline(data, load_prices=load_uploaded_prices, prices_hash=hash_bytes(payload))
+            )
+        else:
+            with stage_timer("parse"):
+                data = request.get_json()
+            if not data:
+                return jsonify({"error": "No JSON data provided"}), 400
+
+            if 'data' not in data or len(data['data']) < 30:
+                return jsonify({"error": "At least 30 data points are required for clustering"}), 400
+
+            validate_schema(data, pairs_schema)
+
+            compute = lambda: stage_cache.get_or_compute(request_key, "suggested_pairs", lambda: run_pairs_pipeline(data))
+
+        if is_async_mode(request.args.get('mode')):
+            if response_format != "records":
+                raise NotAcceptableError("Asynchronous job results are returned as JSON records")
+            return job_accepted_response(job_store.submit("suggest_pairs", compute))
+
+        result = compute()
+        with stage_timer("serialize"):
+            return pairs_response(result, response_format)
+    except BadRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except UnsupportedFormatError as e:
+        return jsonify({"error": str(e)}), 415
+    except NotAcceptableError as e:
+        return jsonify({"error": str(e)}), 406
+    except JobQueueFullError as e:
+        return jsonify({"error": str(e)}), 503
+    except ValueError as e:
+        return jsonify({"error": f"Invalid input data: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
+
+
+@ml.route('/pairs/state', methods=['POST'])
+@require_auth
+def init_pair_state() -> Tuple[Dict[str, Any], int]:
+    """
+    Compute the statistics of a pair over its full history and return the state for later incremental updates.
+
+    :returns: A tuple containing a dictionary with the serialized state and current statistics or error message, and the HTTP status code
+    """
+    from utils.pair_state import PairStatisticsState
+
     try:
         data: Dict[str, Any] = request.get_json()
         if not data:
             return jsonify({"error": "No JSON data provided"}), 400
-        
-        if 'data' not in data or len(data['data']) < 30:
-            return jsonify({"error": "At least 30 data points are required for clustering"}), 400
-        
-        validate_schema(data, pairs_schema)
+
+        validate_schema(data, pair_state_init_schema)
 
         df = construct_df_from_ohlc(data['data'])
-        df_returns = compute_returns(df)
-        scaled_principal_components = apply_pca_and_scaling(df_returns)
-        pairs_to_eval = apply_optics(scaled_principal_components, df_returns)
-        suggested_pairs = run_statistical_criteria_tests_for_pairs(
-            pairs_to_eval,
-            df
-        )
-
-        return jsonify({"suggested_pairs": suggested_pairs}), 200
+        missing = [ticker for ticker in (data['ticker_1'], data['ticker_2']) if ticker not in df.columns]
+        if missing:
+            return jsonify({"error": f"No price data for tickers: {', '.join(missing)}"}), 400
+
+        df = df[[data['ticker_1'], data['ticker_2']]].dropna()
+        state = PairStatisticsState.from_prices(data['ticker_1'], data['ticker_2'], df, data.get('full_refresh_interval', 20), data.get('window_size', 500))
+
+        return jsonify({"state": state.to_dict(), "statistics": state.statistics()}), 200
+    except BadRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except ValueError as e:
+        return jsonify({"error": f"Invalid input data: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
+
+@ml.route('/pairs/state/update', methods=['POST'])
+@require_auth
+def update_pair_state() -> Tuple[Dict[str, Any], int]:
+    """
+    Apply new bars to a pair state returned by /pairs/state.
+
+    The statistics are updated in constant time per new bar and the state only keeps the trailing
+    window of prices, so the mean crossings become approximate. Passing every bar of the pair as
+    history recounts them exactly after the update.
+
+    :returns: A tuple containing a dictionary with the updated state, current statistics and number of applied bars or error message, and the HTTP status code
+    """
+    from utils.pair_state import PairStatisticsState, align_pair_bars
+
+    try:
+        data: Dict[str, Any] = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        validate_schema(data, pair_state_update_schema)
+
+        state = PairStatisticsState.from_dict(data['state'])
+        bars = align_pair_bars(data['data'], state.ticker_1, state.ticker_2, state.last_date)
+        for date, price_1, price_2 in bars:
+            state.update(date, price_1, price_2)
+
+        if 'history' in data:
+            history = [bar for bar in align_pair_bars(data['history'], state.ticker_1, state.ticker_2, "") if bar[0] <= state.last_date]
+            if len(history) != state.count:
+                return jsonify({"error": f"The history holds {len(history)} bars of the pair, the state {state.count}"}), 400
+            _, prices_1, prices_2 = zip(*history)
+            state.refresh(prices_1, prices_2)
+
+        return jsonify({"state": state.to_dict(), "statistics": state.statistics(), "applied_bars": len(bars)}), 200
     except BadRequest as e:
         return jsonify({"error": str(e)}), 400
     except ValueError as e:
         return jsonify({"error": f"Invalid input data: {str(e)}"}), 400
     except Exception as e:
-        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
+@ml.route('/cache', methods=['GET'])
+@require_auth
+def get_cache_stats() -> Tuple[Dict[str, Any], int]:
+    """
+    Report the size and hit and miss statistics of the pipeline stage cache.
+
+    :returns: A tuple containing a dictionary with the cache statistics, and the HTTP status code
+    """
+    return jsonify(stage_cache.stats()), 200
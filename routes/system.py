@@ -0,0 +1,110 @@
+from flask import Blueprint, Response, jsonify
+from werkzeug.exceptions import Unauthorized
+from typing import Any, Dict, Tuple
+
+from utils.execution import describe_native_threads, get_execution_settings, in_process_state_warning
+from utils.jobs import job_store
+from utils.profiling import profile_store
+from utils.router import require_auth
+from utils.warmup import warm_up, warm_up_report
+
+
+system = Blueprint('system', __name__)
+
+@system.errorhandler(Unauthorized)
+def handle_unauthorized(e: Unauthorized) -> Tuple[Dict[str, str], int]:
+    """
+    Error handler for Unauthorized exceptions.
+
+    :param e: The Unauthorized exception
+    :returns: A JSON response with the error message and a 401 status code
+    """
+    return jsonify({"error": str(e)}), 401
+
+@system.route('/execution', methods=['GET'])
+@require_auth
+def get_execution_settings_report() -> Tuple[Dict[str, Any], int]:
+    """
+    Report the effective CPU sizing of this worker: detected CPUs, pool sizes and native thread pools,
+    with a warning when several workers split the in-process state.
+
+    :returns: A tuple containing a dictionary with the execution settings, and the HTTP status code
+    """
+    settings = get_execution_settings()
+    return jsonify({
+        "settings": settings.to_dict(),
+        "job_workers": job_store.max_workers,
+        "native_thread_pools": describe_native_threads(),
+        "warning": in_process_state_warning(settings)
+    }), 200
+
+@system.route('/warmup', methods=['GET'])
+@require_auth
+def get_warm_up_report() -> Tuple[Dict[str, Any], int]:
+    """
+    Report whether this worker has warmed up, with the import and workload time breakdown.
+
+    :returns: A tuple containing the warm-up report or status, and 200 once warm or 503 before
+    """
+    report = warm_up_report()
+    if report is None:
+        return jsonify({"status": "warming up"}), 503
+
+    return jsonify({"status": "ready", **report}), 200
+
+@system.route('/warmup', methods=['POST'])
+@require_auth
+def run_warm_up() -> Tuple[Dict[str, Any], int]:
+    """
+    Warm up this worker now, or return the report of the earlier warm-up.
+
+    :returns: A tuple containing the warm-up report or error message, and the HTTP status code
+    """
+    try:
+        return jsonify({"status": "ready", **warm_up()}), 200
+    except Exception as e:
+        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
+@system.route('/profiles', methods=['GET'])
+@require_auth
+def list_profiles() -> Tuple[Dict[str, Any], int]:
+    """
+    List the stored request profiles, newest first.
+
+    :returns: A tuple containing a dictionary with the profile summaries, and the HTTP status code
+    """
+    return jsonify({"profiles": profile_store.list()}), 200
+
+@system.route('/profiles/<profile_id>', methods=['GET'])
+@require_auth
+def get_profile(profile_id: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Return a stored profile report with the top functions by cumulative time and the allocation peaks.
+
+    :param profile_id: Id returned in the X-Profile-Id header of the profiled response
+    :returns: A tuple containing the report or error message, and the HTTP status code
+    """
+    entry = profile_store.get(profile_id)
+    if entry is None:
+        return jsonify({"error": f"Unknown or expired profile: {profile_id}"}), 404
+
+    return jsonify(entry[0]), 200
+
+@system.route('/profiles/<profile_id>/pstats', methods=['GET'])
+@require_auth
+def download_profile(profile_id: str) -> Any:
+    """
+    Download the raw CPU profile of a request, readable with pstats.Stats or snakeviz.
+
+    :param profile_id: Id returned in the X-Profile-Id header of the profiled response
+    :returns: The marshalled pstats data, or an error message
+    """
+    entry = profile_store.get(profile_id)
+    if entry is None or entry[1] is None:
+        return jsonify({"error": f"No CPU profile stored for: {profile_id}"}), 404
+
+    return Response(
+        entry[1],
+        mimetype="application/octet-stream",
+        headers={"Content-Disposition": f"attachment; filename={profile_id}.pstats"}
+    )
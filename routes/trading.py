@@ -2,13 +2,19 @@ from flask import Blueprint, request, jsonify
 from werkzeug.exceptions import BadRequest, Unauthorized
 from typing import Any, Dict, Tuple
 
-from schemas.trading import trade_schema
+from routes.jobs import is_async_mode, job_accepted_response
+from schemas.trading import batch_trade_schema, session_schema, session_update_schema, trade_schema
+from utils.columnar import UnsupportedFormatError, is_columnar_upload, load_prices
+from utils.jobs import JobQueueFullError, job_store
+from utils.metrics import record_count, stage_timer
 from utils.preprocessing import construct_df_from_ohlc
 from utils.router import require_auth, validate_schema
-from utils.trading import trade_pair_using_model
+from utils.serialization import NotAcceptableError, encode_response, negotiate_response_format
+from utils.validation import compile_schemas
 
 
 trading = Blueprint('trading', __name__)
+compile_schemas(trade_schema, batch_trade_schema, session_schema, session_update_schema)
 
 @trading.errorhandler(BadRequest)
 def handle_bad_request(e: BadRequest) -> Tuple[Dict[str, str], int]:
@@ -38,20 +44,175 @@ def trade_using_model() -> Tuple[Dict[str, Any], int]:
 
     :returns: A JSON response containing daily signals, daily positions, daily returns, total returns, maximum drawdowns, annualized returns.
     """
+    from utils.trading import trade_pair_using_model
+
     try:
-        data: Dict[str, Any] = request.get_json()
+        response_format = negotiate_response_format(request.args.get('format'), request.accept_mimetypes)
+
+        if is_columnar_upload(request.mimetype):
+            with stage_timer("pivot"):
+                df = load_prices(request.get_data(), request.mimetype)
+            if df.count().sum() < 30:
+                return jsonify({"error": "At least 30 data points are required for clustering"}), 400
+        else:
+            with stage_timer("parse"):
+                data: Dict[str, Any] = request.get_json()
+            if not data:
+                return jsonify({"error": "No JSON data provided"}), 400
+            
+            if 'data' not in data or len(data['data']) < 30:
+                return jsonify({"error": "At least 30 data points are required for clustering"}), 400
+            
+            validate_schema(data, trade_schema)
+
+            with stage_timer("pivot"):
+                df = construct_df_from_ohlc(data['data'])
+
+        if is_async_mode(request.args.get('mode')):
+            if response_format != "records":
+                raise NotAcceptableError("Asynchronous job results are returned as JSON records")
+            return job_accepted_response(job_store.submit("trade_using_model", lambda: trade_pair_using_model(df, df.columns[0], df.columns[1])))
+
+        orient = "records" if response_format == "records" else "columns"
+        with stage_timer("backtest"):
+            results = trade_pair_using_model(df, df.columns[0], df.columns[1], orient=orient)
+
+        with stage_timer("serialize"):
+            if response_format != "records":
+                return encode_response(results, response_format, table_key="results")
+            return jsonify(results), 200
+    except BadRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except UnsupportedFormatError as e:
+        return jsonify({"error": str(e)}), 415
+    except NotAcceptableError as e:
+        return jsonify({"error": str(e)}), 406
+    except JobQueueFullError as e:
+        return jsonify({"error": str(e)}), 503
+    except ValueError as e:
+        return jsonify({"error": f"Invalid input data: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
+
+@trading.route('/trade_with_model/batch', methods=['POST'])
+@require_auth
+def trade_pairs_with_model() -> Tuple[Dict[str, Any], int]:
+    """
+    Compute backtesting statistics using RLRT for several pairs sharing one price upload.
+
+    :returns: A JSON response containing the backtest of every requested pair and summary statistics across pairs.
+    """
+    from utils.trading import summarize_backtests, trade_pairs_using_model
+
+    try:
+        response_format = negotiate_response_format(request.args.get('format'), request.accept_mimetypes)
+
+        with stage_timer("parse"):
+            data: Dict[str, Any] = request.get_json()
         if not data:
             return jsonify({"error": "No JSON data provided"}), 400
-        
+
         if 'data' not in data or len(data['data']) < 30:
-            return jsonify({"error": "At least 30 data points are required for clustering"}), 400
-        
-        validate_schema(data, trade_schema)
+            return jsonify({"error": "At least 30 data points are required"}), 400
+
+        validate_schema(data, batch_trade_schema)
+
+        with stage_timer("pivot"):
+            df = construct_df_from_ohlc(data['data'])
+        pairs = [tuple(pair) for pair in data['pairs']]
+        for ticker_1, ticker_2 in pairs:
+            if ticker_1 == ticker_2:
+                return jsonify({"error": f"Pair must contain two different tickers: {ticker_1}"}), 400
+            missing = [ticker for ticker in (ticker_1, ticker_2) if ticker not in df.columns]
+            if missing:
+                return jsonify({"error": f"No usable price data for tickers: {', '.join(missing)}"}), 400
+
+        orient = "records" if response_format == "records" else "columns"
+        with stage_timer("backtest"):
+            backtests = trade_pairs_using_model(df, pairs, max_workers=data.get('max_workers'), orient=orient)
+        record_count("backtested_pairs", len(pairs))
+
+        with stage_timer("serialize"):
+            if response_format != "records":
+                return encode_response({"results": backtests, "summary": summarize_backtests(backtests)}, response_format)
+            return jsonify({"results": backtests, "summary": summarize_backtests(backtests)}), 200
+    except BadRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except NotAcceptableError as e:
+        return jsonify({"error": str(e)}), 406
+    except ValueError as e:
+        return jsonify({"error": f"Invalid input data: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
+
+@trading.route('/session', methods=['POST'])
+@require_auth
+def start_trading_session() -> Tuple[Dict[str, Any], int]:
+    """
+    Start a live RLRT session for a pair by replaying the strategy over its price history once.
+
+    :returns: A JSON response containing the serialized session state and the latest signal, position and budget.
+    """
+    from utils.trading_session import TradingSessionState
+
+    try:
+        data: Dict[str, Any] = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        validate_schema(data, session_schema)
 
         df = construct_df_from_ohlc(data['data'])
-        results = trade_pair_using_model(df, df.columns[0], df.columns[1])
-        return jsonify(results), 200
+        ticker_1, ticker_2 = data['ticker_1'], data['ticker_2']
+        if ticker_1 == ticker_2:
+            return jsonify({"error": f"Pair must contain two different tickers: {ticker_1}"}), 400
+        missing = [ticker for ticker in (ticker_1, ticker_2) if ticker not in df.columns]
+        if missing:
+            return jsonify({"error": f"No usable price data for tickers: {', '.join(missing)}"}), 400
+
+        state = TradingSessionState.from_prices(df, ticker_1, ticker_2, initial_budget=data.get('initial_budget', 100000))
+        return jsonify({
+            "state": state.to_dict(),
+            "signal": state.signal,
+            "position": state.position,
+            "budget": state.budget
+        }), 200
+    except BadRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except ValueError as e:
+        return jsonify({"error": f"Invalid input data: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
+
+@trading.route('/session/update', methods=['POST'])
+@require_auth
+def update_trading_session() -> Tuple[Dict[str, Any], int]:
+    """
+    Advance a live RLRT session by the bars dated after its last update.
+
+    :returns: A JSON response containing the updated session state and the signal, position and budget of every new bar.
+    """
+    from utils.pair_state import align_pair_bars
+    from utils.trading_session import TradingSessionState
+
+    try:
+        data: Dict[str, Any] = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        validate_schema(data, session_update_schema)
+
+        state = TradingSessionState.from_dict(data['state'])
+        bars = align_pair_bars(data['data'], state.ticker_1, state.ticker_2, state.last_date)
+        results = [state.update(date, price_1, price_2) for date, price_1, price_2 in bars]
+
+        return jsonify({"state": state.to_dict(), "results": results}), 200
     except BadRequest as e:
         return jsonify({"error": str(e)}), 400
+    except ValueError as e:
+        return jsonify({"error": f"Invalid input data: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
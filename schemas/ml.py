@@ -17,6 +17,25 @@ rlrt_schema = {
     "required": ["data"]
 }
 
+rlrt_batch_schema = {
+    "type": "object",
+    "properties": {
+        "series": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string"},
+                    "data": rlrt_schema["properties"]["data"]
+                },
+                "required": ["id", "data"]
+            },
+            "minItems": 1
+        }
+    },
+    "required": ["series"]
+}
+
 pairs_schema = {
     "type": "object",
     "properties": {
@@ -33,7 +52,100 @@ pairs_schema = {
                 "additionalProperties": True
             },
             "minItems": 1
+        },
+        "n_jobs": {"type": "integer", "minimum": 1, "maximum": 64},
+        "min_correlation": {
+            "type": "number",
+            "minimum": -1,
+            "maximum": 1,
+            "description": "Statistical criterion: minimum correlation of a candidate pair's prices, checked in the pair tests"
+        },
+        "top_k_partners": {
+            "type": "integer",
+            "minimum": 1,
+            "description": "Candidate pruning: number of most return-correlated partners kept per ticker within its cluster"
+        },
+        "min_return_correlation": {
+            "type": "number",
+            "minimum": -1,
+            "maximum": 1,
+            "description": "Candidate pruning: minimum correlation of the returns of a pair within a cluster, applied before the pair tests"
+        },
+        "pca_method": {"type": "string", "enum": ["full", "incremental", "randomized"]},
+        "pca_chunk_size": {"type": "integer", "minimum": 5},
+        "clustering_method": {"type": "string", "enum": ["optics", "hdbscan", "dbscan", "minibatch_kmeans"]},
+        "criteria_order": {
+            "type": "array",
+            "items": {
+                "type": "string",
+                "enum": ["correlation", "mean_crossings", "half_life", "hurst_exponent", "cointegration"]
+            },
+            "uniqueItems": True
         }
     },
     "required": ["data"]
-}
\ No newline at end of file
+}
+
+pairs_parameters_schema = {**pairs_schema, "required": []}
+
+pair_state_init_schema = {
+    "type": "object",
+    "properties": {
+        "ticker_1": {"type": "string"},
+        "ticker_2": {"type": "string"},
+        "data": pairs_schema["properties"]["data"],
+        "full_refresh_interval": {"type": "integer", "minimum": 1},
+        "window_size": {"type": "integer", "minimum": 3, "maximum": 5000}
+    },
+    "required": ["ticker_1", "ticker_2", "data"]
+}
+
+pair_state_update_schema = {
+    "type": "object",
+    "properties": {
+        "state": {
+            "type": "object",
+            "properties": {
+                "ticker_1": {"type": "string"},
+                "ticker_2": {"type": "string"},
+                "shift_1": {"type": "number"},
+                "shift_2": {"type": "number"},
+                "last_date": {"type": "string", "format": "date"},
+                "full_refresh_interval": {"type": "integer", "minimum": 1},
+                "count": {"type": "integer", "minimum": 3},
+                "sum_1": {"type": "number"},
+                "sum_2": {"type": "number"},
+                "sum_11": {"type": "number"},
+                "sum_22": {"type": "number"},
+                "sum_12": {"type": "number"},
+                "lag_sum_11": {"type": "number"},
+                "lag_sum_22": {"type": "number"},
+                "lag_sum_12": {"type": "number"},
+                "lag_sum_21": {"type": "number"},
+                "last_1": {"type": "number"},
+                "last_2": {"type": "number"},
+                "mean_crossings": {"type": "integer", "minimum": 0},
+                "cointegration_critical_value": {"type": ["number", "null"]},
+                "hurst_exponent": {"type": ["number", "null"]},
+                "bars_since_refresh": {"type": "integer", "minimum": 0},
+                "last_spread_sign": {"type": "integer", "enum": [-1, 0, 1]},
+                "mean_crossings_approximate": {"type": "boolean"},
+                "window_size": {"type": "integer", "minimum": 3, "maximum": 5000},
+                "window_1": {"type": "array", "items": {"type": "number"}, "maxItems": 5000},
+                "window_2": {"type": "array", "items": {"type": "number"}, "maxItems": 5000}
+            },
+            "required": ["ticker_1", "ticker_2", "shift_1", "shift_2", "last_date", "count", "window_1", "window_2"],
+            "additionalProperties": False
+        },
+        "data": {
+            "type": "array",
+            "items": pairs_schema["properties"]["data"]["items"]
+        },
+        "history": {
+            "type": "array",
+            "items": pairs_schema["properties"]["data"]["items"],
+            "description": "Every bar of the pair up to the updated state, to recount the mean crossings exactly"
+        }
+    },
+    "required": ["state", "data"]
+}
@@ -16,4 +16,83 @@ trade_schema = {
         }
     },
     "required": ["data"]
-}
\ No newline at end of file
+}
+
+batch_trade_schema = {
+    "type": "object",
+    "properties": {
+        "data": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "date": {"type": "string", "format": "date"},
+                    "ticker": {"type": "string"},
+                    "price": {"type": "number"},
+                },
+                "required": ["date", "price", "ticker"]
+            },
+            "minItems": 10
+        },
+        "pairs": {
+            "type": "array",
+            "items": {
+                "type": "array",
+                "items": {"type": "string"},
+                "minItems": 2,
+                "maxItems": 2
+            },
+            "minItems": 1
+        },
+        "max_workers": {"type": "integer", "minimum": 1, "maximum": 64}
+    },
+    "required": ["data", "pairs"]
+}
+
+session_schema = {
+    "type": "object",
+    "properties": {
+        "data": trade_schema["properties"]["data"],
+        "ticker_1": {"type": "string"},
+        "ticker_2": {"type": "string"},
+        "initial_budget": {"type": "number", "exclusiveMinimum": 0}
+    },
+    "required": ["data", "ticker_1", "ticker_2"]
+}
+
+session_update_schema = {
+    "type": "object",
+    "properties": {
+        "state": {
+            "type": "object",
+            "properties": {
+                "ticker_1": {"type": "string"},
+                "ticker_2": {"type": "string"},
+                "slope": {"type": "number"},
+                "intercept": {"type": "number"},
+                "scale": {"type": "number"},
+                "offset": {"type": "number"},
+                "last_date": {"type": "string", "format": "date"},
+                "last_price_1": {"type": "number", "exclusiveMinimum": 0},
+                "last_price_2": {"type": "number", "exclusiveMinimum": 0},
+                "window_size": {"type": "integer", "minimum": 2},
+                "r2_threshold": {"type": "number"},
+                "initial_budget": {"type": "number", "exclusiveMinimum": 0},
+                "count": {"type": "integer", "minimum": 0},
+                "mean": {"type": "number"},
+                "m2": {"type": "number", "minimum": 0},
+                "window": {"type": "array", "items": {"type": "number"}},
+                "position": {"type": "integer", "enum": [-1, 0, 1]},
+                "budget": {"type": "number"},
+                "signal": {"type": "string", "enum": ["None", "Short", "Long", "Exit Short", "Exit Long"]}
+            },
+            "required": ["ticker_1", "ticker_2", "slope", "intercept", "scale", "offset", "last_date", "last_price_1", "last_price_2"],
+            "additionalProperties": False
+        },
+        "data": {
+            "type": "array",
+            "items": trade_schema["properties"]["data"]["items"]
+        }
+    },
+    "required": ["state", "data"]
+}
@@ -0,0 +1,39 @@
+import json
+import numpy as np
+
+from benchmarks.generators import generate_price_frame, generate_spread_series
+from benchmarks.suite import STAGES, compare_to_baseline, main, run_suite, save_baseline
+from utils.cointegration import adfuller_batch
+
+
+def test_generate_price_frame_plants_cointegrated_pairs():
+    df, planted_pairs = generate_price_frame(20, 300, num_cointegrated_pairs=3)
+    assert df.shape == (300, 20)
+    assert len(planted_pairs) == 3
+
+    first, second = planted_pairs[0]
+    slope, intercept = np.polyfit(df[first], df[second], 1)
+    _, pvalues, _ = adfuller_batch((df[second] - slope * df[first] - intercept).to_numpy()[:, None])
+    assert pvalues[0] < 0.05
+    assert len(generate_spread_series(1000)) == 1000
+
+def test_run_suite_smoke(tmp_path):
+    results = run_suite([(12, 120)], repeat=1)
+    assert [result.stage for result in results] == list(STAGES)
+    assert all(result.seconds > 0 and result.peak_mib is not None for result in results)
+
+    baseline_path = tmp_path / "baseline.json"
+    save_baseline(str(baseline_path), results)
+    comparisons = compare_to_baseline(results, json.loads(baseline_path.read_text()))
+    assert not any(comparison["regressed"] for comparison in comparisons)
+
+    slower = json.loads(baseline_path.read_text())
+    for entry in slower["results"]:
+        entry["seconds"] /= 10
+    assert all(comparison["regressed"] for comparison in compare_to_baseline(results, slower))
+
+def test_main_writes_output(tmp_path, capsys):
+    output = tmp_path / "results.json"
+    assert main(["--sizes", "12x120", "--repeat", "1", "--no-memory", "--stages", "compute_returns", "--output", str(output)]) == 0
+    assert json.loads(output.read_text())["results"][0]["stage"] == "compute_returns"
+    assert "compute_returns" in capsys.readouterr().out
@@ -0,0 +1,128 @@
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+import json
+import threading
+import time
+
+from routes.jobs import jobs
+from routes.ml import ml
+from routes.trading import trading
+from utils.jobs import JOB_CANCELLED, JOB_FAILED, JOB_SUCCEEDED, JobQueueFullError, JobStore
+from utils.router import API_TOKEN
+from tests.test_ml import generate_universe
+from tests.test_trading import generate_prices
+
+
+@pytest.fixture
+def app() -> Flask:
+    """
+    Create and configure a Flask app for testing.
+
+    :returns: A Flask application instance configured for testing
+    """
+    app = Flask(__name__)
+    app.register_blueprint(ml, url_prefix="/ml")
+    app.register_blueprint(trading, url_prefix="/trading")
+    app.register_blueprint(jobs, url_prefix="/jobs")
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """
+    Create a test client for the Flask app.
+
+    :param app: The Flask application instance
+    :returns: A test client for the Flask application
+    """
+    return app.test_client()
+
+def wait_for(store: JobStore, job_id: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    while store.get(job_id).finished_at is None and time.time() < deadline:
+        time.sleep(0.01)
+    return store.get(job_id)
+
+def test_job_store_records_results_and_errors():
+    store = JobStore(max_workers=1)
+    succeeded = store.submit("sum", lambda: sum(range(10)))
+    failed = store.submit("parse", lambda: float("not a number"))
+
+    assert wait_for(store, succeeded.job_id).status == JOB_SUCCEEDED
+    assert succeeded.result == 45
+    assert wait_for(store, failed.job_id).status == JOB_FAILED
+    assert failed.error_status == 400
+    assert failed.error.startswith("Invalid input data")
+    store.shutdown()
+
+def test_job_store_cancels_queue_and_bounds_it():
+    store = JobStore(max_workers=1, max_queued=1)
+    release = threading.Event()
+    running = store.submit("block", release.wait)
+    while store.get(running.job_id).started_at is None:
+        time.sleep(0.01)
+    queued = store.submit("queued", lambda: 1)
+
+    with pytest.raises(JobQueueFullError):
+        store.submit("rejected", lambda: 2)
+
+    assert store.cancel(queued.job_id).status == JOB_CANCELLED
+    store.cancel(running.job_id)
+    release.set()
+    assert wait_for(store, running.job_id).status == JOB_CANCELLED
+    assert running.result is None
+    store.shutdown()
+
+def test_job_store_purges_expired_jobs():
+    store = JobStore(max_workers=1, ttl_seconds=0)
+    job = store.submit("sum", lambda: 1)
+    job.future.result()
+    time.sleep(0.01)
+
+    assert store.get(job.job_id) is None
+    store.shutdown()
+
+def test_suggest_pairs_async_matches_sync(client: FlaskClient) -> None:
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    data = {"data": generate_universe(8, 120), "criteria_order": ["correlation", "hurst_exponent"]}
+
+    response = client.post('/ml/pairs?mode=async', json=data, headers=headers)
+    assert response.status_code == 202
+    job = json.loads(response.data)
+    assert response.headers["Location"] == job["status_url"]
+
+    deadline = time.time() + 30
+    response = client.get(job["result_url"], headers=headers)
+    while response.status_code == 202 and time.time() < deadline:
+        time.sleep(0.05)
+        response = client.get(job["result_url"], headers=headers)
+
+    assert response.status_code == 200
+    sync_response = client.post('/ml/pairs', json=data, headers=headers)
+    assert json.loads(response.data) == json.loads(sync_response.data)
+    assert json.loads(client.get(job["status_url"], headers=headers).data)["status"] == JOB_SUCCEEDED
+
+def test_trade_with_model_async_reports_errors(client: FlaskClient) -> None:
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    data = {"data": generate_prices(["AAA", "BBB"], 40)}
+
+    response = client.post('/trading/trade_with_model?mode=later', json=data, headers=headers)
+    assert response.status_code == 400
+
+    response = client.post('/trading/trade_with_model?mode=async&format=msgpack', json=data, headers=headers)
+    assert response.status_code == 406
+
+    response = client.get('/jobs/unknown', headers=headers)
+    assert response.status_code == 404
+
+    response = client.post('/trading/trade_with_model?mode=async', json=data, headers=headers)
+    assert response.status_code == 202
+    job_id = json.loads(response.data)["job_id"]
+    deadline = time.time() + 30
+    while json.loads(client.get(f'/jobs/{job_id}', headers=headers).data)["finished_at"] is None and time.time() < deadline:
+        time.sleep(0.05)
+
+    response = client.get(f'/jobs/{job_id}/result', headers=headers)
+    assert response.status_code == 200
+    assert "results" in json.loads(response.data)
@@ -197,4 +197,156 @@ def test_suggest_pairs_invalid_auth(client):
     assert response.status_code == 401
     response_data = json.loads(response.data)
     assert "error" in response_data
-    assert "Invalid or missing Authorization header" in response_data["error"]
\ No newline at end of file
+    assert "Invalid or missing Authorization header" in response_data["error"]
+
+def test_rlrt_batch(client: FlaskClient) -> None:
+    """
+    Test the batch RLRT endpoint with series of different lengths.
+
+    :param client: The test client for the Flask application
+    """
+    data = {"series": [
+        {"id": "up", "data": generate_data(12, 0.54, 0.62)},
+        {"id": "down", "data": generate_data(10, 0.62, 0.54)}
+    ]}
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    response = client.post('/ml/rlrt/batch', json=data, headers=headers)
+    assert response.status_code == 200
+    result = json.loads(response.data)
+    assert result['ids'] == ["up", "down"]
+    assert result['dates'] == ["2024-01-10", "2024-01-11", "2024-01-12"]
+    assert result['trend'][0] == ["positive"] * 3
+    assert result['trend'][1] == ["negative", None, None]
+    assert result['confidence'][1][1] is None
+    assert all(0 <= confidence <= 1 for confidence in result['confidence'][0])
+
+def test_rlrt_batch_not_enough_data_points(client: FlaskClient) -> None:
+    """
+    Test the batch RLRT endpoint with a series that has too few data points.
+
+    :param client: The test client for the Flask application
+    """
+    data = {"series": [{"id": "short", "data": generate_data(9, 0.54, 0.62)}]}
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    response = client.post('/ml/rlrt/batch', json=data, headers=headers)
+    assert response.status_code == 400
+    assert "is too short" in json.loads(response.data)["error"]
+
+def test_rlrt_unsorted_input(client: FlaskClient) -> None:
+    """
+    Test the RLRT endpoint returns the same result regardless of input order.
+
+    :param client: The test client for the Flask application
+    """
+    ordered = generate_data(12, 0.54, 0.62)
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    expected = json.loads(client.post('/ml/rlrt', json={"data": ordered}, headers=headers).data)
+    result = json.loads(client.post('/ml/rlrt', json={"data": ordered[::-1]}, headers=headers).data)
+    assert result == expected
+    assert result[0]['date'] == "2024-01-10"
+
+def generate_universe(num_tickers: int, num_days: int) -> List[Dict[str, Union[str, float]]]:
+    """
+    Generate synthetic prices of several tickers driven by a few common factors.
+
+    :param num_tickers: Number of tickers
+    :param num_days: Number of days per ticker
+    :returns: A list of dictionaries containing ticker, date and price data
+    """
+    rng = random.Random(0)
+    factors = [[0.0] * num_days for _ in range(3)]
+    for factor in factors:
+        for day in range(1, num_days):
+            factor[day] = factor[day - 1] + rng.gauss(0, 1)
+    start_date = pendulum.date(2022, 1, 1)
+    return [
+        {
+            "ticker": f"T{ticker}",
+            "date": start_date.add(days=day).to_date_string(),
+            "price": 100 + factors[ticker % 3][day] * (1 + ticker / 20) + rng.gauss(0, 1)
+        }
+        for ticker in range(num_tickers) for day in range(num_days)
+    ]
+
+def test_suggest_pairs_reuses_cached_stages(client):
+    from utils.cache import stage_cache
+    stage_cache.clear()
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    data = {"data": generate_universe(24, 150)}
+
+    first = client.post('/ml/pairs', json=data, headers=headers)
+    repeat = client.post('/ml/pairs', json=data, headers=headers)
+    assert first.status_code == 200
+    assert json.loads(repeat.data) == json.loads(first.data)
+
+    response = client.post('/ml/pairs', json={**data, "top_k_partners": 2}, headers=headers)
+    assert response.status_code == 200
+    assert json.loads(response.data)["pruned_pairs"] > 0
+
+    stats = json.loads(client.get('/ml/cache', headers=headers).data)
+    assert stats["stages"]["suggested_pairs"] == {"hits": 1, "misses": 2}
+    for stage in ("prices", "returns", "pca", "clusters"):
+        assert stats["stages"][stage] == {"hits": 1, "misses": 1}
+
+def test_suggest_pairs_pca_chunk_size_only_keys_incremental_pca(client):
+    from utils.cache import stage_cache
+    stage_cache.clear()
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    data = {"data": generate_universe(24, 150)}
+
+    for parameters in ({}, {"pca_chunk_size": 64}, {"pca_method": "incremental", "pca_chunk_size": 64}):
+        response = client.post('/ml/pairs', json={**data, **parameters}, headers=headers)
+        assert response.status_code == 200
+
+    stats = json.loads(client.get('/ml/cache', headers=headers).data)
+    assert stats["stages"]["pca"] == {"hits": 1, "misses": 2}
+
+def test_pair_state_init_and_update(client):
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    universe = generate_universe(3, 130)
+    history = [point for point in universe if point["date"] < "2022-05-01"]
+    new_bars = [point for point in universe if point["date"] >= "2022-05-01"]
+
+    response = client.post('/ml/pairs/state', json={"ticker_1": "T0", "ticker_2": "T1", "data": history}, headers=headers)
+    assert response.status_code == 200
+    state = json.loads(response.data)["state"]
+
+    response = client.post('/ml/pairs/state/update', json={"state": state, "data": new_bars}, headers=headers)
+    assert response.status_code == 200
+    response_data = json.loads(response.data)
+    assert response_data["applied_bars"] == 10
+    assert response_data["statistics"]["observations"] == 130
+    assert response_data["statistics"]["last_date"] == new_bars[-1]["date"]
+    assert "prices_1" not in response_data["state"]
+
+    response = client.post('/ml/pairs/state/update', json={"state": state, "data": new_bars, "history": universe}, headers=headers)
+    assert response.status_code == 200
+    assert not json.loads(response.data)["statistics"]["mean_crossings_approximate"]
+
+    response = client.post('/ml/pairs/state/update', json={"state": state, "data": new_bars, "history": history}, headers=headers)
+    assert response.status_code == 400
+
+    response = client.post('/ml/pairs/state', json={"ticker_1": "T0", "ticker_2": "X", "data": history}, headers=headers)
+    assert response.status_code == 400
+
+    for malformed in ({**state, "sum_1": "1.5"}, {**state, "window_1": 3}, {**state, "count": state["count"] + 1}):
+        response = client.post('/ml/pairs/state/update', json={"state": malformed, "data": new_bars}, headers=headers)
+        assert response.status_code == 400
+
+def test_suggest_pairs_npz_upload(client):
+    import io
+    import numpy as np
+    import pandas as pd
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    records = generate_universe(24, 150)
+    expected = client.post('/ml/pairs', json={"data": records, "top_k_partners": 3}, headers=headers)
+
+    wide = pd.DataFrame(records).pivot(index="date", columns="ticker", values="price")
+    buffer = io.BytesIO()
+    np.savez(buffer, dates=wide.index.to_numpy(dtype=str), tickers=wide.columns.to_numpy(dtype=str), prices=wide.to_numpy())
+    response = client.post('/ml/pairs?top_k_partners=3', data=buffer.getvalue(), content_type='application/x-npz', headers=headers)
+    assert response.status_code == 200
+    assert json.loads(response.data) == json.loads(expected.data)
+
+    response = client.post('/ml/pairs?top_k_partners=zero', data=buffer.getvalue(), content_type='application/x-npz', headers=headers)
+    assert response.status_code == 400
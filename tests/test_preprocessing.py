@@ -25,4 +25,32 @@ def test_construct_df_from_ohlc():
     assert isinstance(result, pd.DataFrame)
     assert result.shape == (3, 2)
     assert result.index.name == 'date'
-    assert result.loc['2023-01-02', 'GOOGL'] == pytest.approx(205.0)
\ No newline at end of file
+    assert result.loc['2023-01-02', 'GOOGL'] == pytest.approx(205.0)
+
+def test_construct_df_from_ohlc_matches_pivot_table():
+    data = [
+        {"ticker": "MSFT", "date": "2023-01-02", "price": float("nan")},
+        {"ticker": "MSFT", "date": "2023-01-02", "price": 300},
+        {"ticker": "MSFT", "date": "2023-01-02", "price": 301},
+        {"ticker": "AAPL", "date": "2023-01-03", "price": 101},
+        {"ticker": "AAPL", "date": "2023-01-01", "price": 100},
+        {"ticker": "MSFT", "date": "2023-01-03", "price": 302},
+        {"ticker": "MSFT", "date": "2023-01-01", "price": 299},
+        {"ticker": "TSLA", "date": "2023-01-04", "price": float("nan")}
+    ]
+    df = pd.DataFrame(data)
+    df["date"] = pd.to_datetime(df["date"])
+    expected = df.pivot_table(index="date", columns="ticker", values="price", aggfunc="first").astype(float)
+
+    result = construct_df_from_ohlc(data)
+    pd.testing.assert_frame_equal(result, expected.interpolate(method='linear'))
+    assert result.loc['2023-01-02', 'MSFT'] == 300
+
+def test_construct_df_from_ohlc_float32():
+    data = [
+        {"ticker": "AAPL", "date": "2023-01-01", "price": 100},
+        {"ticker": "AAPL", "date": "2023-01-03", "price": 110}
+    ]
+    result = construct_df_from_ohlc(data, dtype="float32")
+    assert (result.dtypes == "float32").all()
+    assert result.loc['2023-01-03', 'AAPL'] == pytest.approx(110)
@@ -0,0 +1,67 @@
+import json
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from routes.system import system
+from utils.router import API_TOKEN
+
+
+@pytest.fixture
+def client() -> FlaskClient:
+    """
+    Create a test client for a Flask app serving the system blueprint.
+
+    :returns: A test client for the Flask application
+    """
+    app = Flask(__name__)
+    app.register_blueprint(system, url_prefix="/system")
+    app.config['TESTING'] = True
+    return app.test_client()
+
+def test_execution_settings_report(client: FlaskClient) -> None:
+    response = client.get('/system/execution', headers={'Authorization': f'Bearer {API_TOKEN}'})
+    assert response.status_code == 200
+    report = json.loads(response.data)
+    assert report["settings"]["cpus"] >= 1
+    assert report["settings"]["native_threads"] >= 1
+    assert "native_thread_pools" in report
+    assert report["warning"] is None
+
+    assert client.get('/system/execution').status_code == 401
+
+def test_warm_up(client: FlaskClient) -> None:
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    response = client.post('/system/warmup', headers=headers)
+    assert response.status_code == 200
+    report = json.loads(response.data)
+    assert set(report["imports"]) == {"utils.ml", "utils.spread_stats", "utils.pipeline", "utils.trading", "utils.trading_session", "utils.pair_state"}
+    assert report["workload"]["pairs_pipeline"] > 0
+
+    response = client.get('/system/warmup', headers=headers)
+    assert response.status_code == 200
+    assert json.loads(response.data)["total_seconds"] == report["total_seconds"]
+
+def test_profiled_request(client: FlaskClient, tmp_path) -> None:
+    import pstats
+
+    headers = {'Authorization': f'Bearer {API_TOKEN}', 'X-Profile': 'all'}
+    response = client.get('/system/execution', headers=headers)
+    assert response.status_code == 200
+    assert "settings" in json.loads(response.data)
+    profile_id = response.headers["X-Profile-Id"]
+
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    report = json.loads(client.get(f'/system/profiles/{profile_id}', headers=headers).data)
+    assert report["endpoint"] == "system.get_execution_settings_report"
+    assert report["top_functions"][0]["cumulative_seconds"] >= report["top_functions"][-1]["cumulative_seconds"]
+    assert report["allocation_peak_mib"] >= 0
+    assert profile_id in [profile["profile_id"] for profile in json.loads(client.get('/system/profiles', headers=headers).data)["profiles"]]
+
+    raw = client.get(f'/system/profiles/{profile_id}/pstats', headers=headers).data
+    (tmp_path / "request.pstats").write_bytes(raw)
+    assert pstats.Stats(str(tmp_path / "request.pstats")).total_calls > 0
+
+    assert client.get('/system/execution?profile=sometimes', headers=headers).status_code == 400
+    assert "X-Profile-Id" not in client.get('/system/execution', headers=headers).headers
+    assert client.get('/system/execution', headers={'X-Profile': 'all'}).status_code == 401
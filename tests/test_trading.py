@@ -0,0 +1,173 @@
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from typing import Any, Dict, List
+import json
+import numpy as np
+import pandas as pd
+
+from routes.trading import trading
+from utils.router import API_TOKEN
+
+
+@pytest.fixture
+def app() -> Flask:
+    """
+    Create and configure a Flask app for testing.
+
+    :returns: A Flask application instance configured for testing
+    """
+    app = Flask(__name__)
+    app.register_blueprint(trading, url_prefix="/trading")
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """
+    Create a test client for the Flask app.
+
+    :param app: The Flask application instance
+    :returns: A test client for the Flask application
+    """
+    return app.test_client()
+
+def generate_prices(tickers: List[str], num_days: int) -> List[Dict[str, Any]]:
+    """
+    Generate synthetic random walk prices for testing.
+
+    :param tickers: Tickers to generate prices for
+    :param num_days: Number of days of prices per ticker
+    :returns: A list of dictionaries containing ticker, date and price values
+    """
+    dates = pd.date_range('2023-01-01', periods=num_days)
+    data = []
+    for ticker in tickers:
+        prices = 100 + np.random.randn(num_days).cumsum()
+        for date, price in zip(dates, prices):
+            data.append({"ticker": ticker, "date": date.strftime('%Y-%m-%d'), "price": float(price)})
+    return data
+
+def test_trade_with_model_batch(client: FlaskClient) -> None:
+    """
+    Test the batch backtest endpoint with several pairs.
+
+    :param client: The test client for the Flask application
+    """
+    data = {"data": generate_prices(["AAA", "BBB", "CCC"], 60), "pairs": [["AAA", "BBB"], ["BBB", "CCC"]], "max_workers": 2}
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    response = client.post('/trading/trade_with_model/batch', json=data, headers=headers)
+    assert response.status_code == 200
+    result = json.loads(response.data)
+    assert [(item['ticker_1'], item['ticker_2']) for item in result['results']] == [("AAA", "BBB"), ("BBB", "CCC")]
+    assert all(len(item['results']) == 60 for item in result['results'])
+    assert result['summary']['pairs'] == 2
+    assert 'mean_total_return' in result['summary']
+
+def test_trade_with_model_batch_unknown_ticker(client: FlaskClient) -> None:
+    """
+    Test the batch backtest endpoint with a pair referencing a ticker without prices.
+
+    :param client: The test client for the Flask application
+    """
+    data = {"data": generate_prices(["AAA", "BBB"], 30), "pairs": [["AAA", "ZZZ"]]}
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    response = client.post('/trading/trade_with_model/batch', json=data, headers=headers)
+    assert response.status_code == 400
+    assert "ZZZ" in json.loads(response.data)["error"]
+
+def test_trade_with_model_batch_invalid_data(client: FlaskClient, monkeypatch) -> None:
+    """
+    Test that the batch backtest endpoint answers 400 when the prices are rejected while backtesting.
+
+    :param client: The test client for the Flask application
+    :param monkeypatch: Pytest fixture replacing the backtest
+    """
+    import utils.trading
+
+    def reject(*args, **kwargs):
+        raise ValueError("Not enough overlapping prices")
+
+    monkeypatch.setattr(utils.trading, "trade_pairs_using_model", reject)
+    data = {"data": generate_prices(["AAA", "BBB"], 30), "pairs": [["AAA", "BBB"]]}
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    response = client.post('/trading/trade_with_model/batch', json=data, headers=headers)
+    assert response.status_code == 400
+    assert "Not enough overlapping prices" in json.loads(response.data)["error"]
+
+def test_trade_with_model_batch_no_auth(client: FlaskClient) -> None:
+    """
+    Test the batch backtest endpoint without authentication.
+
+    :param client: The test client for the Flask application
+    """
+    data = {"data": generate_prices(["AAA", "BBB"], 30), "pairs": [["AAA", "BBB"]]}
+    response = client.post('/trading/trade_with_model/batch', json=data)
+    assert response.status_code == 401
+
+def test_trading_session(client: FlaskClient) -> None:
+    """
+    Test starting a live session and advancing it with new bars.
+
+    :param client: The test client for the Flask application
+    """
+    prices = generate_prices(["AAA", "BBB"], 70)
+    history = [point for point in prices if point["date"] < "2023-03-01"]
+    new_bars = [point for point in prices if point["date"] >= "2023-03-01"]
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+
+    response = client.post('/trading/session', json={"data": history, "ticker_1": "AAA", "ticker_2": "BBB"}, headers=headers)
+    assert response.status_code == 200
+    state = json.loads(response.data)["state"]
+    assert state["last_date"] == "2023-02-28"
+
+    response = client.post('/trading/session/update', json={"state": state, "data": new_bars}, headers=headers)
+    assert response.status_code == 200
+    response_data = json.loads(response.data)
+    assert len(response_data["results"]) == 11
+    assert response_data["state"]["last_date"] == "2023-03-11"
+    assert all(result["position"] in (-1, 0, 1) for result in response_data["results"])
+
+    for malformed in ({**state, "unknown": 1}, {**state, "mean": "0.5"}, {**state, "window": 0.5}):
+        response = client.post('/trading/session/update', json={"state": malformed, "data": new_bars}, headers=headers)
+        assert response.status_code == 400
+
+def test_trade_with_model_npz_upload(client: FlaskClient) -> None:
+    """
+    Test that a NumPy columnar upload gives the same backtest as the JSON records.
+
+    :param client: The test client for the Flask application
+    """
+    import io
+    prices = generate_prices(["AAA", "BBB"], 40)
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    expected = client.post('/trading/trade_with_model', json={"data": prices}, headers=headers)
+
+    wide = pd.DataFrame(prices).pivot(index="date", columns="ticker", values="price")
+    buffer = io.BytesIO()
+    np.savez(buffer, dates=wide.index.to_numpy(dtype=str), tickers=wide.columns.to_numpy(dtype=str), prices=wide.to_numpy())
+    response = client.post('/trading/trade_with_model', data=buffer.getvalue(), content_type='application/x-npz', headers=headers)
+
+    assert response.status_code == 200
+    assert json.loads(response.data) == json.loads(expected.data)
+
+def test_trade_with_model_columns_format(client: FlaskClient) -> None:
+    """
+    Test that the columnar response holds the same values as the records, with NaN as null.
+
+    :param client: The test client for the Flask application
+    """
+    data = {"data": generate_prices(["AAA", "BBB"], 40)}
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    records = client.post('/trading/trade_with_model', json=data, headers=headers)
+    columns = client.post('/trading/trade_with_model?format=columns', json=data, headers=headers)
+    assert columns.status_code == 200
+
+    rows = json.loads(records.data.decode().replace('NaN', 'null'))["results"]
+    results = json.loads(columns.data)["results"]
+    assert set(results) == set(rows[0])
+    for field, values in results.items():
+        assert values == [row[field] for row in rows]
+
+    response = client.post('/trading/trade_with_model?format=xml', json=data, headers=headers)
+    assert response.status_code == 406
@@ -0,0 +1,50 @@
+import pytest
+import numpy as np
+import pandas as pd
+from utils.batch_stats import (
+    compute_half_lives,
+    compute_hedge_ratios,
+    compute_mean_crossings,
+    compute_pair_correlations,
+    compute_residual_matrix
+)
+from utils.spread_stats import calculate_mean_crossing_frequency, compute_half_life, compute_spread_statistics
+
+@pytest.fixture
+def sample_df():
+    return pd.DataFrame(
+        100 + np.random.randn(150, 4).cumsum(axis=0),
+        columns=['A', 'B', 'C', 'D'],
+        index=pd.date_range('2023-01-01', periods=150)
+    )
+
+@pytest.fixture
+def pair_indices():
+    return np.array([[0, 1], [2, 3], [3, 0]])
+
+def test_compute_hedge_ratios_and_residuals(sample_df, pair_indices):
+    prices = sample_df.to_numpy()
+    slope, intercept = compute_hedge_ratios(prices, pair_indices)
+    residuals = compute_residual_matrix(prices, pair_indices, slope, intercept)
+    assert residuals.shape == (150, 3)
+    for position, (first, second) in enumerate(pair_indices):
+        expected_slope, expected_intercept, expected_residuals = compute_spread_statistics(sample_df, sample_df.columns[first], sample_df.columns[second])
+        assert slope[position] == pytest.approx(expected_slope)
+        assert intercept[position] == pytest.approx(expected_intercept)
+        assert np.allclose(residuals[:, position], expected_residuals)
+
+def test_compute_half_lives_and_mean_crossings(sample_df, pair_indices):
+    prices = sample_df.to_numpy()
+    residuals = compute_residual_matrix(prices, pair_indices, *compute_hedge_ratios(prices, pair_indices))
+    half_lives = compute_half_lives(residuals)
+    mean_crossings = compute_mean_crossings(residuals)
+    for position in range(len(pair_indices)):
+        column = pd.Series(residuals[:, position])
+        assert half_lives[position] == pytest.approx(compute_half_life(column))
+        assert mean_crossings[position] == calculate_mean_crossing_frequency(column)
+
+def test_compute_pair_correlations(sample_df, pair_indices):
+    prices = sample_df.to_numpy()
+    correlations = compute_pair_correlations(prices, pair_indices)
+    for position, (first, second) in enumerate(pair_indices):
+        assert correlations[position] == pytest.approx(np.corrcoef(prices[:, first], prices[:, second])[0, 1])
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from utils.cache import StageCache, estimate_nbytes, hash_records, stage_key
+
+
+def test_hash_records():
+    records = [{"ticker": "A", "date": "2023-01-01", "price": 1.0, "volume": 10}]
+    same_prices = [{"ticker": "A", "date": "2023-01-01", "price": 1.0, "volume": 20}]
+    other_prices = [{"ticker": "A", "date": "2023-01-01", "price": 2.0, "volume": 10}]
+    keys = ("ticker", "date", "price")
+    assert hash_records(records, keys) == hash_records(same_prices, keys)
+    assert hash_records(records, keys) != hash_records(other_prices, keys)
+    assert stage_key("parent", "pca") != stage_key("parent", "pca", n_components=5)
+
+def test_stage_cache_hits_and_misses():
+    cache = StageCache(max_bytes=1024)
+    calls = []
+    compute = lambda: calls.append(1) or np.zeros(4)
+    cache.get_or_compute("key", "stage", compute)
+    cache.get_or_compute("key", "stage", compute)
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["stages"]["stage"] == {"hits": 1, "misses": 1}
+    assert stats["entries"] == 1
+    assert stats["bytes"] == 32
+
+def test_stage_cache_evicts_least_recently_used():
+    cache = StageCache(max_bytes=200)
+    cache.put("a", np.zeros(10))
+    cache.put("b", np.zeros(10))
+    cache.get_or_compute("a", "stage", lambda: None)
+    cache.put("c", np.zeros(10))
+    cache.put("too_large", np.zeros(100))
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= 200
+    assert isinstance(cache.get_or_compute("a", "stage", lambda: "recomputed"), np.ndarray)
+    assert cache.get_or_compute("b", "stage", lambda: "recomputed") == "recomputed"
+
+def test_estimate_nbytes():
+    df = pd.DataFrame(np.zeros((10, 2)))
+    assert estimate_nbytes(df) >= 160
+    assert estimate_nbytes((np.zeros(2), np.zeros(3))) == 40
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from flask import json
+
+from tests.test_ml import app, client, generate_universe
+from utils.clustering import CLUSTERING_BACKENDS, cluster_points, group_by_label
+from utils.router import API_TOKEN
+
+
+def blobs(points_per_blob: int = 20, seed: int = 0) -> np.ndarray:
+    """
+    Generate three well separated groups of points.
+
+    :param points_per_blob: Number of points per group
+    :param seed: Seed of the random generator
+    :returns: Matrix of shape (3 * points_per_blob, 2)
+    """
+    rng = np.random.default_rng(seed)
+    centers = np.array([[0.0, 0.0], [8.0, 0.0], [0.0, 8.0]])
+    return np.concatenate([center + 0.3 * rng.standard_normal((points_per_blob, 2)) for center in centers])
+
+def test_group_by_label_skips_noise():
+    labels = np.array([1, -1, 0, 1, 0])
+    assert group_by_label(labels, ["A", "B", "C", "D", "E"]) == {1: ["A", "D"], 0: ["C", "E"]}
+
+@pytest.mark.parametrize("method", sorted(CLUSTERING_BACKENDS))
+def test_every_backend_recovers_separated_groups(method):
+    points = blobs()
+    tickers = [f"T{i}" for i in range(len(points))]
+    kwargs = {"n_clusters": 3} if method == "minibatch_kmeans" else {}
+
+    cluster_dict = cluster_points(points, tickers, method, **kwargs)
+
+    assert all(isinstance(label, int) for label in cluster_dict)
+    groups = [{int(ticker[1:]) // 20 for ticker in members} for members in cluster_dict.values()]
+    assert all(len(group) == 1 for group in groups)
+    assert set().union(*groups) == {0, 1, 2}
+
+def test_cluster_points_unknown_method():
+    with pytest.raises(ValueError, match="Unknown clustering method"):
+        cluster_points(blobs(), [str(i) for i in range(60)], "spectral")
+
+def test_suggest_pairs_with_clustering_method(client):
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    data = {"data": generate_universe(24, 150)}
+
+    for method in ("hdbscan", "minibatch_kmeans"):
+        response = client.post('/ml/pairs', json={**data, "clustering_method": method}, headers=headers)
+        assert response.status_code == 200
+
+    response = client.post('/ml/pairs', json={**data, "clustering_method": "spectral"}, headers=headers)
+    assert response.status_code == 400
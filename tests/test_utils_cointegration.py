@@ -0,0 +1,40 @@
+import pytest
+import numpy as np
+from statsmodels.tsa.stattools import adfuller
+from statsmodels.tsa.adfvalues import mackinnonp
+from utils.cointegration import ADF_TOLERANCE, adfuller_batch, mackinnon_p_values
+
+@pytest.fixture
+def sample_series():
+    rng = np.random.default_rng(0)
+    random_walks = rng.standard_normal((300, 3)).cumsum(axis=0)
+    mean_reverting = np.zeros((300, 3))
+    shocks = rng.standard_normal((300, 3))
+    for day in range(1, 300):
+        mean_reverting[day] = 0.7 * mean_reverting[day - 1] + shocks[day]
+    return np.hstack([random_walks, mean_reverting])
+
+@pytest.mark.parametrize("regression", ["c", "ct", "n"])
+@pytest.mark.parametrize("autolag", ["AIC", "BIC", None])
+def test_adfuller_batch_matches_statsmodels(sample_series, regression, autolag):
+    statistics, p_values, lags = adfuller_batch(sample_series, regression=regression, autolag=autolag, batch_size=4)
+    for column in range(sample_series.shape[1]):
+        expected = adfuller(sample_series[:, column], regression=regression, autolag=autolag)
+        assert statistics[column] == pytest.approx(expected[0], abs=ADF_TOLERANCE)
+        assert p_values[column] == pytest.approx(expected[1], abs=ADF_TOLERANCE)
+        assert lags[column] == expected[2]
+
+def test_adfuller_batch_fixed_lag(sample_series):
+    statistics, _, lags = adfuller_batch(sample_series[:, 0], maxlag=2, autolag=None)
+    assert lags.tolist() == [2]
+    assert statistics[0] == pytest.approx(adfuller(sample_series[:, 0], maxlag=2, autolag=None)[0], abs=ADF_TOLERANCE)
+
+def test_mackinnon_p_values():
+    statistics = np.array([-25.0, -4.0, -1.61, -1.0, 0.5, 3.0])
+    p_values = mackinnon_p_values(statistics, regression="c")
+    assert p_values[0] == 0.0
+    assert p_values[-1] == 1.0
+    for statistic, p_value in zip(statistics, p_values):
+        assert p_value == pytest.approx(mackinnonp(statistic, regression="c"), abs=ADF_TOLERANCE)
+    with pytest.raises(ValueError):
+        adfuller_batch(np.zeros((50, 1)), autolag="HQIC")
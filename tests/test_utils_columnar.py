@@ -0,0 +1,47 @@
+import pytest
+import io
+import numpy as np
+import pandas as pd
+import utils.columnar
+from utils.columnar import UnsupportedFormatError, is_columnar_upload, load_prices, load_prices_arrow, load_prices_npz
+from utils.preprocessing import construct_df_from_ohlc
+
+@pytest.fixture
+def sample_records():
+    dates = pd.date_range('2023-01-01', periods=5).strftime('%Y-%m-%d')
+    records = [{"ticker": ticker, "date": date, "price": 10.0 * (column + 1) + day} for column, ticker in enumerate(["A", "B", "C"]) for day, date in enumerate(dates)]
+    return [record for record in records if not (record["ticker"] == "B" and record["date"] == dates[2])]
+
+def to_npz(df):
+    buffer = io.BytesIO()
+    np.savez(buffer, dates=df.index.strftime('%Y-%m-%d').to_numpy(dtype=str), tickers=df.columns.to_numpy(dtype=str), prices=df.to_numpy())
+    return buffer.getvalue()
+
+def test_load_prices_npz_matches_records(sample_records):
+    expected = construct_df_from_ohlc(sample_records)
+    wide = pd.DataFrame(sample_records).pivot(index="date", columns="ticker", values="price")
+    wide.index = pd.to_datetime(wide.index)
+    df = load_prices(to_npz(wide), "application/x-npz")
+    pd.testing.assert_frame_equal(df, expected, check_names=False)
+    assert is_columnar_upload("application/x-npz")
+    assert not is_columnar_upload("application/json")
+
+def test_load_prices_npz_rejects_bad_shapes():
+    buffer = io.BytesIO()
+    np.savez(buffer, dates=np.array(["2023-01-01"]), tickers=np.array(["A", "B"]), prices=np.zeros((2, 2)))
+    with pytest.raises(ValueError):
+        load_prices_npz(buffer.getvalue())
+
+def test_load_prices_arrow_matches_records(sample_records):
+    pa = pytest.importorskip("pyarrow")
+    table = pa.Table.from_pandas(pd.DataFrame(sample_records), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    df = load_prices_arrow(sink.getvalue().to_pybytes())
+    pd.testing.assert_frame_equal(df, construct_df_from_ohlc(sample_records), check_names=False)
+
+def test_load_prices_arrow_without_pyarrow(monkeypatch):
+    monkeypatch.setattr(utils.columnar, "pa", None)
+    with pytest.raises(UnsupportedFormatError):
+        load_prices_arrow(b"")
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from threadpoolctl import ThreadpoolController
+
+from utils.execution import (
+    ExecutionSettings,
+    get_threadpool_controller,
+    in_process_state_warning,
+    limit_native_threads,
+    native_thread_environment,
+    read_cgroup_cpu_quota
+)
+
+
+def test_read_cgroup_cpu_quota_v2(tmp_path):
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert read_cgroup_cpu_quota(str(tmp_path)) == pytest.approx(1.5)
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert read_cgroup_cpu_quota(str(tmp_path)) is None
+
+def test_read_cgroup_cpu_quota_v1(tmp_path):
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("200000\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert read_cgroup_cpu_quota(str(tmp_path)) == pytest.approx(2.0)
+
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    assert read_cgroup_cpu_quota(str(tmp_path)) is None
+
+def test_execution_settings_default_to_one_worker(tmp_path):
+    settings = ExecutionSettings.from_environment({"CPU_LIMIT": "8"}, cgroup_root=str(tmp_path))
+    assert settings.web_workers == 1
+    assert settings.web_threads == 16
+    assert settings.process_workers == 8
+    assert settings.native_threads == 8
+    assert in_process_state_warning(settings) is None
+
+def test_execution_settings_share_cpus_between_workers(tmp_path):
+    settings = ExecutionSettings.from_environment({"CPU_LIMIT": "8", "WEB_CONCURRENCY": "2"}, cgroup_root=str(tmp_path))
+    assert settings.web_workers == 2
+    assert settings.process_workers == 4
+    assert settings.native_threads == 4
+    assert "background jobs" in in_process_state_warning(settings)
+
+    settings = ExecutionSettings.from_environment({"CPU_LIMIT": "2", "WEB_CONCURRENCY": "4", "NATIVE_THREADS": "3"}, cgroup_root=str(tmp_path))
+    assert settings.process_workers == 1
+    assert settings.native_threads == 3
+    assert native_thread_environment(3)["OMP_NUM_THREADS"] == "3"
+
+def test_limit_native_threads():
+    np.ones((4, 4)) @ np.ones((4, 4))
+    with limit_native_threads(1):
+        assert all(info["num_threads"] == 1 for info in get_threadpool_controller().info())
+
+def test_limit_native_threads_covers_libraries_loaded_later():
+    from sklearn.cluster import OPTICS
+    from scipy import linalg
+    with limit_native_threads(1):
+        assert all(info["num_threads"] == 1 for info in ThreadpoolController().info())
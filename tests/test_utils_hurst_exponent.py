@@ -0,0 +1,35 @@
+import pytest
+import numpy as np
+from hurst import compute_Hc
+from utils.hurst_exponent import compute_hurst_exponents, hurst_window_sizes
+
+@pytest.fixture
+def sample_series():
+    rng = np.random.default_rng(0)
+    series = rng.standard_normal((260, 4)).cumsum(axis=0)
+    series[:, 1] = np.sin(np.arange(260) / 5)
+    series[:, 2] = rng.standard_normal(260)
+    return series
+
+def test_hurst_window_sizes():
+    assert hurst_window_sizes(100) == [10, 17, 31, 56, 100]
+
+@pytest.mark.parametrize("simplified", [True, False])
+def test_compute_hurst_exponents_matches_compute_hc(sample_series, simplified):
+    exponents = compute_hurst_exponents(sample_series, simplified=simplified)
+    for column in range(sample_series.shape[1]):
+        expected, _, _ = compute_Hc(sample_series[:, column], kind='random_walk', simplified=simplified)
+        assert exponents[column] == pytest.approx(expected, abs=1e-10)
+
+def test_compute_hurst_exponents_dfa(sample_series):
+    exponents = compute_hurst_exponents(sample_series, method="dfa")
+    assert exponents.shape == (4,)
+    assert 0.3 < exponents[0] < 0.7
+    assert exponents[2] < 0.2
+
+def test_compute_hurst_exponents_invalid_input(sample_series):
+    with pytest.raises(ValueError):
+        compute_hurst_exponents(sample_series[:99])
+    with pytest.raises(ValueError):
+        compute_hurst_exponents(sample_series, method="periodogram")
+    assert np.isnan(compute_hurst_exponents(np.ones(120))[0])
@@ -0,0 +1,76 @@
+import pytest
+from flask import Flask
+
+import utils.metrics
+from routes.ml import ml
+from utils.cache import stage_cache
+from utils.metrics import Histogram, MetricsRegistry, init_metrics, metrics_suppressed, record_count, registry, stage_timer
+from utils.pipeline import count_pairs_reaching
+from utils.router import API_TOKEN
+from tests.test_ml import generate_universe
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(ml, url_prefix="/ml")
+    init_metrics(app)
+    app.config['TESTING'] = True
+    return app.test_client()
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 5.0):
+        histogram.observe(value)
+
+    lines = histogram.render("latency_seconds", 'stage="pca"')
+    assert lines[:3] == [
+        'latency_seconds_bucket{stage="pca",le="0.1"} 1',
+        'latency_seconds_bucket{stage="pca",le="1.0"} 3',
+        'latency_seconds_bucket{stage="pca",le="+Inf"} 4'
+    ]
+    assert lines[-1] == 'latency_seconds_count{stage="pca"} 4'
+
+def test_registry_renders_counters():
+    metrics = MetricsRegistry()
+    metrics.increment("pipeline_items_total", 3, item="tickers")
+    metrics.increment("pipeline_items_total", 2, item="tickers")
+    assert 'pipeline_items_total{item="tickers"} 5' in metrics.render()
+
+def test_stage_timer_disabled(monkeypatch):
+    registry.clear()
+    monkeypatch.setattr(utils.metrics, "METRICS_ENABLED", False)
+    with stage_timer("pca"):
+        record_count("tickers", 10)
+    assert registry.render() == "\n"
+
+def test_warm_up_workload_records_no_metrics():
+    from utils.warmup import run_synthetic_workload
+
+    registry.clear()
+    with metrics_suppressed():
+        with stage_timer("pca"):
+            record_count("tickers", 10)
+    run_synthetic_workload()
+    assert registry.render() == "\n"
+
+def test_count_pairs_reaching():
+    rejections = {"mean_crossings": 5, "half_life": 3, "cointegration": 1}
+    assert count_pairs_reaching(20, rejections, ("mean_crossings", "half_life", "cointegration"), "cointegration") == 12
+    assert count_pairs_reaching(20, rejections, ("cointegration", "mean_crossings"), "cointegration") == 20
+
+def test_pairs_response_has_server_timing_and_metrics(client):
+    stage_cache.clear()
+    headers = {'Authorization': f'Bearer {API_TOKEN}'}
+    response = client.post('/ml/pairs', json={"data": generate_universe(8, 120)}, headers=headers)
+    assert response.status_code == 200
+
+    server_timing = response.headers["Server-Timing"]
+    for stage in ("parse", "validate", "pivot", "pca", "clustering", "pair_tests", "serialize", "total"):
+        assert f"{stage};dur=" in server_timing
+    assert 'tickers;desc="8"' in server_timing
+
+    exposition = client.get('/metrics', headers=headers).get_data(as_text=True)
+    assert 'stage_duration_seconds_count{stage="pca"}' in exposition
+    assert 'http_request_duration_seconds_bucket{endpoint="ml.suggest_pairs",method="POST",status="200",le="+Inf"}' in exposition
+    assert client.get('/metrics').status_code == 401
@@ -2,7 +2,17 @@ import pytest
 import numpy as np
 import pandas as pd
 import pendulum
-from utils.ml import apply_pca_and_scaling, apply_optics, calculate_rlrt_trend_and_confidence
+from utils.ml import (
+    apply_optics,
+    apply_pca_and_scaling,
+    calculate_rlrt_matrix,
+    calculate_rlrt_trend_and_confidence,
+    calculate_rlrt_trends_and_confidences,
+    fit_incremental_pca,
+    generate_candidate_pairs,
+    row_chunks
+)
+from itertools import combinations
 
 def test_apply_pca_and_scaling():
     df_returns = pd.DataFrame(np.random.rand(100, 10))
@@ -10,6 +20,43 @@ def test_apply_pca_and_scaling():
     assert isinstance(result, np.ndarray)
     assert result.shape[1] == 5 
 
+def factor_returns(num_rows: int, num_tickers: int = 10, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    loadings = rng.standard_normal((3, num_tickers)) * np.array([[3.0], [2.0], [1.5]])
+    return pd.DataFrame(rng.standard_normal((num_rows, 3)) @ loadings + 0.1 * rng.standard_normal((num_rows, num_tickers)))
+
+def test_row_chunks_cover_rows_without_short_chunks():
+    chunks = list(row_chunks(1050, 100))
+    assert chunks[0][0] == 0 and chunks[-1][1] == 1050
+    assert all(previous[1] == following[0] for previous, following in zip(chunks, chunks[1:]))
+    assert min(stop - start for start, stop in chunks) >= 100
+    assert list(row_chunks(30, 100)) == [(0, 30)]
+
+@pytest.mark.parametrize("method", ["incremental", "randomized"])
+def test_apply_pca_and_scaling_methods_match_full(method):
+    df_returns = factor_returns(3000)
+    full = apply_pca_and_scaling(df_returns)
+    result = apply_pca_and_scaling(df_returns, method=method, chunk_size=256)
+    assert result.shape == full.shape
+    for component in range(3):
+        assert abs(np.corrcoef(full[:, component], result[:, component])[0, 1]) > 0.999
+
+def test_fit_incremental_pca_warm_start():
+    df_returns = factor_returns(2000)
+    model = fit_incremental_pca(df_returns.iloc[:1500], 5, chunk_size=256)
+    model = fit_incremental_pca(df_returns.iloc[1500:], 5, chunk_size=256, model=model)
+    reference = fit_incremental_pca(df_returns, 5, chunk_size=256)
+
+    assert model.n_samples_seen_ == 2000
+    np.testing.assert_allclose(np.abs(model.components_[:3]), np.abs(reference.components_[:3]), atol=1e-6)
+    warm = apply_pca_and_scaling(df_returns.iloc[1500:], model=fit_incremental_pca(df_returns.iloc[:1500], 5))
+    assert warm.shape == (10, 5)
+
+    with pytest.raises(ValueError):
+        fit_incremental_pca(df_returns.iloc[:3], 5, model=model)
+    with pytest.raises(ValueError):
+        apply_pca_and_scaling(df_returns, method="sparse")
+
 def test_apply_optics():
     scaled_principal_components = np.random.rand(10, 5)
     df_returns = pd.DataFrame(np.random.rand(100, 10), columns=[f'ticker_{i}' for i in range(10)])
@@ -20,6 +67,28 @@ def test_apply_optics():
         assert isinstance(pair[0], str)
         assert isinstance(pair[1], str)
 
+def test_generate_candidate_pairs():
+    tickers = [f'ticker_{i}' for i in range(8)]
+    df_returns = pd.DataFrame(np.random.randn(100, 8), columns=tickers)
+    cluster_dict = {0: tickers[:5], 1: tickers[5:]}
+
+    pruning_counts = {}
+    all_pairs = list(generate_candidate_pairs(cluster_dict, df_returns, pruning_counts=pruning_counts))
+    assert all_pairs == list(combinations(tickers[:5], 2)) + list(combinations(tickers[5:], 2))
+    assert pruning_counts == {"candidate_pairs": 13, "pruned_pairs": 0}
+
+    correlations = df_returns.corr()
+    top_pairs = list(generate_candidate_pairs(cluster_dict, df_returns, top_k=1, pruning_counts=pruning_counts, block_size=2))
+    assert set(top_pairs) <= set(all_pairs)
+    for ticker in tickers:
+        cluster = next(members for members in cluster_dict.values() if ticker in members)
+        best = correlations.loc[ticker, [other for other in cluster if other != ticker]].idxmax()
+        assert (ticker, best) in top_pairs or (best, ticker) in top_pairs
+    assert pruning_counts["pruned_pairs"] == 13 - len(top_pairs)
+
+    floor_pairs = list(generate_candidate_pairs(cluster_dict, df_returns, min_correlation=0.0))
+    assert floor_pairs == [pair for pair in all_pairs if correlations.loc[pair[0], pair[1]] >= 0.0]
+
 def test_calculate_rlrt_trend_and_confidence():
     dates = [pendulum.now().add(days=i) for i in range(10)]
     spreads = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
@@ -29,4 +98,29 @@ def test_calculate_rlrt_trend_and_confidence():
     assert 'trend' in result
     assert 'confidence' in result
     assert result['trend'] in ['positive', 'negative']
-    assert 0 <= result['confidence'] <= 1
\ No newline at end of file
+    assert 0 <= result['confidence'] <= 1
+
+def test_calculate_rlrt_trends_and_confidences_matches_single_window():
+    dates = np.array(['2024-01-01', '2024-01-02', '2024-01-04', '2024-01-05', '2024-01-08', '2024-01-09',
+                      '2024-01-10', '2024-01-11', '2024-01-12', '2024-01-15', '2024-01-16', '2024-01-17'], dtype='datetime64[D]')
+    spreads = np.random.rand(12)
+    window_dates, positive, confidences = calculate_rlrt_trends_and_confidences(dates, spreads)
+    assert len(window_dates) == 3
+    for i in range(3):
+        expected = calculate_rlrt_trend_and_confidence(
+            [pendulum.parse(str(date)) for date in dates[i:i+10]],
+            list(spreads[i:i+10])
+        )
+        assert str(window_dates[i]) == expected['date']
+        assert ("positive" if positive[i] else "negative") == expected['trend']
+        assert confidences[i] == pytest.approx(expected['confidence'])
+
+def test_calculate_rlrt_matrix():
+    dates = np.arange(np.datetime64('2024-01-01'), np.datetime64('2024-01-13'))
+    series = [(dates, np.arange(12, dtype=float)), (dates[2:], np.arange(10, 0, -1, dtype=float))]
+    all_dates, trends, confidences = calculate_rlrt_matrix(series)
+    assert len(all_dates) == 3
+    assert trends.shape == (2, 3)
+    assert trends[0].tolist() == ["positive"] * 3
+    assert trends[1].tolist() == [None, None, "negative"]
+    assert np.isnan(confidences[1, 0])
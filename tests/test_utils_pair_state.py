@@ -0,0 +1,92 @@
+import pytest
+import json
+import numpy as np
+import pandas as pd
+from utils.batch_stats import compute_half_lives
+from utils.cointegration import adfuller_batch
+from utils.pair_state import PairStatisticsState, align_pair_bars
+from utils.spread_stats import compute_statistical_criteria_tests_for_pair
+
+@pytest.fixture
+def sample_df():
+    common = np.random.randn(160).cumsum()
+    return pd.DataFrame({
+        'A': 100 + common + np.random.randn(160),
+        'B': 50 + 2 * common + np.random.randn(160)
+    }, index=pd.date_range('2023-01-01', periods=160))
+
+def test_update_matches_full_recomputation(sample_df):
+    state = PairStatisticsState.from_prices('A', 'B', sample_df.iloc[:120], full_refresh_interval=40)
+    for date, row in sample_df.iloc[120:].iterrows():
+        state.update(date.strftime('%Y-%m-%d'), row['A'], row['B'])
+
+    statistics = state.statistics()
+    expected = compute_statistical_criteria_tests_for_pair(['A', 'B'], sample_df)
+    assert statistics['observations'] == 160
+    assert statistics['bars_since_refresh'] == 0
+    assert statistics['spread_statistics']['slope'] == pytest.approx(expected['spread_statistics']['slope'])
+    assert statistics['spread_statistics']['intercept'] == pytest.approx(expected['spread_statistics']['intercept'])
+    assert statistics['half_life'] == pytest.approx(expected['half_life'], rel=1e-6)
+    assert statistics['mean_crossings'] == expected['mean_crossings']
+    assert not statistics['mean_crossings_approximate']
+    assert statistics['cointegration_critical_value'] == pytest.approx(expected['cointegration_critical_value'], abs=1e-6)
+    assert statistics['hurst_exponent'] == pytest.approx(expected['hurst_exponent'])
+
+def test_half_life_is_exact_between_refreshes(sample_df):
+    state = PairStatisticsState.from_prices('A', 'B', sample_df.iloc[:150], full_refresh_interval=100)
+    for date, row in sample_df.iloc[150:].iterrows():
+        state.update(date.strftime('%Y-%m-%d'), row['A'], row['B'])
+    assert state.bars_since_refresh == 10
+    expected = compute_statistical_criteria_tests_for_pair(['A', 'B'], sample_df)
+    assert state.half_life() == pytest.approx(expected['half_life'], rel=1e-6)
+
+def test_state_keeps_a_bounded_window(sample_df):
+    state = PairStatisticsState.from_prices('A', 'B', sample_df.iloc[:120], full_refresh_interval=40, window_size=100)
+    for date, row in sample_df.iloc[120:].iterrows():
+        state.update(date.strftime('%Y-%m-%d'), row['A'], row['B'])
+
+    assert len(state.window_1) == len(state.window_2) == 100
+    assert state.window_1 == sample_df['A'].iloc[-100:].tolist()
+    statistics = state.statistics()
+    assert statistics['test_observations'] == 100
+    assert statistics['mean_crossings_approximate']
+
+    residuals = state.residuals(sample_df['A'], sample_df['B'])[:, np.newaxis]
+    expected = compute_statistical_criteria_tests_for_pair(['A', 'B'], sample_df)
+    assert statistics['cointegration_critical_value'] == pytest.approx(adfuller_batch(residuals[-100:])[1][0])
+    assert statistics['half_life'] == pytest.approx(expected['half_life'], rel=1e-6)
+
+    state.refresh(sample_df['A'].to_numpy(), sample_df['B'].to_numpy())
+    assert state.mean_crossings == expected['mean_crossings']
+    assert not state.mean_crossings_approximate
+    with pytest.raises(ValueError):
+        state.refresh(sample_df['A'].to_numpy(), sample_df['B'].to_numpy()[1:])
+
+def test_state_round_trip(sample_df):
+    state = PairStatisticsState.from_prices('A', 'B', sample_df)
+    restored = PairStatisticsState.from_dict(json.loads(json.dumps(state.to_dict())))
+    assert restored == state
+    assert len(state.to_dict()["window_1"]) == 160
+    with pytest.raises(ValueError):
+        PairStatisticsState.from_dict({**state.to_dict(), "unknown": 1})
+    with pytest.raises(ValueError):
+        PairStatisticsState.from_dict({**state.to_dict(), "window_size": 100})
+
+def test_half_life_of_collinear_pair_is_not_an_error():
+    prices = 100.0 + np.arange(120) % 7
+    df = pd.DataFrame({'A': prices, 'B': prices + 3}, index=pd.date_range('2023-01-01', periods=120))
+    state = PairStatisticsState.from_prices('A', 'B', df)
+    state.update('2023-05-01', 101.0, 104.0)
+    expected = compute_half_lives(state.residuals(np.append(prices, 101.0), np.append(prices + 3, 104.0))[:, np.newaxis])[0]
+    np.testing.assert_equal(state.statistics()['half_life'], expected)
+
+def test_align_pair_bars():
+    data = [
+        {"ticker": "B", "date": "2023-01-03", "price": 4.0},
+        {"ticker": "A", "date": "2023-01-03", "price": 3.0},
+        {"ticker": "A", "date": "2023-01-02", "price": 2.0},
+        {"ticker": "A", "date": "2023-01-01", "price": 1.0},
+        {"ticker": "B", "date": "2023-01-01", "price": 1.0},
+        {"ticker": "C", "date": "2023-01-03", "price": 9.0}
+    ]
+    assert align_pair_bars(data, "A", "B", "2023-01-01") == [("2023-01-03", 3.0, 4.0)]
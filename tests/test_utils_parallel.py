@@ -0,0 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from utils.parallel import attach_shared_array, chunked, default_worker_count, get_process_pool, imap_ordered, share_array, worker_limit
+
+def test_chunked():
+    assert list(chunked(iter(range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(chunked([], 3)) == []
+
+def test_imap_ordered():
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(imap_ordered(executor, pow, ((i, 2) for i in range(10)), max_pending=4))
+    assert results == [i ** 2 for i in range(10)]
+
+def test_share_array_round_trip():
+    array = np.random.rand(20, 3)
+    with share_array(array) as spec:
+        with attach_shared_array(spec) as shared:
+            assert np.array_equal(shared, array)
+            assert not shared.flags.writeable
+            del shared
+
+def test_process_pool_is_shared_and_requests_are_capped():
+    assert get_process_pool() is get_process_pool()
+    assert worker_limit(None) == default_worker_count()
+    assert worker_limit(10 ** 6) == default_worker_count()
+    assert worker_limit(0) == 1
@@ -0,0 +1,26 @@
+import numpy as np
+from utils.rolling import sliding_window_regression
+
+def test_sliding_window_regression_linear_series():
+    y = 2.0 * np.arange(20) + 5
+    slope, intercept, ss_x, ss_y, ss_res = sliding_window_regression(y, window_size=5)
+    assert len(slope) == 16
+    assert np.allclose(slope, 2.0)
+    assert np.allclose(intercept, y[:16])
+    assert np.allclose(ss_res, 0)
+    assert np.all(ss_x > 0)
+    assert np.all(ss_y > 0)
+
+def test_sliding_window_regression_custom_regressor():
+    x = np.array([0, 1, 3, 4, 7, 8, 10], dtype=float)
+    y = np.random.rand(7)
+    slope, intercept, _, _, _ = sliding_window_regression(y, window_size=4, x=x)
+    for i in range(len(slope)):
+        window_x = x[i:i+4] - x[i]
+        expected_slope, expected_intercept = np.polyfit(window_x, y[i:i+4], 1)
+        assert np.isclose(slope[i], expected_slope)
+        assert np.isclose(intercept[i], expected_intercept)
+
+def test_sliding_window_regression_short_series():
+    slope, intercept, ss_x, ss_y, ss_res = sliding_window_regression(np.arange(3), window_size=5)
+    assert all(len(values) == 0 for values in (slope, intercept, ss_x, ss_y, ss_res))
@@ -0,0 +1,67 @@
+import pytest
+import json
+import numpy as np
+import utils.serialization
+from utils.serialization import NotAcceptableError, encode_json, encode_response, negotiate_response_format, records_to_columns, to_builtin
+
+@pytest.fixture
+def sample_payload():
+    return {
+        "results": {
+            "spread": np.array([0.5, np.nan]),
+            "position": np.array([0, 1], dtype=np.int8),
+            "signal": np.array(["None", "Long"], dtype=object),
+            "predicted_trend": np.array([None, None], dtype=object)
+        },
+        "max_drawdown": np.float64(-0.1),
+        "total_return": float("nan")
+    }
+
+def test_encode_json_writes_nan_as_null(sample_payload, monkeypatch):
+    expected = {
+        "results": {"spread": [0.5, None], "position": [0, 1], "signal": ["None", "Long"], "predicted_trend": [None, None]},
+        "max_drawdown": -0.1,
+        "total_return": None
+    }
+    assert json.loads(encode_json(sample_payload)) == expected
+    monkeypatch.setattr(utils.serialization, "orjson", None)
+    assert json.loads(encode_json(sample_payload)) == expected
+    assert to_builtin(sample_payload) == expected
+
+def test_records_to_columns():
+    records = [
+        {"ticker_1": "A", "ticker_2": "B", "spread_statistics": {"slope": 1.0}, "half_life": 3.0},
+        {"ticker_1": "C", "ticker_2": "D", "spread_statistics": {"slope": 2.0}, "half_life": 4.0}
+    ]
+    assert records_to_columns(records) == {"ticker_1": ["A", "C"], "ticker_2": ["B", "D"], "slope": [1.0, 2.0], "half_life": [3.0, 4.0]}
+    assert records_to_columns([]) == {}
+
+def test_negotiate_response_format():
+    assert negotiate_response_format(None) == "records"
+    assert negotiate_response_format("columns") == "columns"
+    assert negotiate_response_format("msgpack") == "msgpack"
+    with pytest.raises(NotAcceptableError):
+        negotiate_response_format("xml")
+
+def test_encode_response_without_optional_packages(sample_payload, monkeypatch):
+    monkeypatch.setattr(utils.serialization, "msgpack", None)
+    monkeypatch.setattr(utils.serialization, "pa", None)
+    with pytest.raises(NotAcceptableError):
+        encode_response(sample_payload, "msgpack")
+    with pytest.raises(NotAcceptableError):
+        encode_response(sample_payload, "arrow", table_key="results")
+    assert encode_response(sample_payload, "columns").mimetype == "application/json"
+
+def test_encode_response_msgpack_and_arrow(sample_payload):
+    msgpack = pytest.importorskip("msgpack")
+    pa = pytest.importorskip("pyarrow")
+
+    response = encode_response(sample_payload, "msgpack")
+    assert response.mimetype == "application/msgpack"
+    assert msgpack.unpackb(response.get_data())["results"]["spread"] == [0.5, None]
+
+    response = encode_response(sample_payload, "arrow", table_key="results")
+    table = pa.ipc.open_stream(response.get_data()).read_all()
+    assert table.column("position").to_pylist() == [0, 1]
+    assert table.column("signal").to_pylist() == ["None", "Long"]
+    assert json.loads(table.schema.metadata[b"metadata"]) == {"max_drawdown": -0.1, "total_return": None}
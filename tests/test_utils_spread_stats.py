@@ -7,7 +7,9 @@ from utils.spread_stats import (
     compute_hurst_exponent,
     compute_half_life,
     calculate_mean_crossing_frequency,
-    run_statistical_criteria_tests_for_pairs
+    resolve_criteria_order,
+    run_statistical_criteria_tests_for_pairs,
+    DEFAULT_CRITERIA_ORDER
 )
 
 @pytest.fixture
@@ -51,4 +53,36 @@ def test_run_statistical_criteria_tests_for_pairs(sample_df):
     if result:
         assert isinstance(result[0], dict)
         assert 'ticker_1' in result[0]
-        assert 'ticker_2' in result[0]
\ No newline at end of file
+        assert 'ticker_2' in result[0]
+
+def test_run_statistical_criteria_tests_for_pairs_parallel():
+    dates = pd.date_range('2023-01-01', periods=200)
+    common = np.random.randn(200).cumsum()
+    df = pd.DataFrame({
+        f'T{i}': 100 + common * (1 + i / 10) + np.random.randn(200) for i in range(5)
+    }, index=dates)
+    pairs_to_eval = [('T0', 'T1'), ('T0', 'T2'), ('T1', 'T3'), ('T2', 'T4'), ('T3', 'T4')]
+
+    serial = run_statistical_criteria_tests_for_pairs(pairs_to_eval, df, chunk_size=2)
+    parallel = run_statistical_criteria_tests_for_pairs(iter(pairs_to_eval), df, n_jobs=2, chunk_size=2)
+
+    assert parallel == serial
+
+def test_run_statistical_criteria_tests_for_pairs_rejection_counts(sample_df):
+    rejection_counts = {}
+    result = run_statistical_criteria_tests_for_pairs([('A', 'B')], sample_df, mean_crossings_threshold=1000, rejection_counts=rejection_counts)
+    assert result == []
+    assert rejection_counts['mean_crossings'] == 1
+    assert sum(rejection_counts.values()) == 1
+
+def test_run_statistical_criteria_tests_for_pairs_min_correlation(sample_df):
+    rejection_counts = {}
+    result = run_statistical_criteria_tests_for_pairs([('A', 'B')], sample_df, min_correlation=1.0, rejection_counts=rejection_counts)
+    assert result == []
+    assert rejection_counts['correlation'] == 1
+
+def test_resolve_criteria_order():
+    assert resolve_criteria_order(['cointegration'])[0] == 'cointegration'
+    assert sorted(resolve_criteria_order(['cointegration'])) == sorted(DEFAULT_CRITERIA_ORDER)
+    with pytest.raises(ValueError):
+        resolve_criteria_order(['unknown'])
@@ -1,7 +1,18 @@
 import pytest
 import pandas as pd
 import numpy as np
-from utils.trading import rolling_regression_trend_with_confidence, trade_pair_using_model
+from utils.trading import (
+    SIGNAL_EXIT_SHORT,
+    SIGNAL_LONG,
+    SIGNAL_NONE,
+    SIGNAL_SHORT,
+    compute_expanding_mean_and_std,
+    rolling_regression_trend_with_confidence,
+    run_backtest_kernel,
+    summarize_backtests,
+    trade_pair_using_model,
+    trade_pairs_using_model
+)
 
 def test_rolling_regression_trend_with_confidence():
     data = np.array([1, 2, 3, 4, 5, 4, 3, 2, 1, 2, 3, 4, 5])
@@ -12,6 +23,15 @@ def test_rolling_regression_trend_with_confidence():
     assert all(trend in [-1, 0, 1] for trend in trends)
     assert all(0 <= conf <= 1 for conf in confidences)
 
+def test_rolling_regression_trend_counts_r2_ties_as_reaching_the_threshold():
+    data = np.array([1.0, 3.0, 2.0, 5.0, 4.0, 6.0, 5.5])
+    _, confidences = rolling_regression_trend_with_confidence(data, window_size=5, forecast_days=0)
+    for r2_threshold in (confidences[0], confidences[0] + 1e-13):
+        trends, _ = rolling_regression_trend_with_confidence(data, window_size=5, forecast_days=0, r2_threshold=r2_threshold)
+        assert trends[0] == 1
+    trends, _ = rolling_regression_trend_with_confidence(data, window_size=5, forecast_days=0, r2_threshold=confidences[0] + 1e-9)
+    assert trends[0] == 0
+
 def test_trade_pair_using_model():
     dates = pd.date_range(start='2020-01-01', periods=100)
     df = pd.DataFrame({
@@ -62,4 +82,82 @@ def test_trade_pair_using_model_edge_cases():
     assert len(result['results']) == 100
     assert result['max_drawdown'] == 0
     assert result['total_return'] == 0
-    assert result['annualized_return'] == 0
\ No newline at end of file
+    assert result['annualized_return'] == 0
+
+def test_rolling_regression_trend_with_confidence_matches_per_window_fit():
+    data = np.random.rand(60)
+    window_size, forecast_days = 10, 3
+    trends, confidences = rolling_regression_trend_with_confidence(data, window_size=window_size, forecast_days=forecast_days)
+
+    expected_trends, expected_confidences = [], []
+    for i in range(window_size, len(data) - forecast_days + 1):
+        y = data[i-window_size:i]
+        slope, intercept = np.polyfit(np.arange(window_size), y, 1)
+        fitted = slope * np.arange(window_size) + intercept
+        r2 = 1 - np.sum((y - fitted) ** 2) / np.sum((y - y.mean()) ** 2)
+        expected_trends.append(int(np.sign(slope)) if r2 > 0.6 else 0)
+        expected_confidences.append(r2)
+
+    assert trends.tolist() == expected_trends
+    assert np.allclose(confidences, expected_confidences)
+
+def test_compute_expanding_mean_and_std():
+    data = np.random.rand(50)
+    mean, std = compute_expanding_mean_and_std(data)
+    assert np.allclose(mean, [np.mean(data[:i+1]) for i in range(len(data))])
+    assert np.allclose(std, [np.std(data[:i+1]) for i in range(len(data))])
+
+def test_run_backtest_kernel():
+    data = np.array([0.5, 0.5, 0.5, 0.5, 1.0, 1.0, 0.5, 0.0, 0.5, 0.5])
+    trends = np.array([0, 0, 0, 0, 0, 0, 1, 0, 0, 0])
+    prices_1 = np.full(10, 10.0)
+    prices_2 = np.array([10.0, 10.0, 10.0, 10.0, 10.0, 11.0, 9.9, 9.9, 9.9, 9.9])
+
+    signals, positions, budgets = run_backtest_kernel(data, trends, prices_1, prices_2, window_size=2, initial_budget=100)
+
+    assert signals[:2].tolist() == [SIGNAL_NONE, SIGNAL_NONE]
+    assert signals[4] == SIGNAL_SHORT
+    assert signals[6] == SIGNAL_EXIT_SHORT
+    assert signals[7] == SIGNAL_LONG
+    assert positions.tolist() == [0, 0, 0, 0, -1, -1, 0, 1, 1, 1]
+    assert budgets[5] == pytest.approx(90.0)
+    assert budgets[6] == pytest.approx(99.0)
+    assert budgets[-1] == pytest.approx(99.0)
+
+def test_trade_pairs_using_model():
+    dates = pd.date_range(start='2020-01-01', periods=100)
+    df = pd.DataFrame({
+        'ticker1': 100 + np.random.randn(100).cumsum(),
+        'ticker2': 100 + np.random.randn(100).cumsum(),
+        'ticker3': 100 + np.random.randn(100).cumsum()
+    }, index=dates)
+    pairs = [('ticker1', 'ticker2'), ('ticker2', 'ticker3')]
+
+    serial = trade_pairs_using_model(df, pairs, max_workers=1)
+    parallel = trade_pairs_using_model(df, pairs, max_workers=2)
+
+    assert [(result['ticker_1'], result['ticker_2']) for result in parallel] == pairs
+    for serial_result, parallel_result in zip(serial, parallel):
+        assert serial_result['total_return'] == parallel_result['total_return']
+        assert serial_result['max_drawdown'] == parallel_result['max_drawdown']
+
+    summary = summarize_backtests(parallel)
+    assert summary['pairs'] == 2
+    assert summary['best_pair']['total_return'] == max(result['total_return'] for result in parallel)
+
+def test_trade_pairs_using_model_matches_single_pair_backtests():
+    from benchmarks.generators import generate_universe
+    from utils.preprocessing import construct_df_from_ohlc
+
+    records, planted_pairs = generate_universe(8, 150, num_cointegrated_pairs=3, seed=1)
+    pairs = planted_pairs + [("T00000", "T00007")]
+
+    batch = trade_pairs_using_model(construct_df_from_ohlc(records), pairs, max_workers=2)
+
+    for (ticker_1, ticker_2), backtest in zip(pairs, batch):
+        pair_df = construct_df_from_ohlc([record for record in records if record["ticker"] in (ticker_1, ticker_2)])
+        expected = trade_pair_using_model(pair_df, ticker_1, ticker_2)
+        assert (backtest["ticker_1"], backtest["ticker_2"]) == (ticker_1, ticker_2)
+        pd.testing.assert_frame_equal(pd.DataFrame(backtest["results"]), pd.DataFrame(expected["results"]))
+        for key in ("max_drawdown", "total_return", "annualized_return"):
+            assert backtest[key] == expected[key]
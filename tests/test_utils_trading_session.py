@@ -0,0 +1,46 @@
+import pytest
+import json
+import numpy as np
+import pandas as pd
+from utils.trading import SIGNAL_LABELS, rolling_regression_trend_with_confidence, run_backtest_kernel
+from utils.trading_session import TradingSessionState
+
+@pytest.fixture
+def sample_df():
+    common = np.random.randn(150).cumsum()
+    return pd.DataFrame({
+        'A': 100 + common + np.random.randn(150),
+        'B': 80 + 1.5 * common + 2 * np.random.randn(150)
+    }, index=pd.date_range('2023-01-01', periods=150))
+
+def test_updates_match_replay_with_frozen_parameters(sample_df):
+    history = 100
+    state = TradingSessionState.from_prices(sample_df.iloc[:history], 'A', 'B')
+    results = [state.update(date.strftime('%Y-%m-%d'), row['A'], row['B']) for date, row in sample_df.iloc[history:].iterrows()]
+
+    spread = sample_df['B'] - (state.slope * sample_df['A'] + state.intercept)
+    data = spread.to_numpy() * state.scale + state.offset
+    history_trends, _ = rolling_regression_trend_with_confidence(data[:history])
+    live_trends, _ = rolling_regression_trend_with_confidence(data, forecast_days=0)
+    trends = np.zeros(len(data))
+    trends[history:] = live_trends[history - 10:len(data) - 10]
+    trends[10:10 + len(history_trends)] = history_trends
+
+    signals, positions, budgets = run_backtest_kernel(data, trends, sample_df['A'].to_numpy(), sample_df['B'].to_numpy())
+    for offset, result in enumerate(results):
+        assert result['signal'] == SIGNAL_LABELS[signals[history + offset]]
+        assert result['position'] == positions[history + offset]
+        assert result['budget'] == pytest.approx(budgets[history + offset])
+        assert result['spread'] == pytest.approx(data[history + offset])
+
+def test_state_round_trip(sample_df):
+    state = TradingSessionState.from_prices(sample_df, 'A', 'B')
+    restored = TradingSessionState.from_dict(json.loads(json.dumps(state.to_dict())))
+    assert restored == state
+    assert len(restored.window) == restored.window_size
+    with pytest.raises(ValueError):
+        TradingSessionState.from_dict({"ticker_1": "A"})
+
+def test_from_prices_requires_enough_history(sample_df):
+    with pytest.raises(ValueError):
+        TradingSessionState.from_prices(sample_df.iloc[:10], 'A', 'B')
@@ -0,0 +1,68 @@
+import io
+import jsonschema
+import numpy as np
+import pytest
+
+from schemas.trading import trade_schema
+from utils.columnar import load_prices_npz
+from utils.validation import compile_schema, validate_instance
+
+
+def make_trade_payload(num_records=50):
+    return {
+        "data": [
+            {"date": f"2023-01-{day % 28 + 1:02d}", "ticker": "AAA" if day % 2 else "BBB", "price": 100.0 + day}
+            for day in range(num_records)
+        ],
+        "ticker_1": "AAA",
+        "ticker_2": "BBB"
+    }
+
+def jsonschema_message(data, schema):
+    with pytest.raises(jsonschema.exceptions.ValidationError) as excinfo:
+        jsonschema.validate(instance=data, schema=schema)
+    return str(excinfo.value)
+
+def test_compile_schema_is_cached():
+    assert compile_schema(trade_schema)[0] is compile_schema(trade_schema)[0]
+    assert compile_schema(trade_schema)[1] is not None
+
+def test_validate_instance_accepts_valid_payload():
+    payload = make_trade_payload()
+    payload["data"][0]["price"] = 100
+    payload["data"][1]["extra"] = "ignored"
+
+    assert validate_instance(payload, trade_schema) is None
+
+@pytest.mark.parametrize("corrupt", [
+    lambda payload: payload["data"][7].pop("price"),
+    lambda payload: payload["data"][3].update(price="100"),
+    lambda payload: payload["data"][5].update(price=True),
+    lambda payload: payload["data"][9].update(ticker=None),
+    lambda payload: payload["data"].__setitem__(4, "AAA,2023-01-01,1.0"),
+    lambda payload: payload.pop("data"),
+    lambda payload: payload.update(data=[])
+])
+def test_validate_instance_matches_jsonschema_errors(corrupt):
+    payload = make_trade_payload()
+    corrupt(payload)
+
+    assert str(validate_instance(payload, trade_schema)) == jsonschema_message(payload, trade_schema)
+
+def test_load_prices_npz_rejects_invalid_columns():
+    def npz(**arrays):
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    tickers = np.array(["AAA", "BBB"])
+    prices = np.array([[1.0, 2.0], [1.5, 2.5]])
+
+    with pytest.raises(ValueError, match="finite"):
+        load_prices_npz(npz(dates=np.array(["2023-01-01", "2023-01-02"]), tickers=tickers, prices=prices * np.inf))
+    with pytest.raises(ValueError, match="Duplicate dates"):
+        load_prices_npz(npz(dates=np.array(["2023-01-01", "2023-01-01"]), tickers=tickers, prices=prices))
+    with pytest.raises(ValueError, match="ISO 8601"):
+        load_prices_npz(npz(dates=np.array(["2023-01-01", "yesterday"]), tickers=tickers, prices=prices))
+    with pytest.raises(ValueError, match="numeric"):
+        load_prices_npz(npz(dates=np.array(["2023-01-01", "2023-01-02"]), tickers=tickers, prices=prices.astype(str)))
@@ -0,0 +1,99 @@
+from typing import Tuple
+import numpy as np
+
+
+def compute_pair_moments(prices: np.ndarray, pair_indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute the means, variances and covariance of every pair from one covariance matrix.
+
+    Only the tickers referenced by the pairs enter the covariance matrix.
+
+    :param prices: Price matrix of shape (days, tickers)
+    :param pair_indices: Integer array of shape (pairs, 2) holding the column of the first and second ticker of each pair
+    :return: Tuple of the mean of the first ticker, mean of the second ticker, sum of squared deviations of the first ticker, sum of squared deviations of the second ticker and sum of cross deviations, one entry per pair
+    """
+    tickers, columns = np.unique(pair_indices, return_inverse=True)
+    columns = columns.reshape(pair_indices.shape)
+    selected = prices[:, tickers]
+
+    means = selected.mean(axis=0)
+    centered = selected - means
+    covariance = centered.T @ centered
+
+    first, second = columns[:, 0], columns[:, 1]
+    return means[first], means[second], covariance[first, first], covariance[second, second], covariance[first, second]
+
+def compute_hedge_ratios(prices: np.ndarray, pair_indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the regression slope and intercept of every pair at once.
+
+    The second ticker of each pair is regressed on the first, as in compute_spread_statistics.
+
+    :param prices: Price matrix of shape (days, tickers)
+    :param pair_indices: Integer array of shape (pairs, 2) holding the column of the first and second ticker of each pair
+    :return: Tuple of slope and intercept arrays, one entry per pair
+    """
+    mean_1, mean_2, ss_1, _, ss_12 = compute_pair_moments(prices, pair_indices)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = ss_12 / ss_1
+
+    return slope, mean_2 - slope * mean_1
+
+def compute_pair_correlations(prices: np.ndarray, pair_indices: np.ndarray) -> np.ndarray:
+    """
+    Compute the Pearson correlation of the prices of every pair at once.
+
+    :param prices: Price matrix of shape (days, tickers)
+    :param pair_indices: Integer array of shape (pairs, 2) holding the columns of the tickers of each pair
+    :return: Array of correlation coefficients, one entry per pair
+    """
+    _, _, ss_1, ss_2, ss_12 = compute_pair_moments(prices, pair_indices)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ss_12 / np.sqrt(ss_1 * ss_2)
+
+def compute_residual_matrix(prices: np.ndarray, pair_indices: np.ndarray, slope: np.ndarray, intercept: np.ndarray) -> np.ndarray:
+    """
+    Build the spread residuals of every pair as the columns of one matrix.
+
+    :param prices: Price matrix of shape (days, tickers)
+    :param pair_indices: Integer array of shape (pairs, 2) holding the columns of the tickers of each pair
+    :param slope: Slope of each pair
+    :param intercept: Intercept of each pair
+    :return: Residual matrix of shape (days, pairs)
+    """
+    return prices[:, pair_indices[:, 1]] - (slope * prices[:, pair_indices[:, 0]] + intercept)
+
+def compute_half_lives(residuals: np.ndarray) -> np.ndarray:
+    """
+    Compute the half-life of mean reversion of every residual column.
+
+    Matches compute_half_life: the change of the residuals is regressed with an intercept on the
+    previous residual, taking the residual before the first day as zero.
+
+    :param residuals: Residual matrix of shape (days, pairs)
+    :return: Array of half-lives, one entry per pair
+    """
+    lagged = np.zeros_like(residuals)
+    lagged[1:] = residuals[:-1]
+    delta = residuals - lagged
+
+    lagged_centered = lagged - lagged.mean(axis=0)
+    delta_centered = delta - delta.mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = (lagged_centered * delta_centered).sum(axis=0) / (lagged_centered ** 2).sum(axis=0)
+        return -np.log(2) / beta
+
+def compute_mean_crossings(residuals: np.ndarray) -> np.ndarray:
+    """
+    Count the mean crossings of every residual column.
+
+    Matches calculate_mean_crossing_frequency: a day counts when the demeaned residual changes sign
+    on the next day or is exactly zero, for every day except the last.
+
+    :param residuals: Residual matrix of shape (days, pairs)
+    :return: Integer array of mean crossing counts, one entry per pair
+    """
+    demeaned = residuals - residuals.mean(axis=0)
+    crossings = (demeaned[:-1] * demeaned[1:] < 0) | (demeaned[:-1] == 0)
+
+    return crossings.sum(axis=0)
@@ -0,0 +1,169 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import pickle
+import threading
+from typing import Any, Callable, Dict, Iterable, List
+import numpy as np
+import pandas as pd
+
+
+STAGE_CACHE_MAX_BYTES = int(os.environ.get("STAGE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+def hash_records(records: List[Dict[str, Any]], keys: Iterable[str]) -> str:
+    """
+    Hash the given fields of a list of records, column by column.
+
+    Only the listed fields enter the hash, so records that differ in fields a stage ignores share a key.
+
+    :param records: List of dictionaries, such as the data points of a request
+    :param keys: Fields to hash, in order
+    :return: Hex digest identifying the content
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for key in keys:
+        digest.update(key.encode())
+        digest.update("\x1f".join([str(record.get(key)) for record in records]).encode())
+        digest.update(b"\x1e")
+
+    return digest.hexdigest()
+
+def hash_bytes(payload: bytes) -> str:
+    """
+    Hash a raw payload, such as a request body.
+
+    :param payload: Bytes to hash
+    :return: Hex digest identifying the content
+    """
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def stage_key(parent_key: str, stage: str, **params: Any) -> str:
+    """
+    Derive the cache key of a pipeline stage from the key of its input and its own parameters.
+
+    Chaining keys this way means a stage is recomputed only when its input or parameters change.
+
+    :param parent_key: Key of the stage input
+    :param stage: Name of the stage
+    :param params: JSON-serializable parameters that affect the stage output
+    :return: Hex digest identifying the stage output
+    """
+    payload = json.dumps([parent_key, stage, params], sort_keys=True, default=str)
+
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+def estimate_nbytes(value: Any) -> int:
+    """
+    Estimate the memory held by a cached value.
+
+    :param value: Cached value
+    :return: Approximate size in bytes
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, tuple):
+        return sum(estimate_nbytes(item) for item in value)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+class StageCache:
+    """
+    In-process LRU cache of pipeline stage outputs, bounded by an approximate memory budget.
+
+    Cached values are shared between requests and must not be modified by callers.
+    """
+
+    def __init__(self, max_bytes: int = STAGE_CACHE_MAX_BYTES) -> None:
+        """
+        :param max_bytes: Memory budget of the cache, 0 disables caching
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._current_bytes = 0
+        self._evictions = 0
+        self._stage_stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: str, stage: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached output of a stage, computing and storing it on a miss.
+
+        :param key: Cache key of the stage output, see stage_key
+        :param stage: Name of the stage, used for the statistics
+        :param compute: Function producing the stage output
+        :return: The stage output
+        """
+        with self._lock:
+            stats = self._stage_stats.setdefault(stage, {"hits": 0, "misses": 0})
+            if key in self._entries:
+                stats["hits"] += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            stats["misses"] += 1
+
+        value = compute()
+        self.put(key, value)
+
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entries to stay within the memory budget.
+
+        Values larger than the whole budget are not stored.
+
+        :param key: Cache key
+        :param value: Value to store
+        """
+        size = estimate_nbytes(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._current_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            while self._entries and self._current_bytes + size > self.max_bytes:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self._current_bytes -= self._sizes.pop(evicted_key)
+                self._evictions += 1
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._current_bytes += size
+
+    def clear(self) -> None:
+        """
+        Drop every entry and reset the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._current_bytes = 0
+            self._evictions = 0
+            self._stage_stats.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the size of the cache and its hit and miss counts.
+
+        :return: Dictionary containing the entry count, memory use, budget, evictions and per-stage hits and misses
+        """
+        with self._lock:
+            stages = {stage: dict(counts) for stage, counts in self._stage_stats.items()}
+            return {
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions,
+                "hits": sum(counts["hits"] for counts in stages.values()),
+                "misses": sum(counts["misses"] for counts in stages.values()),
+                "stages": stages
+            }
+
+stage_cache = StageCache()
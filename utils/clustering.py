@@ -0,0 +1,119 @@
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import numpy as np
+from sklearn.cluster import DBSCAN, HDBSCAN, OPTICS, MiniBatchKMeans
+from sklearn.neighbors import NearestNeighbors
+
+from utils.execution import limit_native_threads
+
+
+DEFAULT_CLUSTERING_METHOD = "optics"
+MIN_SAMPLES = 5
+
+def optics_labels(points: np.ndarray, min_samples: int = MIN_SAMPLES) -> np.ndarray:
+    """
+    Cluster with OPTICS, using the parameters the service has always used.
+
+    Each point's reachability is found with neighborhood queries over all points, so the cost
+    grows roughly quadratically with the number of tickers; fine up to a few hundred tickers.
+
+    :param points: Matrix of shape (tickers, features)
+    :param min_samples: Number of neighbours of a core point
+    :return: Cluster label of each point, -1 for noise
+    """
+    optics = OPTICS(min_samples=min_samples, max_eps=10, xi=0.1, metric='euclidean', cluster_method='xi')
+    optics.fit(points)
+    return optics.labels_
+
+def hdbscan_labels(points: np.ndarray, min_samples: int = MIN_SAMPLES) -> np.ndarray:
+    """
+    Cluster with HDBSCAN, which finds clusters of varying density without an eps parameter.
+
+    Builds a minimum spanning tree of mutual reachability distances with a KD-tree, roughly
+    O(n log n) in the low-dimensional PCA space; suited to universes of a few thousand tickers.
+
+    :param points: Matrix of shape (tickers, features)
+    :param min_samples: Smallest cluster size, also the neighbours of a core point
+    :return: Cluster label of each point, -1 for noise
+    """
+    return HDBSCAN(min_cluster_size=min_samples, min_samples=min_samples, algorithm="kd_tree").fit_predict(points)
+
+def dbscan_labels(points: np.ndarray, min_samples: int = MIN_SAMPLES, eps: Optional[float] = None) -> np.ndarray:
+    """
+    Cluster with DBSCAN over a sparse radius neighbour graph precomputed with a KD-tree.
+
+    Without eps the radius is the 90th percentile of the distances of the points to their
+    min_samples-th neighbour, so all but the sparsest tenth of the points can be core points. The
+    graph holds only the pairs within eps, so time and memory grow with the number of neighbours
+    rather than the square of the universe; suited to thousands of tickers.
+
+    :param points: Matrix of shape (tickers, features)
+    :param min_samples: Number of neighbours of a core point, the point included
+    :param eps: Neighbourhood radius, derived from the data when None
+    :return: Cluster label of each point, -1 for noise
+    """
+    neighbours = NearestNeighbors(n_neighbors=min(min_samples, len(points)), algorithm="kd_tree").fit(points)
+    if eps is None:
+        distances, _ = neighbours.kneighbors(points)
+        eps = float(np.quantile(distances[:, -1], 0.9)) or 1e-12
+    graph = neighbours.radius_neighbors_graph(points, radius=eps, mode="distance", sort_results=True)
+
+    return DBSCAN(eps=eps, min_samples=min_samples, metric="precomputed").fit_predict(graph)
+
+def minibatch_kmeans_labels(points: np.ndarray, n_clusters: Optional[int] = None, batch_size: int = 1024) -> np.ndarray:
+    """
+    Cluster with mini-batch k-means, which labels every point and never reports noise.
+
+    Each iteration touches batch_size points, so the cost is linear in the number of tickers and
+    independent of neighbourhood structure; the choice for full-market universes. Without
+    n_clusters, about one cluster per 50 tickers is used, at least 2.
+
+    :param points: Matrix of shape (tickers, features)
+    :param n_clusters: Number of clusters
+    :param batch_size: Number of points per mini-batch
+    :return: Cluster label of each point
+    """
+    n_clusters = min(len(points), n_clusters or max(2, len(points) // 50))
+    return MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, n_init=3, random_state=42).fit_predict(points)
+
+CLUSTERING_BACKENDS: Dict[str, Callable[..., np.ndarray]] = {
+    "optics": optics_labels,
+    "hdbscan": hdbscan_labels,
+    "dbscan": dbscan_labels,
+    "minibatch_kmeans": minibatch_kmeans_labels
+}
+
+def group_by_label(labels: np.ndarray, tickers: Sequence[str]) -> Dict[int, List[str]]:
+    """
+    Group tickers by cluster label, leaving out noise points.
+
+    :param labels: Cluster label of each ticker, -1 for noise
+    :param tickers: Tickers in the order of the labels
+    :return: Dictionary mapping each cluster label to its tickers, in order of first appearance
+    """
+    cluster_dict = defaultdict(list)
+    for label, ticker in zip(labels.tolist(), tickers):
+        if label != -1:
+            cluster_dict[int(label)].append(ticker)
+
+    return dict(cluster_dict)
+
+def cluster_points(points: np.ndarray, tickers: Sequence[str], method: str = DEFAULT_CLUSTERING_METHOD, **params: Any) -> Dict[int, List[str]]:
+    """
+    Cluster tickers in a feature space with one of CLUSTERING_BACKENDS.
+
+    :param points: Matrix of shape (tickers, features), such as the scaled principal components
+    :param tickers: Tickers in the order of the rows
+    :param method: Name of the backend
+    :param params: Keyword arguments of the backend
+    :return: Dictionary mapping each cluster label to its tickers, leaving out noise points
+    :raises ValueError: If the method is unknown
+    """
+    backend = CLUSTERING_BACKENDS.get(method)
+    if backend is None:
+        raise ValueError(f"Unknown clustering method: {method}. Valid methods are {', '.join(CLUSTERING_BACKENDS)}")
+
+    with limit_native_threads():
+        labels = backend(points, **params)
+
+    return group_by_label(labels, tickers)
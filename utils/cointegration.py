@@ -0,0 +1,195 @@
+from typing import Optional, Tuple
+import numpy as np
+from scipy.special import ndtr
+
+
+# MacKinnon (1994) response surface coefficients for the Dickey-Fuller tau statistic of a single
+# series, as tabulated in statsmodels.tsa.adfvalues for N = 1.
+MACKINNON_TAU_MAX = {"n": np.inf, "c": 2.74, "ct": 0.7, "ctt": 0.54}
+MACKINNON_TAU_MIN = {"n": -19.04, "c": -18.83, "ct": -16.18, "ctt": -17.17}
+MACKINNON_TAU_STAR = {"n": -1.04, "c": -1.61, "ct": -2.89, "ctt": -3.21}
+MACKINNON_TAU_SMALL_P = {
+    "n": np.array([0.6344, 1.2378, 0.032496]),
+    "c": np.array([2.1659, 1.4412, 0.038269]),
+    "ct": np.array([3.2512, 1.6047, 0.049588]),
+    "ctt": np.array([4.0003, 1.658, 0.048288])
+}
+MACKINNON_TAU_LARGE_P = {
+    "n": np.array([0.4797, 0.93557, -0.06999, 0.033066]),
+    "c": np.array([1.7339, 0.93202, -0.12745, -0.010368]),
+    "ct": np.array([2.5261, 0.61654, -0.37956, -0.060285]),
+    "ctt": np.array([3.0778, 0.49529, -0.41477, -0.059359])
+}
+
+ADF_TOLERANCE = 1e-6
+
+def mackinnon_p_values(test_statistics: np.ndarray, regression: str = "c") -> np.ndarray:
+    """
+    Compute MacKinnon's approximate p-values for Dickey-Fuller test statistics.
+
+    :param test_statistics: Array of ADF t-statistics
+    :param regression: Deterministic terms of the test regression, one of "c", "ct", "ctt" or "n"
+    :return: Array of p-values
+    """
+    test_statistics = np.asarray(test_statistics, dtype=float)
+    small = np.polynomial.polynomial.polyval(test_statistics, MACKINNON_TAU_SMALL_P[regression])
+    large = np.polynomial.polynomial.polyval(test_statistics, MACKINNON_TAU_LARGE_P[regression])
+
+    p_values = ndtr(np.where(test_statistics <= MACKINNON_TAU_STAR[regression], small, large))
+    p_values = np.where(test_statistics > MACKINNON_TAU_MAX[regression], 1.0, p_values)
+    p_values = np.where(test_statistics < MACKINNON_TAU_MIN[regression], 0.0, p_values)
+
+    return p_values
+
+def default_adf_maxlag(nobs: int, regression: str = "c") -> int:
+    """
+    Default maximum lag of the ADF test (Schwert 1989), as used by statsmodels.
+
+    :param nobs: Length of the series
+    :param regression: Deterministic terms of the test regression
+    :return: Maximum lag
+    :raises ValueError: If the series is too short for the regression
+    """
+    ntrend = len(regression) if regression != "n" else 0
+    maxlag = min(nobs // 2 - ntrend - 1, int(np.ceil(12.0 * np.power(nobs / 100.0, 1 / 4.0))))
+    if maxlag < 0:
+        raise ValueError("sample size is too short to use selected regression component")
+
+    return maxlag
+
+def build_adf_design(series: np.ndarray, lag: int, nobs: int, regression: str = "c") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build the stacked ADF regressions of several series over their last nobs differences.
+
+    :param series: Matrix of shape (days, series)
+    :param lag: Number of lagged differences to include
+    :param nobs: Number of observations used in the regression
+    :param regression: Deterministic terms of the test regression
+    :return: Tuple of the design tensor of shape (series, nobs, columns), with the lagged level first, the lagged differences next and the deterministic terms last, and the response matrix of shape (series, nobs)
+    """
+    length = series.shape[0]
+    differences = np.diff(series, axis=0)
+    start = length - 1 - nobs
+
+    columns = [series[start:length - 1]]
+    columns += [differences[start - j:length - 1 - j] for j in range(1, lag + 1)]
+    trend = np.arange(1, nobs + 1, dtype=float)[:, np.newaxis] * np.ones(series.shape[1])
+    if regression != "n":
+        columns.append(np.ones_like(trend))
+    if regression in ("ct", "ctt"):
+        columns.append(trend)
+    if regression == "ctt":
+        columns.append(trend ** 2)
+
+    design = np.stack(columns, axis=-1).transpose(1, 0, 2)
+    response = differences[start:].T
+
+    return design, response
+
+def solve_normal_equations(gram: np.ndarray, moments: np.ndarray) -> np.ndarray:
+    """
+    Solve a batch of least squares normal equations, falling back to the pseudo-inverse for singular systems.
+
+    :param gram: Batch of X'X matrices of shape (series, columns, columns)
+    :param moments: Batch of X'y vectors of shape (series, columns)
+    :return: Batch of coefficient vectors of shape (series, columns)
+    """
+    try:
+        return np.linalg.solve(gram, moments[..., np.newaxis])[..., 0]
+    except np.linalg.LinAlgError:
+        return np.einsum('sij,sj->si', np.linalg.pinv(gram), moments)
+
+def adf_statistics_for_lag(series: np.ndarray, lag: int, regression: str = "c") -> np.ndarray:
+    """
+    Compute the ADF t-statistic of several series for one fixed lag, using every available observation.
+
+    :param series: Matrix of shape (days, series)
+    :param lag: Number of lagged differences to include
+    :param regression: Deterministic terms of the test regression
+    :return: Array of ADF t-statistics, one entry per series
+    """
+    nobs = series.shape[0] - 1 - lag
+    design, response = build_adf_design(series, lag, nobs, regression)
+    gram = design.transpose(0, 2, 1) @ design
+    coefficients = solve_normal_equations(gram, (design.transpose(0, 2, 1) @ response[..., np.newaxis])[..., 0])
+
+    residuals = response - (design @ coefficients[..., np.newaxis])[..., 0]
+    sigma2 = (residuals ** 2).sum(axis=1) / (nobs - design.shape[2])
+    unit_vector = np.zeros((len(gram), design.shape[2]))
+    unit_vector[:, 0] = 1.0
+    level_variance = sigma2 * solve_normal_equations(gram, unit_vector)[:, 0]
+
+    return coefficients[:, 0] / np.sqrt(level_variance)
+
+def select_adf_lags(series: np.ndarray, maxlag: int, regression: str = "c", autolag: str = "AIC") -> np.ndarray:
+    """
+    Select the ADF lag of several series by information criterion over a common sample.
+
+    Every candidate lag is fitted on the last len(series) - 1 - maxlag differences, so the criteria
+    are comparable, and ties go to the shortest lag as in statsmodels.
+
+    :param series: Matrix of shape (days, series)
+    :param maxlag: Largest lag to consider
+    :param regression: Deterministic terms of the test regression
+    :param autolag: Information criterion, "AIC" or "BIC"
+    :return: Integer array of selected lags, one entry per series
+    """
+    nobs = series.shape[0] - 1 - maxlag
+    design, response = build_adf_design(series, maxlag, nobs, regression)
+    ntrend = design.shape[2] - 1 - maxlag
+    gram = design.transpose(0, 2, 1) @ design
+    moments = (design.transpose(0, 2, 1) @ response[..., np.newaxis])[..., 0]
+    total_sum_of_squares = (response ** 2).sum(axis=1)
+
+    criteria = np.empty((maxlag + 1, series.shape[1]))
+    for lag in range(maxlag + 1):
+        selected = np.r_[0:lag + 1, maxlag + 1:maxlag + 1 + ntrend]
+        coefficients = solve_normal_equations(gram[:, selected][:, :, selected], moments[:, selected])
+        residual_sum_of_squares = total_sum_of_squares - (coefficients * moments[:, selected]).sum(axis=1)
+        log_likelihood = -nobs / 2 * (np.log(2 * np.pi) + np.log(residual_sum_of_squares / nobs) + 1)
+        penalty = 2 if autolag.lower() == "aic" else np.log(nobs)
+        criteria[lag] = -2 * log_likelihood + penalty * len(selected)
+
+    return np.argmin(criteria, axis=0)
+
+def adfuller_batch(
+    series: np.ndarray,
+    maxlag: Optional[int] = None,
+    regression: str = "c",
+    autolag: Optional[str] = "AIC",
+    batch_size: int = 32
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run the augmented Dickey-Fuller test on every column of a matrix with batched least squares.
+
+    Follows statsmodels.tsa.stattools.adfuller: the same default maximum lag, AIC/BIC lag selection
+    over a common sample followed by a refit with the selected lag on all available observations,
+    and MacKinnon p-values. Statistics and p-values agree with statsmodels within ADF_TOLERANCE.
+
+    :param series: Matrix of shape (days, series), one series per column
+    :param maxlag: Maximum lag, defaults to 12 * (days / 100) ** (1 / 4)
+    :param regression: Deterministic terms of the test regression, one of "c", "ct", "ctt" or "n"
+    :param autolag: "AIC" or "BIC" to select the lag by information criterion, None to use maxlag for every series
+    :param batch_size: Number of series whose regressions are stacked together, bounding memory use
+    :return: Tuple of ADF t-statistics, p-values and used lags, one entry per series
+    """
+    series = np.asarray(series, dtype=float)
+    if series.ndim == 1:
+        series = series[:, np.newaxis]
+    if autolag is not None and autolag.lower() not in ("aic", "bic"):
+        raise ValueError(f"Information criterion {autolag} not supported")
+    if maxlag is None:
+        maxlag = default_adf_maxlag(series.shape[0], regression)
+
+    statistics = np.empty(series.shape[1])
+    lags = np.full(series.shape[1], maxlag)
+    for start in range(0, series.shape[1], batch_size):
+        batch = series[:, start:start + batch_size]
+        if autolag is not None:
+            lags[start:start + batch.shape[1]] = select_adf_lags(batch, maxlag, regression, autolag)
+        batch_lags = lags[start:start + batch.shape[1]]
+        for lag in np.unique(batch_lags):
+            columns = np.flatnonzero(batch_lags == lag)
+            statistics[start + columns] = adf_statistics_for_lag(batch[:, columns], int(lag), regression)
+
+    return statistics, mackinnon_p_values(statistics, regression), lags
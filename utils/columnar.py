@@ -0,0 +1,103 @@
+import io
+from typing import Callable, Dict
+import numpy as np
+import pandas as pd
+
+from utils.preprocessing import clean_price_frame
+from utils.validation import validate_price_columns
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+ARROW_STREAM_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+NPZ_CONTENT_TYPE = "application/x-npz"
+
+class UnsupportedFormatError(Exception):
+    """
+    Raised when a columnar upload needs an optional dependency that is not installed.
+    """
+
+def load_prices_npz(payload: bytes) -> pd.DataFrame:
+    """
+    Load prices uploaded as a NumPy .npz archive into the frame construct_df_from_ohlc produces.
+
+    The archive holds a dates array (datetime64 or YYYY-MM-DD strings), a tickers array of
+    strings and a float64 prices matrix of shape (dates, tickers) with NaN for missing prices.
+    The matrix is wrapped without copying unless gaps have to be interpolated.
+
+    :param payload: Raw .npz bytes
+    :returns: A pandas DataFrame where the dates are the index, column names are the tickers and the values are the prices
+    :raises ValueError: If arrays are missing, their shapes do not agree or validate_price_columns rejects them
+    """
+    with np.load(io.BytesIO(payload), allow_pickle=False) as archive:
+        missing = [name for name in ("dates", "tickers", "prices") if name not in archive.files]
+        if missing:
+            raise ValueError(f"Missing arrays in upload: {', '.join(missing)}")
+        dates = archive["dates"]
+        tickers = archive["tickers"]
+        prices = archive["prices"]
+
+    if prices.ndim != 2 or prices.shape != (len(dates), len(tickers)):
+        raise ValueError(f"Prices matrix of shape {prices.shape} does not match {len(dates)} dates and {len(tickers)} tickers")
+
+    index = validate_price_columns(dates, tickers, prices)
+    columns = pd.Index(tickers.astype(str), name="ticker")
+
+    return clean_price_frame(pd.DataFrame(prices.astype(float, copy=False), index=index, columns=columns, copy=False))
+
+def load_prices_arrow(payload: bytes) -> pd.DataFrame:
+    """
+    Load prices uploaded as an Arrow IPC stream into the frame construct_df_from_ohlc produces.
+
+    The stream holds either a wide table with a date column and one price column per ticker, or a
+    long table with ticker, date and price columns.
+
+    :param payload: Raw Arrow IPC stream bytes
+    :returns: A pandas DataFrame where the dates are the index, column names are the tickers and the values are the prices
+    :raises UnsupportedFormatError: If pyarrow is not installed
+    :raises ValueError: If the table has no date column or validate_price_columns rejects a wide table
+    """
+    if pa is None:
+        raise UnsupportedFormatError("Arrow uploads require the pyarrow package")
+
+    table = pa.ipc.open_stream(payload).read_all()
+    if "date" not in table.column_names:
+        raise ValueError("Arrow upload must contain a date column")
+
+    if {"ticker", "price"} <= set(table.column_names):
+        df = table.select(["date", "ticker", "price"]).to_pandas()
+        df["date"] = pd.to_datetime(df["date"])
+        pivot_df = df.pivot_table(index="date", columns="ticker", values="price", aggfunc="first")
+    else:
+        pivot_df = table.to_pandas().set_index("date")
+        pivot_df.index = validate_price_columns(pivot_df.index, pivot_df.columns, pivot_df.to_numpy())
+        pivot_df.columns.name = "ticker"
+
+    return clean_price_frame(pivot_df)
+
+PRICE_LOADERS: Dict[str, Callable[[bytes], pd.DataFrame]] = {
+    ARROW_STREAM_CONTENT_TYPE: load_prices_arrow,
+    NPZ_CONTENT_TYPE: load_prices_npz
+}
+
+def is_columnar_upload(mimetype: str) -> bool:
+    """
+    Check whether a request body is one of the supported columnar price formats.
+
+    :param mimetype: Content type of the request without parameters
+    :returns: True if the body should be loaded with load_prices
+    """
+    return mimetype in PRICE_LOADERS
+
+def load_prices(payload: bytes, mimetype: str) -> pd.DataFrame:
+    """
+    Load a columnar price upload according to its content type.
+
+    :param payload: Raw request body
+    :param mimetype: Content type of the request without parameters
+    :returns: A pandas DataFrame where the dates are the index, column names are the tickers and the values are the prices
+    """
+    return PRICE_LOADERS[mimetype](payload)
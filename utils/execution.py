@@ -0,0 +1,202 @@
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+import math
+import os
+import threading
+from typing import Any, Dict, Iterator, Mapping, Optional
+from threadpoolctl import ThreadpoolController
+
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+NATIVE_THREAD_VARIABLES = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS"
+)
+
+_settings: Optional["ExecutionSettings"] = None
+_lock = threading.Lock()
+
+def read_cgroup_cpu_quota(root: str = CGROUP_ROOT) -> Optional[float]:
+    """
+    Read the CPU quota of the container from the cgroup filesystem.
+
+    Both cgroup v2 (cpu.max) and cgroup v1 (cpu.cfs_quota_us and cpu.cfs_period_us) are supported.
+
+    :param root: Mount point of the cgroup filesystem
+    :return: Number of CPUs the quota allows, possibly fractional, or None if there is no quota
+    """
+    try:
+        with open(os.path.join(root, "cpu.max")) as f:
+            quota, period = f.read().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open(os.path.join(root, "cpu", "cpu.cfs_quota_us")) as f:
+            quota_us = int(f.read())
+        with open(os.path.join(root, "cpu", "cpu.cfs_period_us")) as f:
+            period_us = int(f.read())
+        return None if quota_us <= 0 or period_us <= 0 else quota_us / period_us
+    except (OSError, ValueError):
+        return None
+
+def available_cpus(cpu_quota: Optional[float] = None) -> int:
+    """
+    Number of CPUs this process can keep busy: the CPUs it may be scheduled on, capped by the cgroup quota.
+
+    :param cpu_quota: CPU quota from read_cgroup_cpu_quota, None if unlimited
+    :return: Number of usable CPUs, at least 1
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    if cpu_quota is not None:
+        cpus = min(cpus, math.ceil(cpu_quota))
+
+    return max(1, cpus)
+
+@dataclass
+class ExecutionSettings:
+    """
+    How the CPUs of the container are shared between request workers, worker processes and native thread pools.
+
+    A single gunicorn worker is run by default, because the job store, stage cache, profile store
+    and metrics registry live in process memory and a client must reach the process holding them.
+    Request concurrency comes from its threads and CPU parallelism from its process pool and the
+    BLAS and OpenMP threads of NumPy, SciPy and scikit-learn, all sized from the CPUs.
+
+    The threads share one GIL, so the Python parts of a request are serialized: parsing,
+    validation, pivoting and the OPTICS loop hold it for most of a /ml/pairs request, and only the
+    pair tests (process pool) and the BLAS kernels run beside other requests. One worker therefore
+    tops out at roughly one CPU of request handling however many CPUs the container has; scale
+    out with more replicas, or set WEB_CONCURRENCY above 1 and accept that jobs, profiles, cached
+    stages and metrics are then split between workers (see in_process_state_warning).
+    """
+    cpus: int
+    cpu_quota: Optional[float]
+    web_workers: int
+    web_threads: int
+    process_workers: int
+    native_threads: int
+
+    @classmethod
+    def from_environment(cls, environ: Mapping[str, str] = os.environ, cgroup_root: str = CGROUP_ROOT) -> "ExecutionSettings":
+        """
+        Size the pools from the detected CPUs, letting environment variables override each value.
+
+        CPU_LIMIT overrides the detected CPUs, WEB_CONCURRENCY and GUNICORN_THREADS the gunicorn
+        workers and threads, PROCESS_WORKERS the process pool and NATIVE_THREADS the native thread pools.
+
+        :param environ: Environment variables
+        :param cgroup_root: Mount point of the cgroup filesystem
+        :return: The execution settings
+        """
+        cpu_quota = read_cgroup_cpu_quota(cgroup_root)
+        cpus = int(environ.get("CPU_LIMIT") or available_cpus(cpu_quota))
+        web_workers = int(environ.get("WEB_CONCURRENCY") or 1)
+        cpus_per_worker = max(1, cpus // web_workers)
+
+        return cls(
+            cpus=cpus,
+            cpu_quota=cpu_quota,
+            web_workers=web_workers,
+            web_threads=int(environ.get("GUNICORN_THREADS") or max(2, 2 * cpus_per_worker)),
+            process_workers=int(environ.get("PROCESS_WORKERS") or cpus_per_worker),
+            native_threads=int(environ.get("NATIVE_THREADS") or cpus_per_worker)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the settings to JSON-compatible values.
+
+        :return: Dictionary of the settings
+        """
+        return asdict(self)
+
+IN_PROCESS_STATE = ("background jobs", "cached stages", "request profiles", "metrics")
+
+def in_process_state_warning(settings: ExecutionSettings) -> Optional[str]:
+    """
+    Warn when several gunicorn workers would split the state kept in process memory.
+
+    :param settings: The execution settings
+    :return: The warning, or None with a single worker
+    """
+    if settings.web_workers <= 1:
+        return None
+
+    return (
+        f"{settings.web_workers} gunicorn workers each keep their own {', '.join(IN_PROCESS_STATE)}: "
+        "a job or profile is only found by requests reaching the worker that created it"
+    )
+
+def get_execution_settings() -> ExecutionSettings:
+    """
+    Return the execution settings of this process, detecting them on first use.
+
+    :return: The execution settings
+    """
+    global _settings
+
+    with _lock:
+        if _settings is None:
+            _settings = ExecutionSettings.from_environment()
+        return _settings
+
+def native_thread_environment(threads: int) -> Dict[str, str]:
+    """
+    Environment variables capping the native thread pools of processes started afterwards.
+
+    :param threads: Number of threads per pool
+    :return: Dictionary mapping each variable of NATIVE_THREAD_VARIABLES to the thread count
+    """
+    return {name: str(threads) for name in NATIVE_THREAD_VARIABLES}
+
+def get_threadpool_controller() -> ThreadpoolController:
+    """
+    Return a controller of the native thread pools loaded in this process right now.
+
+    The controller is not cached: SciPy's OpenBLAS and scikit-learn's OpenMP runtime are only
+    loaded with the analytics modules, after the app starts, and a controller only sees the
+    libraries loaded when it was built. Building one takes about a millisecond.
+
+    :return: The threadpoolctl controller
+    """
+    return ThreadpoolController()
+
+def configure_native_threads(threads: Optional[int] = None) -> None:
+    """
+    Cap the native thread pools of this process and of the processes it starts.
+
+    Environment variables already set by the deployment are kept.
+
+    :param threads: Number of threads per pool, defaults to the native_threads setting
+    """
+    threads = threads or get_execution_settings().native_threads
+    for name, value in native_thread_environment(threads).items():
+        os.environ.setdefault(name, value)
+    get_threadpool_controller().limit(limits=threads)
+
+@contextmanager
+def limit_native_threads(threads: Optional[int] = None) -> Iterator[None]:
+    """
+    Cap the native thread pools for the duration of a block, such as a PCA or OPTICS fit.
+
+    :param threads: Number of threads per pool, defaults to the native_threads setting
+    """
+    with get_threadpool_controller().limit(limits=threads or get_execution_settings().native_threads):
+        yield
+
+def describe_native_threads() -> Dict[str, Any]:
+    """
+    Report the native thread pools loaded in this process and their current sizes.
+
+    :return: Dictionary mapping each pool's library to its API and thread count
+    """
+    return {
+        info["filepath"]: {"user_api": info["user_api"], "internal_api": info["internal_api"], "num_threads": info["num_threads"]}
+        for info in ThreadpoolController().info()
+    }
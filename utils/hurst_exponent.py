@@ -0,0 +1,115 @@
+from typing import List, Optional
+import numpy as np
+
+
+HURST_MIN_LENGTH = 100
+
+def hurst_window_sizes(length: int, min_window: int = 10, max_window: Optional[int] = None) -> List[int]:
+    """
+    Window sizes of the Hurst regression, spaced a quarter decade apart as in hurst.compute_Hc.
+
+    :param length: Length of the series
+    :param min_window: Smallest window size
+    :param max_window: Upper bound of the log-spaced window sizes, defaults to length - 1
+    :return: List of window sizes, ending with the full length of the series
+    """
+    max_window = max_window or length - 1
+    window_sizes = [int(10 ** exponent) for exponent in np.arange(np.log10(min_window), np.log10(max_window), 0.25)]
+    window_sizes.append(length)
+
+    return window_sizes
+
+def compute_rescaled_ranges(series: np.ndarray, window_size: int, simplified: bool = True) -> np.ndarray:
+    """
+    Compute the mean rescaled range of every column over non-overlapping windows.
+
+    Columns are treated as random walks: the range is taken over the levels (simplified) or over the
+    cumulative demeaned increments, and scaled by the standard deviation of the increments. Windows
+    with a zero range or deviation are skipped, as in hurst.compute_Hc.
+
+    :param series: Matrix of shape (days, series)
+    :param window_size: Number of days per window
+    :param simplified: Whether to use the simplified R/S of hurst.compute_Hc
+    :return: Array of mean R/S values, NaN for columns without a usable window
+    """
+    n_windows = series.shape[0] // window_size
+    windows = series[:n_windows * window_size].reshape(n_windows, window_size, series.shape[1])
+    increments = np.diff(windows, axis=1)
+
+    if simplified:
+        ranges = windows.max(axis=1) - windows.min(axis=1)
+    else:
+        mean_increments = (windows[:, -1] - windows[:, 0]) / (window_size - 1)
+        deviations = np.cumsum(increments - mean_increments[:, np.newaxis], axis=1)
+        ranges = deviations.max(axis=1) - deviations.min(axis=1)
+    deviations = increments.std(axis=1, ddof=1)
+
+    usable = (ranges != 0) & (deviations != 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = np.where(usable, ranges / deviations, 0.0)
+        return ratios.sum(axis=0) / usable.sum(axis=0)
+
+def compute_detrended_fluctuations(series: np.ndarray, window_size: int) -> np.ndarray:
+    """
+    Compute the detrended fluctuation of every column over non-overlapping windows.
+
+    The columns are the integrated profiles, so each window is detrended with its own least squares line.
+
+    :param series: Matrix of shape (days, series)
+    :param window_size: Number of days per window
+    :return: Array of root mean square residuals around the per-window trends
+    """
+    n_windows = series.shape[0] // window_size
+    windows = series[:n_windows * window_size].reshape(n_windows, window_size, series.shape[1])
+
+    x_centered = np.arange(window_size) - (window_size - 1) / 2
+    ss_x = (x_centered ** 2).sum()
+    y_centered = windows - windows.mean(axis=1, keepdims=True)
+    slope = np.einsum('n,wns->ws', x_centered, y_centered) / ss_x
+    ss_res = (y_centered ** 2).sum(axis=1) - slope ** 2 * ss_x
+
+    return np.sqrt(np.clip(ss_res, 0, None).sum(axis=0) / (n_windows * window_size))
+
+def compute_hurst_exponents(
+    series: np.ndarray,
+    method: str = "rs",
+    simplified: bool = True,
+    min_window: int = 10,
+    max_window: Optional[int] = None
+) -> np.ndarray:
+    """
+    Compute the Hurst exponent of every column of a matrix of random-walk-like series at once.
+
+    With method "rs" the result matches hurst.compute_Hc(series, kind='random_walk', simplified=simplified):
+    the slope of log10 of the mean R/S against log10 of the window size. Method "dfa" uses detrended
+    fluctuation analysis over the same window sizes instead.
+
+    :param series: Matrix of shape (days, series), one series per column, or a single series
+    :param method: "rs" for rescaled range analysis or "dfa" for detrended fluctuation analysis
+    :param simplified: Whether to use the simplified R/S, ignored by DFA
+    :param min_window: Smallest window size
+    :param max_window: Upper bound of the log-spaced window sizes, defaults to days - 1
+    :return: Array of Hurst exponents, NaN where a window size has no usable window
+    :raises ValueError: If the series are shorter than 100 days, contain NaNs or the method is unknown
+    """
+    series = np.asarray(series, dtype=float)
+    if series.ndim == 1:
+        series = series[:, np.newaxis]
+    if series.shape[0] < HURST_MIN_LENGTH:
+        raise ValueError(f"Series length must be greater or equal to {HURST_MIN_LENGTH}")
+    if np.isnan(series).any():
+        raise ValueError("Series contains NaNs")
+    if method not in ("rs", "dfa"):
+        raise ValueError(f"Unknown Hurst exponent method: {method}")
+
+    window_sizes = hurst_window_sizes(series.shape[0], min_window, max_window)
+    if method == "rs":
+        values = np.array([compute_rescaled_ranges(series, window_size, simplified) for window_size in window_sizes])
+    else:
+        values = np.array([compute_detrended_fluctuations(series, window_size) for window_size in window_sizes])
+
+    log_window_sizes = np.log10(window_sizes)
+    log_window_sizes -= log_window_sizes.mean()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_values = np.log10(values)
+        return (log_window_sizes[:, np.newaxis] * (log_values - log_values.mean(axis=0))).sum(axis=0) / (log_window_sizes ** 2).sum()
@@ -0,0 +1,207 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_MAX_QUEUED = int(os.environ.get("JOB_MAX_QUEUED", 16))
+JOB_TTL_SECONDS = float(os.environ.get("JOB_TTL_SECONDS", 3600))
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+EXECUTION_MODES = ("sync", "async")
+
+class JobQueueFullError(Exception):
+    """
+    Raised when a job is submitted while the queue of pending jobs is full.
+    """
+
+@dataclass
+class Job:
+    """
+    A unit of work run in the background, with its status and outcome.
+    """
+    job_id: str
+    kind: str
+    status: str = JOB_PENDING
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    error_status: Optional[int] = None
+    cancel_requested: bool = False
+    future: Optional[Future] = field(default=None, repr=False)
+
+    def describe(self) -> Dict[str, Any]:
+        """
+        Summarize the job for status responses, without its result.
+
+        :return: Dictionary containing the id, kind, status, timestamps and error of the job
+        """
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+class JobStore:
+    """
+    Runs jobs on a bounded thread pool and keeps their results until they expire.
+
+    Jobs live in the memory of one process, so clients have to poll the process that accepted the
+    job. Running jobs cannot be interrupted: cancelling one discards its result once it finishes.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS, max_queued: int = JOB_MAX_QUEUED, ttl_seconds: float = JOB_TTL_SECONDS) -> None:
+        """
+        :param max_workers: Number of jobs run at the same time
+        :param max_queued: Number of submitted jobs that may wait for a worker
+        :param ttl_seconds: Time finished jobs are kept before they are purged
+        """
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Job] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, compute: Callable[[], Any]) -> Job:
+        """
+        Queue a job.
+
+        :param kind: Name of the operation, reported in the job status
+        :param compute: Function producing the job result
+        :return: The pending job
+        :raises JobQueueFullError: If max_queued jobs are already waiting
+        """
+        self.purge_expired()
+        with self._lock:
+            queued = sum(1 for job in self._jobs.values() if job.status == JOB_PENDING)
+            if queued >= self.max_queued:
+                raise JobQueueFullError(f"Too many queued jobs, at most {self.max_queued} may wait")
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            job = Job(job_id=uuid.uuid4().hex, kind=kind)
+            self._jobs[job.job_id] = job
+            job.future = self._executor.submit(self._run, job, compute)
+
+        return job
+
+    def _run(self, job: Job, compute: Callable[[], Any]) -> None:
+        """
+        Run a job and record its outcome.
+
+        :param job: The job to run
+        :param compute: Function producing the job result
+        """
+        with self._lock:
+            if job.status != JOB_PENDING:
+                return
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+
+        try:
+            result, error, error_status = compute(), None, None
+        except ValueError as e:
+            result, error, error_status = None, f"Invalid input data: {str(e)}", 400
+        except Exception as e:
+            result, error, error_status = None, f"An unexpected error occurred: {str(e)}", 500
+
+        with self._lock:
+            job.finished_at = time.time()
+            if job.cancel_requested:
+                job.status = JOB_CANCELLED
+            elif error is not None:
+                job.status, job.error, job.error_status = JOB_FAILED, error, error_status
+            else:
+                job.status, job.result = JOB_SUCCEEDED, result
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Look up a job.
+
+        :param job_id: Id returned by submit
+        :return: The job, or None if it is unknown or expired
+        """
+        self.purge_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job. Pending jobs never start; running jobs finish but their result is discarded.
+
+        :param job_id: Id returned by submit
+        :return: The job, or None if it is unknown or expired
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in JOB_FINISHED_STATUSES:
+                return job
+            job.cancel_requested = True
+            if job.status == JOB_PENDING:
+                job.future.cancel()
+                job.status = JOB_CANCELLED
+                job.finished_at = time.time()
+
+        return job
+
+    def purge_expired(self) -> None:
+        """
+        Drop finished jobs older than the time to live.
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the number of jobs per status and the pool settings.
+
+        :return: Dictionary of job counts and settings
+        """
+        self.purge_expired()
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+
+        return {
+            "jobs": counts,
+            "max_workers": self.max_workers,
+            "max_queued": self.max_queued,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker threads, cancelling the jobs that have not started.
+
+        :param wait: Whether to wait for the running jobs to finish
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            for job in self._jobs.values():
+                if job.status == JOB_PENDING:
+                    job.cancel_requested = True
+                    job.status = JOB_CANCELLED
+                    job.finished_at = time.time()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+job_store = JobStore()
@@ -0,0 +1,258 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import bisect
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from flask import Flask, Response, g, has_request_context, request
+
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_suppressed: ContextVar[bool] = ContextVar("metrics_suppressed", default=False)
+
+class Histogram:
+    """
+    Cumulative latency histogram in the Prometheus layout.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        """
+        :param buckets: Upper bounds of the buckets in seconds, ascending
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Record one observation.
+
+        :param value: Observed duration in seconds
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def render(self, name: str, labels: str) -> List[str]:
+        """
+        Render the histogram as Prometheus text lines.
+
+        :param name: Metric name
+        :param labels: Rendered labels without braces, possibly empty
+        :return: The bucket, sum and count lines
+        """
+        prefix = f"{labels}," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{"+Inf" if bound == float("inf") else bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """
+    Process-wide latency histograms and counters, rendered in the Prometheus text format.
+
+    Metrics are kept in the memory of one process and are not shared between gunicorn workers, so
+    /metrics only reports the whole service with the default single worker. With WEB_CONCURRENCY
+    above 1 each scrape reads whichever worker answers it.
+    """
+
+    def __init__(self) -> None:
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._counters: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """
+        Record a duration in the histogram of a metric and label set.
+
+        :param name: Metric name
+        :param value: Duration in seconds
+        :param labels: Label values
+        """
+        key = (name, render_labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name: str, value: float = 1, **labels: Any) -> None:
+        """
+        Add to the counter of a metric and label set.
+
+        :param name: Metric name
+        :param value: Amount to add
+        :param labels: Label values
+        """
+        key = (name, render_labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        :return: The exposition text
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted({name for name, _ in self._histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, labels), histogram in sorted(self._histograms.items()):
+                    if metric == name:
+                        lines.extend(histogram.render(name, labels))
+            for name in sorted({name for name, _ in self._counters}):
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(f"{name}{{{labels}}} {value}" for (metric, labels), value in sorted(self._counters.items()) if metric == name)
+
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """
+        Drop every metric.
+        """
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+registry = MetricsRegistry()
+
+class RequestMetrics:
+    """
+    Stage durations and counts of one request, reported in its Server-Timing header.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, float] = {}
+
+    def server_timing(self) -> str:
+        """
+        Render the stage durations in milliseconds and the counts as Server-Timing metrics.
+
+        :return: Value of the Server-Timing header
+        """
+        entries = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in self.durations.items()]
+        entries.extend(f'{name};desc="{value:g}"' for name, value in self.counts.items())
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(entries)
+
+def current_request_metrics() -> Optional[RequestMetrics]:
+    """
+    Return the metrics of the request being handled.
+
+    :return: The request's metrics, or None outside of a request or before init_metrics started them
+    """
+    return g.get("request_metrics") if has_request_context() else None
+
+def render_labels(labels: Dict[str, Any]) -> str:
+    """
+    Render label values in the Prometheus text format, sorted by name.
+
+    :param labels: Label values
+    :return: Comma-separated name="value" pairs
+    """
+    return ",".join(f'{name}="{str(value)}"' for name, value in sorted(labels.items()))
+
+@contextmanager
+def metrics_suppressed() -> Iterator[None]:
+    """
+    Record no stage timings or counts for the duration of a block, such as the synthetic warm-up workload.
+
+    The flag is held in a context variable, so it only covers the thread running the block.
+    """
+    token = _suppressed.set(True)
+    try:
+        yield
+    finally:
+        _suppressed.reset(token)
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """
+    Time a block as a named stage of the current request and of the stage latency histogram.
+
+    Does nothing when metrics are disabled or suppressed. Outside of a request, such as in a
+    background job, only the histogram is updated.
+
+    :param stage: Name of the stage
+    """
+    if not METRICS_ENABLED or _suppressed.get():
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe("stage_duration_seconds", elapsed, stage=stage)
+        current = current_request_metrics()
+        if current is not None:
+            current.durations[stage] = current.durations.get(stage, 0.0) + elapsed
+
+def record_count(name: str, value: float) -> None:
+    """
+    Record a count, such as the number of tickers or accepted pairs, for the current request and the totals.
+
+    :param name: Name of the count
+    :param value: Value to record
+    """
+    if not METRICS_ENABLED or _suppressed.get():
+        return
+
+    registry.increment("pipeline_items_total", value, item=name)
+    current = current_request_metrics()
+    if current is not None:
+        current.counts[name] = current.counts.get(name, 0) + value
+
+def init_metrics(app: Flask) -> None:
+    """
+    Add Server-Timing headers and request latency histograms to every response, and serve /metrics.
+
+    Nothing is registered when metrics are disabled. The metrics cover this process only, see
+    MetricsRegistry.
+
+    :param app: The Flask application
+    """
+    if not METRICS_ENABLED:
+        return
+
+    from utils.router import require_auth
+
+    @app.before_request
+    def start_request_metrics() -> None:
+        g.request_metrics = RequestMetrics()
+
+    @app.after_request
+    def finish_request_metrics(response: Response) -> Response:
+        current = current_request_metrics()
+        if current is None:
+            return response
+        registry.observe(
+            "http_request_duration_seconds",
+            time.perf_counter() - current.started,
+            endpoint=request.endpoint or "unknown",
+            method=request.method,
+            status=response.status_code
+        )
+        response.headers["Server-Timing"] = current.server_timing()
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    @require_auth
+    def metrics() -> Response:
+        """
+        Expose the latency histograms and counters in the Prometheus text format.
+
+        :returns: The exposition text
+        """
+        return Response(registry.render(), mimetype=PROMETHEUS_CONTENT_TYPE)
@@ -1,34 +1,119 @@
 from collections import defaultdict
 from itertools import combinations
-from typing import Dict, List, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 import numpy as np
 import pandas as pd
 from scipy.stats import linregress
-from sklearn.decomposition import PCA
+from sklearn.decomposition import PCA, IncrementalPCA
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import OPTICS
 import pendulum
 
+from utils.clustering import DEFAULT_CLUSTERING_METHOD, cluster_points
+from utils.execution import limit_native_threads
+from utils.rolling import sliding_window_regression
 
-def apply_pca_and_scaling(df_returns: pd.DataFrame) -> np.ndarray:
+
+PCA_METHODS = ("full", "incremental", "randomized")
+PCA_CHUNK_SIZE = 256
+
+def row_chunks(num_rows: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """
+    Split a number of rows into contiguous chunks of at least chunk_size rows, except when there are fewer rows in total.
+
+    The remainder is spread over the chunks instead of forming a short last chunk, so every chunk
+    can feed IncrementalPCA.partial_fit, which needs at least n_components rows per batch.
+
+    :param num_rows: Number of rows
+    :param chunk_size: Minimum number of rows per chunk
+    :return: Iterator of (start, stop) row bounds
+    """
+    bounds = np.linspace(0, num_rows, max(1, num_rows // chunk_size) + 1).astype(int)
+    return zip(bounds[:-1].tolist(), bounds[1:].tolist())
+
+def fit_incremental_pca(
+    df_returns: pd.DataFrame,
+    n_components: int,
+    chunk_size: int = PCA_CHUNK_SIZE,
+    model: Optional[IncrementalPCA] = None
+) -> IncrementalPCA:
+    """
+    Fit PCA over row chunks of the returns, so memory is bounded by the chunk size rather than the history length.
+
+    Passing a model fitted earlier warm-starts it: only the rows appended since need to be given,
+    and the result matches a fit over the full history within numerical tolerance. The endpoints
+    are stateless and always fit from scratch, so warm-starting is only available to library callers.
+
+    :param df_returns: DataFrame of returns, or only the new rows when warm-starting
+    :param n_components: Number of principal components
+    :param chunk_size: Number of rows converted and decomposed at a time
+    :param model: Model fitted on the earlier rows of the same tickers
+    :return: The fitted model
+    :raises ValueError: If there are fewer rows than components or the model was fitted on other tickers
+    """
+    if len(df_returns) < n_components:
+        raise ValueError(f"At least {n_components} rows of returns are required to update the PCA, got {len(df_returns)}")
+    if model is None:
+        model = IncrementalPCA(n_components=n_components)
+    elif model.n_features_in_ != df_returns.shape[1]:
+        raise ValueError(f"The PCA model was fitted on {model.n_features_in_} tickers, the returns have {df_returns.shape[1]}")
+
+    with limit_native_threads():
+        for start, stop in row_chunks(len(df_returns), max(chunk_size, n_components)):
+            model.partial_fit(df_returns.iloc[start:stop].to_numpy(dtype=np.float64))
+
+    return model
+
+def apply_pca_and_scaling(
+    df_returns: pd.DataFrame,
+    method: str = "full",
+    chunk_size: int = PCA_CHUNK_SIZE,
+    model: Optional[IncrementalPCA] = None
+) -> np.ndarray:
     """
     Apply PCA and scaling to the input DataFrame of returns.
 
+    "full" decomposes the whole returns matrix at once. "randomized" uses a randomized SVD, which
+    is faster on long histories but still holds the whole matrix. "incremental" fits over row
+    chunks, see fit_incremental_pca; the loadings match "full" up to the sign of each component,
+    which the Euclidean clustering that follows does not depend on.
+
     :param df_returns: DataFrame of returns
+    :param method: One of PCA_METHODS
+    :param chunk_size: Number of rows per chunk of the incremental method
+    :param model: Incremental model to warm-start with the rows of df_returns
     :return: Scaled principal components
+    :raises ValueError: If there are too few tickers or the method is unknown
     """
     if df_returns.shape[1] < 2:
         raise ValueError("Not enough features for PCA. Need at least 2 columns with non-constant values.")
+    if method not in PCA_METHODS:
+        raise ValueError(f"Unknown PCA method: {method}. Valid methods are {', '.join(PCA_METHODS)}")
 
     n_components = min(5, df_returns.shape[1] - 1)
-    pca = PCA(n_components=n_components, svd_solver='auto', random_state=42)
-    pca.fit(df_returns)
+    if method == "incremental" or model is not None:
+        pca = fit_incremental_pca(df_returns, n_components, chunk_size=chunk_size, model=model)
+    else:
+        pca = PCA(n_components=n_components, svd_solver='auto' if method == "full" else 'randomized', random_state=42)
+        with limit_native_threads():
+            pca.fit(df_returns)
 
     scaler = StandardScaler()
     scaled_principal_components = scaler.fit_transform(pca.components_.T)
     
     return scaled_principal_components
 
+def cluster_tickers(scaled_principal_components: np.ndarray, df_returns: pd.DataFrame, method: str = DEFAULT_CLUSTERING_METHOD) -> Dict[int, List[str]]:
+    """
+    Cluster the scaled principal components and group the tickers by cluster.
+
+    :param scaled_principal_components: Scaled principal components from PCA
+    :param df_returns: DataFrame of returns
+    :param method: Clustering backend, one of CLUSTERING_BACKENDS in utils.clustering
+    :return: Dictionary mapping each cluster label to its tickers, leaving out noise points
+    :raises ValueError: If the method is unknown
+    """
+    return cluster_points(scaled_principal_components, df_returns.columns, method)
+
 def apply_optics(scaled_principal_components: np.ndarray, df_returns: pd.DataFrame) -> List[List[str]]:
     """
     Apply OPTICS clustering to the scaled principal components and generate pairs to evaluate.
@@ -37,20 +122,11 @@ def apply_optics(scaled_principal_components: np.ndarray, df_returns: pd.DataFra
     :param df_returns: DataFrame of returns
     :return: List of pairs to evaluate
     """
-    optics = OPTICS(min_samples=5, max_eps=10, xi=0.1, metric='euclidean', cluster_method='xi')
-    optics.fit(scaled_principal_components)
-    labels = optics.labels_
+    cluster_dict = cluster_tickers(scaled_principal_components, df_returns)
 
-    clustered_series_all = pd.Series(index=df_returns.columns, data=labels.flatten())
-    clustered_series = clustered_series_all[clustered_series_all != -1]
-    cluster_dict = defaultdict(list)
-    
     pairs_dict = defaultdict(list)
     pairs_to_eval = []
     
-    for i in range(len(clustered_series)):
-        cluster_dict[int(clustered_series.iloc[i])].append(clustered_series.index[i])
-    
     for k, v in cluster_dict.items():
         pair_combinations = list(combinations(v, 2))
         pairs_dict[k] = pair_combinations
@@ -60,6 +136,94 @@ def apply_optics(scaled_principal_components: np.ndarray, df_returns: pd.DataFra
 
     return pairs_to_eval
 
+def select_correlated_partners(
+    returns: np.ndarray,
+    top_k: Optional[int] = None,
+    min_correlation: Optional[float] = None,
+    block_size: int = 256
+) -> List[np.ndarray]:
+    """
+    Select the most correlated partners of every column of a return matrix, one block of rows of the correlation matrix at a time.
+
+    :param returns: Return matrix of shape (days, tickers)
+    :param top_k: Number of most correlated partners to keep per ticker, None to keep every partner above the floor
+    :param min_correlation: Minimum return correlation of a partner, None for no floor
+    :param block_size: Number of correlation matrix rows computed at once, bounding memory to block_size * tickers
+    :return: List holding the sorted partner columns of each ticker
+    """
+    centered = returns - np.nanmean(returns, axis=0)
+    centered = np.nan_to_num(centered)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        standardized = centered / np.linalg.norm(centered, axis=0)
+
+    n_tickers = returns.shape[1]
+    partners = []
+    for start in range(0, n_tickers, block_size):
+        correlations = standardized[:, start:start + block_size].T @ standardized
+        correlations[np.isnan(correlations)] = -np.inf
+        correlations[np.arange(len(correlations)), np.arange(start, start + len(correlations))] = -np.inf
+        if min_correlation is not None:
+            correlations[correlations < min_correlation] = -np.inf
+
+        for row in correlations:
+            eligible = np.flatnonzero(row > -np.inf)
+            if top_k is not None and len(eligible) > top_k:
+                eligible = np.sort(eligible[np.argpartition(-row[eligible], top_k - 1)[:top_k]])
+            partners.append(eligible)
+
+    return partners
+
+def generate_candidate_pairs(
+    cluster_dict: Dict[int, List[str]],
+    df_returns: pd.DataFrame,
+    top_k: Optional[int] = None,
+    min_correlation: Optional[float] = None,
+    pruning_counts: Optional[Dict[str, int]] = None,
+    block_size: int = 256
+) -> Iterator[Tuple[str, str]]:
+    """
+    Lazily generate the pairs to evaluate within each cluster, pruned by return correlation.
+
+    A pair is kept when either ticker is among the top_k most correlated partners of the other
+    within its cluster and their return correlation is at least min_correlation. Without either
+    parameter every combination is generated, as in apply_optics. Pairs keep the order of
+    itertools.combinations over the cluster, so the number of pairs grows with top_k times the
+    cluster size instead of its square.
+
+    :param cluster_dict: Dictionary mapping each cluster label to its tickers
+    :param df_returns: DataFrame of returns
+    :param top_k: Number of most correlated partners to keep per ticker
+    :param min_correlation: Minimum return correlation of a kept pair
+    :param pruning_counts: Optional dictionary that receives the number of candidate and pruned pairs once the generator is exhausted
+    :param block_size: Number of correlation matrix rows computed at once
+    :return: Iterator over (ticker_1, ticker_2) pairs
+    """
+    candidate_pairs = 0
+    total_pairs = 0
+    for tickers in cluster_dict.values():
+        total_pairs += len(tickers) * (len(tickers) - 1) // 2
+        if top_k is None and min_correlation is None:
+            for pair in combinations(tickers, 2):
+                candidate_pairs += 1
+                yield pair
+            continue
+
+        partners = select_correlated_partners(df_returns[tickers].to_numpy(dtype=float), top_k, min_correlation, block_size)
+        neighbours = [set(columns.tolist()) for columns in partners]
+        for column, columns in enumerate(partners):
+            for partner in columns:
+                neighbours[partner].add(column)
+
+        for column in range(len(tickers)):
+            for partner in sorted(neighbours[column]):
+                if partner > column:
+                    candidate_pairs += 1
+                    yield tickers[column], tickers[partner]
+
+    if pruning_counts is not None:
+        pruning_counts["candidate_pairs"] = candidate_pairs
+        pruning_counts["pruned_pairs"] = total_pairs - candidate_pairs
+
 def calculate_rlrt_trend_and_confidence(dates: List[pendulum.DateTime], spreads: List[float]) -> Dict[str, Union[str, float]]:
     """
     Calculate the trend and confidence for a given set of dates and spreads.
@@ -84,4 +248,59 @@ def calculate_rlrt_trend_and_confidence(dates: List[pendulum.DateTime], spreads:
         "date": formatted_date,
         "trend": trend,
         "confidence": r2
-    }
\ No newline at end of file
+    }
+
+def calculate_rlrt_trends_and_confidences(
+    dates: np.ndarray,
+    spreads: np.ndarray,
+    window_size: int = 10
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate the trend and confidence of every sliding window of a spread series at once.
+
+    Gives the same results as calling calculate_rlrt_trend_and_confidence on each window, with the
+    regressor taken as whole day offsets from the start of the window.
+
+    :param dates: Array of dates sorted in ascending order, convertible to datetime64[D]
+    :param spreads: Array of spread values corresponding to the dates
+    :param window_size: Number of data points in each window
+    :returns: A tuple of the last date of each window, a boolean array that is True where the trend is positive, and the confidence of each window
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    spreads = np.asarray(spreads, dtype=float)
+    day_offsets = dates.astype(np.int64)
+
+    slope, intercept, ss_x, ss_y, _ = sliding_window_regression(spreads, window_size, x=day_offsets)
+    if np.any(ss_x == 0):
+        raise ValueError("Cannot calculate a linear regression if all x values are identical")
+
+    prediction = slope * window_size + intercept
+    positive = prediction > spreads[window_size - 1:]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r2 = np.where(ss_y == 0, 0.0, np.clip(slope ** 2 * ss_x / ss_y, 0.0, 1.0))
+
+    return dates[window_size - 1:], positive, r2
+
+def calculate_rlrt_matrix(
+    series: List[Tuple[np.ndarray, np.ndarray]],
+    window_size: int = 10
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate trends and confidences for several spread series aligned on a common date axis.
+
+    :param series: List of (dates, spreads) tuples, each sorted by date
+    :param window_size: Number of data points in each window
+    :returns: A tuple of the sorted union of window end dates, a trend matrix holding "positive", "negative" or None, and a confidence matrix holding NaN where a series has no window ending on that date
+    """
+    window_results = [calculate_rlrt_trends_and_confidences(dates, spreads, window_size) for dates, spreads in series]
+    all_dates = np.unique(np.concatenate([dates for dates, _, _ in window_results])) if window_results else np.array([], dtype='datetime64[D]')
+
+    trends = np.full((len(series), len(all_dates)), None, dtype=object)
+    confidences = np.full((len(series), len(all_dates)), np.nan)
+    for row, (dates, positive, r2) in enumerate(window_results):
+        columns = np.searchsorted(all_dates, dates)
+        trends[row, columns] = np.where(positive, "positive", "negative")
+        confidences[row, columns] = r2
+
+    return all_dates, trends, confidences
@@ -0,0 +1,302 @@
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from utils.batch_stats import compute_mean_crossings
+from utils.cointegration import adfuller_batch
+from utils.hurst_exponent import HURST_MIN_LENGTH, compute_hurst_exponents
+
+
+def spread_sign_of(residual: float) -> int:
+    """
+    Side of the mean a spread residual lies on.
+
+    :param residual: Spread residual
+    :return: 1 above the mean, -1 below, 0 on it or when the residual is undefined
+    """
+    return int(np.sign(residual)) if np.isfinite(residual) else 0
+
+@dataclass
+class PairStatisticsState:
+    """
+    Sufficient statistics of a pair's spread regression, updated one bar at a time.
+
+    Prices are stored shifted by the first observation of each ticker to keep the sums well
+    conditioned. The hedge ratio, intercept and half-life are exact functions of the sums, so they
+    match a full recomputation after every update.
+
+    The ADF p-value and Hurst exponent are computed over the trailing window_size bars, the only
+    prices the state keeps, and rerun every full_refresh_interval bars. The mean crossing count is
+    approximate once the state has been updated: a new bar is compared with the sign of the spread
+    when the previous bar arrived, but a full recount would redraw the whole spread with the
+    current hedge ratio. It is recounted exactly whenever a refresh sees every bar, either because
+    the history still fits the window or because the caller passes it to refresh, and
+    mean_crossings_approximate tells which case applies. The state is O(window_size) in size and
+    each update costs O(1), plus O(window_size) on refresh.
+    """
+    ticker_1: str
+    ticker_2: str
+    shift_1: float
+    shift_2: float
+    last_date: str
+    full_refresh_interval: int = 20
+    count: int = 0
+    sum_1: float = 0.0
+    sum_2: float = 0.0
+    sum_11: float = 0.0
+    sum_22: float = 0.0
+    sum_12: float = 0.0
+    lag_sum_11: float = 0.0
+    lag_sum_22: float = 0.0
+    lag_sum_12: float = 0.0
+    lag_sum_21: float = 0.0
+    last_1: float = 0.0
+    last_2: float = 0.0
+    mean_crossings: int = 0
+    cointegration_critical_value: Optional[float] = None
+    hurst_exponent: Optional[float] = None
+    bars_since_refresh: int = 0
+    last_spread_sign: int = 0
+    mean_crossings_approximate: bool = False
+    window_size: int = 500
+    window_1: List[float] = field(default_factory=list)
+    window_2: List[float] = field(default_factory=list)
+
+    @classmethod
+    def from_prices(cls, ticker_1: str, ticker_2: str, df: pd.DataFrame, full_refresh_interval: int = 20, window_size: int = 500) -> "PairStatisticsState":
+        """
+        Build the state of a pair from its full price history.
+
+        :param ticker_1: First ticker symbol, the regressor of the spread
+        :param ticker_2: Second ticker symbol
+        :param df: DataFrame containing price data indexed by date
+        :param full_refresh_interval: Number of updates between reruns of the ADF test and Hurst exponent
+        :param window_size: Number of trailing bars kept for the ADF test and Hurst exponent
+        :return: State holding the statistics of the whole history
+        """
+        prices_1 = df[ticker_1].to_numpy(dtype=float)
+        prices_2 = df[ticker_2].to_numpy(dtype=float)
+        if len(prices_1) < 3:
+            raise ValueError("At least 3 data points are required for pair statistics")
+
+        x = prices_1 - prices_1[0]
+        y = prices_2 - prices_2[0]
+        state = cls(
+            ticker_1=ticker_1,
+            ticker_2=ticker_2,
+            shift_1=float(prices_1[0]),
+            shift_2=float(prices_2[0]),
+            last_date=df.index[-1].strftime('%Y-%m-%d'),
+            full_refresh_interval=full_refresh_interval,
+            count=len(x),
+            sum_1=float(x.sum()),
+            sum_2=float(y.sum()),
+            sum_11=float(x @ x),
+            sum_22=float(y @ y),
+            sum_12=float(x @ y),
+            lag_sum_11=float(x[1:] @ x[:-1]),
+            lag_sum_22=float(y[1:] @ y[:-1]),
+            lag_sum_12=float(x[1:] @ y[:-1]),
+            lag_sum_21=float(y[1:] @ x[:-1]),
+            last_1=float(x[-1]),
+            last_2=float(y[-1]),
+            window_size=window_size,
+            window_1=prices_1[-window_size:].tolist(),
+            window_2=prices_2[-window_size:].tolist()
+        )
+        state.refresh(prices_1, prices_2)
+
+        return state
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PairStatisticsState":
+        """
+        Restore a state serialized with to_dict.
+
+        :param data: Serialized state
+        :return: The restored state
+        :raises ValueError: If fields are missing or unknown, or the price windows do not match the count
+        """
+        names = {state_field.name for state_field in fields(cls)}
+        unknown = set(data) - names
+        if unknown:
+            raise ValueError(f"Unknown state fields: {', '.join(sorted(unknown))}")
+        try:
+            state = cls(**data)
+        except TypeError as e:
+            raise ValueError(f"Incomplete state: {str(e)}")
+        if not len(state.window_1) == len(state.window_2) == min(state.count, state.window_size):
+            raise ValueError("The state's price windows do not match its observation count and window size")
+
+        return state
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the state to JSON-compatible values.
+
+        :return: Dictionary of the state fields
+        """
+        return asdict(self)
+
+    def coefficients(self) -> Tuple[float, float]:
+        """
+        Hedge ratio and intercept of the spread regression on the shifted prices.
+
+        :return: Tuple of slope and shifted intercept
+        """
+        n = self.count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = np.float64(self.sum_12 - self.sum_1 * self.sum_2 / n) / np.float64(self.sum_11 - self.sum_1 ** 2 / n)
+        intercept = (self.sum_2 - slope * self.sum_1) / n
+
+        return slope, intercept
+
+    def half_life(self) -> float:
+        """
+        Half-life of mean reversion of the spread, as computed by compute_half_life on the full history.
+
+        :return: Half-life of mean reversion, inf or nan for a spread without variance like compute_half_lives
+        """
+        n = self.count
+        b, a = self.coefficients()
+
+        sum_r = self.sum_2 - b * self.sum_1 - n * a
+        sum_rr = (self.sum_22 + b ** 2 * self.sum_11 + n * a ** 2
+                  - 2 * b * self.sum_12 - 2 * a * self.sum_2 + 2 * a * b * self.sum_1)
+        lag_sum_rr = (self.lag_sum_22 - b * (self.lag_sum_21 + self.lag_sum_12) + b ** 2 * self.lag_sum_11
+                      - a * (2 * self.sum_2 - self.last_2) + a * b * (2 * self.sum_1 - self.last_1) + (n - 1) * a ** 2)
+        last_r = self.last_2 - b * self.last_1 - a
+
+        sum_lagged = sum_r - last_r
+        sum_lagged_squares = sum_rr - last_r ** 2
+        sum_lagged_delta = lag_sum_rr - sum_lagged_squares
+        with np.errstate(divide='ignore', invalid='ignore'):
+            beta = np.float64(sum_lagged_delta - sum_lagged * last_r / n) / np.float64(sum_lagged_squares - sum_lagged ** 2 / n)
+            return float(-np.log(2) / beta)
+
+    def update(self, date: str, price_1: float, price_2: float) -> None:
+        """
+        Add one bar in O(1), running the full refresh when it is due.
+
+        :param date: Date of the bar in YYYY-MM-DD format, later than last_date
+        :param price_1: Price of the first ticker
+        :param price_2: Price of the second ticker
+        """
+        x = float(price_1) - self.shift_1
+        y = float(price_2) - self.shift_2
+
+        self.count += 1
+        self.sum_1 += x
+        self.sum_2 += y
+        self.sum_11 += x * x
+        self.sum_22 += y * y
+        self.sum_12 += x * y
+        self.lag_sum_11 += x * self.last_1
+        self.lag_sum_22 += y * self.last_2
+        self.lag_sum_12 += x * self.last_2
+        self.lag_sum_21 += y * self.last_1
+
+        b, a = self.coefficients()
+        spread_sign = spread_sign_of(y - b * x - a)
+        if self.last_spread_sign * spread_sign < 0 or self.last_spread_sign == 0:
+            self.mean_crossings += 1
+        self.mean_crossings_approximate = True
+
+        self.last_1 = x
+        self.last_2 = y
+        self.last_spread_sign = spread_sign
+        self.last_date = date
+        self.window_1.append(float(price_1))
+        self.window_2.append(float(price_2))
+        del self.window_1[:-self.window_size], self.window_2[:-self.window_size]
+
+        self.bars_since_refresh += 1
+        if self.bars_since_refresh >= self.full_refresh_interval:
+            self.refresh(self.window_1, self.window_2)
+
+    def residuals(self, prices_1: Sequence[float], prices_2: Sequence[float]) -> np.ndarray:
+        """
+        Spread residuals of the given prices under the current hedge ratio.
+
+        :param prices_1: Prices of the first ticker
+        :param prices_2: Prices of the second ticker, on the same dates
+        :return: Array of residuals
+        """
+        b, a = self.coefficients()
+        x = np.asarray(prices_1, dtype=float) - self.shift_1
+        y = np.asarray(prices_2, dtype=float) - self.shift_2
+
+        return y - b * x - a
+
+    def refresh(self, prices_1: Sequence[float], prices_2: Sequence[float]) -> None:
+        """
+        Rerun the ADF test and Hurst exponent on the trailing window of the given prices.
+
+        When the prices hold every bar of the state, the mean crossings are recounted exactly too.
+        The sign of the last spread is redrawn with the current hedge ratio either way.
+
+        :param prices_1: Most recent prices of the first ticker, ending with the last bar of the state
+        :param prices_2: Prices of the second ticker, on the same dates
+        :raises ValueError: If the price series differ in length or hold more bars than the state
+        """
+        if len(prices_1) != len(prices_2) or len(prices_1) > self.count:
+            raise ValueError(f"The prices must be two series of equal length, at most the {self.count} bars of the state")
+
+        residuals = self.residuals(prices_1, prices_2)[:, np.newaxis]
+        if len(residuals) == self.count:
+            self.mean_crossings = int(compute_mean_crossings(residuals)[0])
+            self.mean_crossings_approximate = False
+
+        residuals = residuals[-self.window_size:]
+        self.last_spread_sign = spread_sign_of(residuals[-1, 0])
+        self.cointegration_critical_value = float(adfuller_batch(residuals)[1][0])
+        self.hurst_exponent = float(compute_hurst_exponents(residuals)[0]) if len(residuals) >= HURST_MIN_LENGTH else None
+        self.bars_since_refresh = 0
+
+    def statistics(self) -> Dict[str, Any]:
+        """
+        Current statistical criteria of the pair, in the format of compute_statistical_criteria_tests_for_pair without residuals.
+
+        :return: Dictionary containing the spread statistics and test results
+        """
+        slope, intercept = self.coefficients()
+
+        return {
+            "ticker_1": self.ticker_1,
+            "ticker_2": self.ticker_2,
+            "spread_statistics": {
+                "slope": float(slope),
+                "intercept": float(intercept + self.shift_2 - slope * self.shift_1)
+            },
+            "cointegration_critical_value": self.cointegration_critical_value,
+            "hurst_exponent": self.hurst_exponent,
+            "half_life": self.half_life(),
+            "mean_crossings": self.mean_crossings,
+            "mean_crossings_approximate": self.mean_crossings_approximate,
+            "observations": self.count,
+            "test_observations": min(self.count, self.window_size),
+            "last_date": self.last_date,
+            "bars_since_refresh": self.bars_since_refresh
+        }
+
+def align_pair_bars(data: List[Dict[str, Any]], ticker_1: str, ticker_2: str, after_date: str) -> List[Tuple[str, float, float]]:
+    """
+    Collect the new bars of a pair from ticker, date and price records.
+
+    :param data: List of dictionaries with ticker, date and price keys
+    :param ticker_1: First ticker symbol
+    :param ticker_2: Second ticker symbol
+    :param after_date: Only bars dated strictly after this YYYY-MM-DD date are returned
+    :return: List of (date, price_1, price_2) tuples sorted by date, for dates where both tickers have a price
+    """
+    bars: Dict[str, Dict[str, float]] = {}
+    for record in data:
+        if record["ticker"] in (ticker_1, ticker_2) and record["date"] > after_date:
+            bars.setdefault(record["date"], {}).setdefault(record["ticker"], float(record["price"]))
+
+    return [
+        (date, prices[ticker_1], prices[ticker_2])
+        for date, prices in sorted(bars.items())
+        if ticker_1 in prices and ticker_2 in prices
+    ]
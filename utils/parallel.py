@@ -0,0 +1,149 @@
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from multiprocessing import resource_tracker, shared_memory
+import atexit
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+from utils.execution import configure_native_threads, get_execution_settings
+
+
+SharedArraySpec = Tuple[str, Tuple[int, ...], str]
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+def default_worker_count() -> int:
+    """
+    Number of worker processes of the shared pool, and the most a single request may use.
+
+    :return: The process_workers execution setting, this gunicorn worker's share of the CPUs
+    """
+    return get_execution_settings().process_workers
+
+def worker_limit(requested: Optional[int] = None) -> int:
+    """
+    Clamp the parallelism a caller asks for to the size of the shared pool.
+
+    :param requested: Number of workers asked for, None for all of them
+    :return: Number of calls the caller may keep in flight on the pool, between 1 and default_worker_count
+    """
+    workers = default_worker_count()
+    return workers if requested is None else max(1, min(requested, workers))
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Return the persistent process pool, creating it on first use.
+
+    The pool is sized once from default_worker_count and shared by every request and job, so
+    worker start-up is paid once and no request can replace the pool under another. Callers bound
+    their own share of it by limiting the calls they keep in flight, see worker_limit.
+
+    :return: The shared process pool
+    """
+    global _process_pool
+
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Start the resource tracker before forking so workers attaching to shared memory
+            # report to the same tracker as the parent instead of each launching their own.
+            resource_tracker.ensure_running()
+            # Worker processes already run in parallel, so each keeps a single native thread.
+            _process_pool = ProcessPoolExecutor(max_workers=default_worker_count(), initializer=configure_native_threads, initargs=(1,))
+        return _process_pool
+
+def shutdown_process_pool() -> None:
+    """
+    Shut down the persistent process pool if it was started.
+    """
+    global _process_pool
+
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=True)
+        _process_pool = None
+
+atexit.register(shutdown_process_pool)
+
+def chunked(iterable: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """
+    Lazily split an iterable into lists of at most chunk_size items.
+
+    :param iterable: Items to split
+    :param chunk_size: Maximum number of items per chunk
+    :return: Iterator over the chunks
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def imap_ordered(executor: Executor, fn: Callable[..., Any], argument_tuples: Iterable[Tuple[Any, ...]], max_pending: int) -> Iterator[Any]:
+    """
+    Map a function over lazily produced arguments on an executor, yielding results in submission order.
+
+    At most max_pending calls are in flight at any time, so the argument iterable is only consumed
+    as fast as the workers keep up.
+
+    :param executor: Executor to run the calls on
+    :param fn: Picklable function to call
+    :param argument_tuples: Iterable of positional argument tuples, one per call
+    :param max_pending: Maximum number of submitted calls whose results have not been yielded yet
+    :return: Iterator over the results in the order the arguments were produced
+    """
+    pending = deque()
+    try:
+        for arguments in argument_tuples:
+            pending.append(executor.submit(fn, *arguments))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+@contextmanager
+def share_array(array: np.ndarray) -> Iterator[SharedArraySpec]:
+    """
+    Copy an array into a shared memory block that worker processes can map without pickling it.
+
+    The block is released when the context exits.
+
+    :param array: Array to share
+    :return: Spec of the shared array to pass to attach_shared_array in the workers
+    """
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    try:
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        yield block.name, array.shape, array.dtype.str
+    finally:
+        block.close()
+        block.unlink()
+
+@contextmanager
+def attach_shared_array(spec: SharedArraySpec) -> Iterator[np.ndarray]:
+    """
+    Map an array shared with share_array into the current process without copying it.
+
+    The returned array must not be used after the context exits.
+
+    :param spec: Spec of the shared array
+    :return: Read-only array backed by the shared memory block
+    """
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        array.flags.writeable = False
+        yield array
+        del array
+    finally:
+        block.close()
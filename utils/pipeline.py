@@ -0,0 +1,108 @@
+from typing import Any, Callable, Dict, Optional, Sequence
+import pandas as pd
+
+from utils.cache import StageCache, hash_records, stage_cache, stage_key
+from utils.clustering import DEFAULT_CLUSTERING_METHOD
+from utils.ml import PCA_CHUNK_SIZE, apply_pca_and_scaling, cluster_tickers, generate_candidate_pairs
+from utils.preprocessing import compute_returns, construct_df_from_ohlc
+from utils.metrics import record_count, stage_timer
+from utils.spread_stats import resolve_criteria_order, run_statistical_criteria_tests_for_pairs
+
+
+PRICE_FIELDS = ("ticker", "date", "price")
+
+def count_pairs_reaching(candidates: int, rejections: Dict[str, int], criteria_order: Sequence[str], criterion: str) -> int:
+    """
+    Count the pairs that were tested against a criterion, from the rejections of the criteria before it.
+
+    :param candidates: Number of pairs that entered the tests
+    :param rejections: Number of pairs rejected by each criterion
+    :param criteria_order: Criteria in evaluation order
+    :param criterion: The criterion to count the tested pairs of
+    :return: Number of pairs evaluated by the criterion
+    """
+    tested = candidates
+    for previous in criteria_order[:criteria_order.index(criterion)]:
+        tested -= rejections.get(previous, 0)
+
+    return tested
+
+def run_pairs_pipeline(
+    data: Dict[str, Any],
+    cache: StageCache = stage_cache,
+    load_prices: Optional[Callable[[], pd.DataFrame]] = None,
+    prices_hash: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Suggest pairs from a validated /ml/pairs request body, reusing cached stage outputs.
+
+    The pivoted prices, returns, PCA components and clusters are cached under keys chained from a
+    hash of the price data, so a request that only changes the thresholds starts at the pair tests.
+
+    :param data: Request parameters matching pairs_schema
+    :param cache: Stage cache to read from and fill
+    :param load_prices: Function loading the pivoted prices of a binary upload, defaults to pivoting the records in data
+    :param prices_hash: Hash identifying the prices returned by load_prices
+    :return: Dictionary containing the suggested pairs, rejection counts and number of pruned pairs
+    """
+    if load_prices is None:
+        prices_hash = hash_records(data['data'], PRICE_FIELDS)
+        load_prices = lambda: construct_df_from_ohlc(data['data'])
+
+    prices_key = stage_key(prices_hash, "prices")
+    with stage_timer("pivot"):
+        df: pd.DataFrame = cache.get_or_compute(prices_key, "prices", load_prices)
+    record_count("tickers", df.shape[1])
+
+    returns_key = stage_key(prices_key, "returns")
+    with stage_timer("returns"):
+        df_returns = cache.get_or_compute(returns_key, "returns", lambda: compute_returns(df))
+
+    pca_method = data.get('pca_method', 'full')
+    pca_chunk_size = data.get('pca_chunk_size', PCA_CHUNK_SIZE)
+    pca_params = {"chunk_size": pca_chunk_size} if pca_method == "incremental" else {}
+    pca_key = stage_key(returns_key, "pca", method=pca_method, **pca_params)
+    with stage_timer("pca"):
+        scaled_principal_components = cache.get_or_compute(
+            pca_key,
+            "pca",
+            lambda: apply_pca_and_scaling(df_returns, method=pca_method, chunk_size=pca_chunk_size)
+        )
+
+    clustering_method = data.get('clustering_method', DEFAULT_CLUSTERING_METHOD)
+    clusters_key = stage_key(pca_key, "clusters", method=clustering_method)
+    with stage_timer("clustering"):
+        cluster_dict = cache.get_or_compute(
+            clusters_key,
+            "clusters",
+            lambda: cluster_tickers(scaled_principal_components, df_returns, method=clustering_method)
+        )
+    record_count("clusters", len(cluster_dict))
+
+    pruning: Dict[str, int] = {}
+    pairs_to_eval = generate_candidate_pairs(
+        cluster_dict,
+        df_returns,
+        top_k=data.get('top_k_partners'),
+        min_correlation=data.get('min_return_correlation'),
+        pruning_counts=pruning
+    )
+    rejections: Dict[str, int] = {}
+    with stage_timer("pair_tests"):
+        suggested_pairs = run_statistical_criteria_tests_for_pairs(
+            pairs_to_eval,
+            df,
+            min_correlation=data.get('min_correlation'),
+            criteria_order=data.get('criteria_order'),
+            rejection_counts=rejections,
+            n_jobs=data.get('n_jobs', 1)
+        )
+    record_count("candidate_pairs", pruning.get("candidate_pairs", 0))
+    record_count("accepted_pairs", len(suggested_pairs))
+    record_count("adf_tests", count_pairs_reaching(pruning.get("candidate_pairs", 0), rejections, resolve_criteria_order(data.get('criteria_order')), "cointegration"))
+
+    return {
+        "suggested_pairs": suggested_pairs,
+        "rejections": rejections,
+        "pruned_pairs": pruning.get("pruned_pairs", 0)
+    }
@@ -1,4 +1,5 @@
-from typing import Any, Dict, List
+from operator import itemgetter
+from typing import Any, Dict, List, Tuple
 import numpy as np
 import pandas as pd
 
@@ -19,25 +20,89 @@ def construct_df_from_ohlc(
     data: List[Dict[str, Any]],
     date_column_key: str = "date",
     ticker_column_key: str = "ticker",
-    price_column_key: str = "price"
+    price_column_key: str = "price",
+    dtype: Any = np.float64
 ) -> pd.DataFrame:
     """
     Constructs a pandas DataFrame from a list of OHLC (Open, High, Low, Close) dictionaries.
 
+    Tickers and dates are factorized once and the prices are scattered into a single matrix, which
+    produces the frame pivot_table(aggfunc="first") would: the first non-missing price wins on
+    duplicate ticker and date pairs, and dates or tickers without any price are dropped.
+
     :param data: Input data for the DataFrame
     :param date_column_key: Key for the value corresponding to the date in each dictionary in the input
     :param ticker_column_key: Key for the value corresponding to the ticker in each dictionary in the input
     :param price_column_key: Key for the value corresponding to the price in each dictionary in the input
+    :param dtype: Float dtype of the price matrix, np.float32 halves its memory
     :returns: A pandas DataFrame where the dates are the index, column names are the tickers and the values are the prices
     """
-    df = pd.DataFrame(data)
-    df[date_column_key] = pd.to_datetime(df[date_column_key])
+    raw_date_codes, raw_dates = pd.factorize(np.array(list(map(itemgetter(date_column_key), data)), dtype=object))
+    unique_date_codes, dates = pd.factorize(pd.to_datetime(raw_dates), sort=True)
+    date_codes = unique_date_codes[raw_date_codes]
+    ticker_codes, tickers = pd.factorize(np.array(list(map(itemgetter(ticker_column_key), data)), dtype=object), sort=True)
+    prices = np.fromiter(map(itemgetter(price_column_key), data), dtype=dtype, count=len(data))
+
+    valid = ~np.isnan(prices)
+    if not valid.all():
+        date_codes, ticker_codes, prices = date_codes[valid], ticker_codes[valid], prices[valid]
+
+    cells = date_codes.astype(np.int64) * len(tickers) + ticker_codes
+    if len(cells) and np.bincount(cells).max() > 1:
+        first = ~pd.Series(cells).duplicated().to_numpy()
+        date_codes, ticker_codes, cells, prices = date_codes[first], ticker_codes[first], cells[first], prices[first]
+
+    matrix = np.full((len(dates), len(tickers)), np.nan, dtype=dtype)
+    matrix.ravel()[cells] = prices
+
+    rows = np.bincount(date_codes, minlength=len(dates)) > 0
+    columns = np.bincount(ticker_codes, minlength=len(tickers)) > 0
+    if not rows.all() or not columns.all():
+        matrix, dates, tickers = matrix[rows][:, columns], dates[rows], tickers[columns]
+
+    pivot_df = pd.DataFrame(
+        matrix,
+        index=pd.DatetimeIndex(dates, name=date_column_key),
+        columns=pd.Index(tickers, name=ticker_column_key),
+        copy=False
+    )
+
+    return clean_price_frame(pivot_df)
+
+def clean_price_frame(pivot_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sorts a pivoted price DataFrame by date, fills gaps by linear interpolation and drops tickers without a first or last price.
 
-    pivot_df = df.pivot_table(index=date_column_key, columns=ticker_column_key, values=price_column_key, aggfunc="first")
-    pivot_df.sort_index(inplace=True)
-    pivot_df = pivot_df.astype(float)
-    pivot_df = pivot_df.interpolate(method='linear')
+    :param pivot_df: A pandas DataFrame where the dates are the index and column names are the tickers
+    :returns: The cleaned DataFrame of float prices, keeping float32 prices as float32
+    """
+    if not pivot_df.index.is_monotonic_increasing:
+        pivot_df = pivot_df.sort_index()
+    if not all(column_dtype.kind == "f" for column_dtype in pivot_df.dtypes):
+        pivot_df = pivot_df.astype(float, copy=False)
+    if pivot_df.isna().to_numpy().any():
+        pivot_df = pivot_df.interpolate(method='linear')
     valid_columns = pivot_df.columns[pivot_df.iloc[0].notna() & pivot_df.iloc[-1].notna()]
-    pivot_df = pivot_df[valid_columns]
+    if len(valid_columns) < pivot_df.shape[1]:
+        pivot_df = pivot_df[valid_columns]
+
+    return pivot_df
+
+def construct_spread_series(
+    data: List[Dict[str, Any]],
+    date_column_key: str = "date",
+    spread_column_key: str = "spread"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Constructs date and spread arrays sorted by date from a list of dictionaries.
+
+    :param data: Input data points
+    :param date_column_key: Key for the value corresponding to the date in each dictionary in the input
+    :param spread_column_key: Key for the value corresponding to the spread in each dictionary in the input
+    :returns: A tuple of a datetime64[D] array of dates and a float array of spreads, both in ascending date order
+    """
+    dates = np.array([item[date_column_key] for item in data], dtype='datetime64[D]')
+    spreads = np.array([item[spread_column_key] for item in data], dtype=float)
+    order = np.argsort(dates, kind='stable')
 
-    return pivot_df
\ No newline at end of file
+    return dates[order], spreads[order]
@@ -0,0 +1,188 @@
+from collections import OrderedDict
+import cProfile
+import marshal
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "1").lower() in ("1", "true", "yes")
+PROFILE_STORE_SIZE = int(os.environ.get("PROFILE_STORE_SIZE", 20))
+PROFILE_HEADER = "X-Profile"
+PROFILE_MODES = ("cpu", "memory", "all")
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 15
+
+_memory_lock = threading.Lock()
+
+def requested_profile_mode(header_value: Optional[str], query_value: Optional[str]) -> Optional[str]:
+    """
+    Read the profiling mode a request asks for in the X-Profile header or the profile query parameter.
+
+    "1" and "true" select every profiler.
+
+    :param header_value: Value of the X-Profile header
+    :param query_value: Value of the profile query parameter
+    :returns: One of PROFILE_MODES, or None if profiling was not asked for or is disabled
+    :raises ValueError: If the mode is unknown
+    """
+    value = header_value or query_value
+    if not PROFILING_ENABLED or not value:
+        return None
+
+    value = value.lower()
+    if value in ("1", "true", "yes"):
+        return "all"
+    if value not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode: {value}, expected one of {', '.join(PROFILE_MODES)}")
+    return value
+
+def summarize_functions(profiler: cProfile.Profile, limit: int = TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+    """
+    List the functions with the highest cumulative time in a profile.
+
+    :param profiler: A profiler that has been disabled
+    :param limit: Number of functions to list
+    :returns: List of dictionaries with the function, file, line, call count, own time and cumulative time
+    """
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+
+    return [
+        {
+            "function": function,
+            "file": filename,
+            "line": line,
+            "calls": calls,
+            "total_seconds": total_time,
+            "cumulative_seconds": cumulative_time
+        }
+        for (filename, line, function), (_, calls, total_time, cumulative_time, _) in rows
+    ]
+
+def summarize_allocations(snapshot: tracemalloc.Snapshot, limit: int = TOP_ALLOCATIONS) -> List[Dict[str, Any]]:
+    """
+    List the source lines holding the most memory at the end of a traced run.
+
+    :param snapshot: Snapshot taken before tracing stopped
+    :param limit: Number of lines to list
+    :returns: List of dictionaries with the location, size in KiB and number of blocks
+    """
+    return [
+        {"location": f"{statistic.traceback[0].filename}:{statistic.traceback[0].lineno}", "size_kib": statistic.size / 1024, "blocks": statistic.count}
+        for statistic in snapshot.statistics("lineno")[:limit]
+    ]
+
+class ProfileStore:
+    """
+    Keeps the most recent profile reports and raw profiles for download.
+    """
+
+    def __init__(self, max_entries: int = PROFILE_STORE_SIZE) -> None:
+        """
+        :param max_entries: Number of profiles kept, the oldest are dropped first
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], Optional[bytes]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, report: Dict[str, Any], raw: Optional[bytes]) -> None:
+        """
+        Store a report and its raw pstats data.
+
+        :param report: Report built by profile_call
+        :param raw: Marshalled pstats data, None without a CPU profile
+        """
+        with self._lock:
+            self._entries[report["profile_id"]] = (report, raw)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Tuple[Dict[str, Any], Optional[bytes]]]:
+        """
+        Look up a stored profile.
+
+        :param profile_id: Id of the report
+        :returns: A tuple of the report and its raw pstats data, or None if it is unknown or was dropped
+        """
+        with self._lock:
+            return self._entries.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        Summarize the stored profiles, newest first.
+
+        :returns: List of dictionaries with the id, endpoint, mode, start time and wall time of each profile
+        """
+        with self._lock:
+            reports = [report for report, _ in self._entries.values()]
+
+        return [
+            {key: report[key] for key in ("profile_id", "endpoint", "mode", "started_at", "wall_seconds")}
+            for report in reversed(reports)
+        ]
+
+profile_store = ProfileStore()
+
+def profile_call(call: Callable[[], Any], mode: str, endpoint: str) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Run a call under cProfile, tracemalloc or both, and store the report in profile_store.
+
+    tracemalloc traces the whole process, so only one request at a time is memory profiled; a
+    request asking for it while memory is already traced gets a CPU profile and a note in its
+    report. Work done in worker processes and background jobs is not profiled.
+
+    :param call: The call to profile, such as a route handler
+    :param mode: One of PROFILE_MODES
+    :param endpoint: Name of the profiled endpoint, kept in the report
+    :returns: A tuple of the call's return value and the report
+    """
+    report: Dict[str, Any] = {"profile_id": uuid.uuid4().hex, "endpoint": endpoint, "mode": mode, "started_at": time.time()}
+    profile_cpu = mode in ("cpu", "all")
+    profile_memory = mode in ("memory", "all") and not tracemalloc.is_tracing() and _memory_lock.acquire(blocking=False)
+    if mode in ("memory", "all") and not profile_memory:
+        report["note"] = "Memory is already being traced, only CPU time was profiled"
+        profile_cpu = True
+
+    profiler = cProfile.Profile() if profile_cpu else None
+    start = time.perf_counter()
+    try:
+        if profile_memory:
+            tracemalloc.start()
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError:
+                report["note"] = "Another profiler is active, CPU time was not profiled"
+                profiler = None
+        try:
+            result = call()
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            if profile_memory:
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+    finally:
+        if profile_memory:
+            _memory_lock.release()
+
+    report["wall_seconds"] = time.perf_counter() - start
+    raw = None
+    if profiler is not None:
+        report["top_functions"] = summarize_functions(profiler)
+        profiler.create_stats()
+        raw = marshal.dumps(profiler.stats)
+    if profile_memory:
+        report["allocation_peak_mib"] = peak / 2 ** 20
+        report["allocation_retained_mib"] = current / 2 ** 20
+        report["top_allocations"] = summarize_allocations(snapshot)
+
+    profile_store.put(report, raw)
+
+    return result, report
@@ -0,0 +1,49 @@
+from typing import Optional, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def sliding_window_regression(
+    y: np.ndarray,
+    window_size: int,
+    x: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Fit an ordinary least squares line to every sliding window of a series in one pass.
+
+    The regressor of each window is measured from the first observation of that window, which
+    matches fitting every window separately with its x values starting at zero.
+
+    :param y: One-dimensional array of observations
+    :param window_size: Number of observations in each window
+    :param x: Optional regressor values aligned with y, defaults to the positions 0..window_size-1 in every window
+    :return: Tuple of slope, intercept, centered sum of squares of x, centered sum of squares of y and residual sum of squares, with one entry per window
+    """
+    y = np.asarray(y, dtype=float)
+    n_windows = len(y) - window_size + 1
+    if window_size < 1 or n_windows <= 0:
+        empty = np.empty(0)
+        return empty, empty.copy(), empty.copy(), empty.copy(), empty.copy()
+
+    y_windows = sliding_window_view(y, window_size)
+    if x is None:
+        x_windows = np.arange(window_size, dtype=float)[np.newaxis, :]
+    else:
+        x_windows = sliding_window_view(np.asarray(x, dtype=float), window_size)
+        x_windows = x_windows - x_windows[:, :1]
+
+    x_mean = x_windows.mean(axis=1, keepdims=True)
+    y_mean = y_windows.mean(axis=1, keepdims=True)
+    x_centered = x_windows - x_mean
+    y_centered = y_windows - y_mean
+
+    ss_x = np.broadcast_to((x_centered ** 2).sum(axis=1), (n_windows,))
+    ss_xy = (x_centered * y_centered).sum(axis=1)
+    ss_y = (y_centered ** 2).sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = ss_xy / ss_x
+    intercept = y_mean[:, 0] - slope * np.broadcast_to(x_mean[:, 0], (n_windows,))
+    ss_res = ((y_centered - slope[:, np.newaxis] * x_centered) ** 2).sum(axis=1)
+
+    return slope, intercept, np.array(ss_x), ss_y, ss_res
@@ -1,12 +1,16 @@
 from functools import wraps
 import os
-from typing import Any, Callable, Dict, Tuple
+from typing import Any, Callable, Dict, Mapping, Tuple
 from werkzeug.exceptions import BadRequest
-from flask import jsonify, request
-import jsonschema
+from flask import jsonify, make_response, request
+
+from utils.metrics import stage_timer
+from utils.profiling import PROFILE_HEADER, profile_call, requested_profile_mode
+from utils.validation import validate_instance
 
 
 API_TOKEN = os.environ.get("API_TOKEN")
+RESERVED_QUERY_PARAMETERS = ("format", "mode", "profile")
 
 def validate_token(auth_header: str) -> bool:
     """
@@ -27,6 +31,9 @@ def require_auth(f: Callable) -> Callable:
     """
     Decorator to require authentication for a route.
 
+    Authenticated requests with an X-Profile header or profile query parameter run under the
+    profilers of profile_call, and the id of the stored report is returned in the X-Profile-Id header.
+
     :param f: The function to be decorated
     :returns: The decorated function
     """
@@ -35,18 +42,69 @@ def require_auth(f: Callable) -> Callable:
         auth_header = request.headers.get('Authorization')
         if not validate_token(auth_header):
             return jsonify({"error": "Invalid or missing Authorization header"}), 401
-        return f(*args, **kwargs)
+
+        try:
+            profile_mode = requested_profile_mode(request.headers.get(PROFILE_HEADER), request.args.get('profile'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if profile_mode is None:
+            return f(*args, **kwargs)
+
+        result, report = profile_call(lambda: f(*args, **kwargs), profile_mode, request.endpoint or f.__name__)
+        response = make_response(result)
+        response.headers["X-Profile-Id"] = report["profile_id"]
+        return response
     return decorated
 
 def validate_schema(data: Dict[str, Any], schema: Dict[str, Any]) -> None:
     """
     Validate the request data against the provided schema.
 
+    The schema's validator is compiled once and large record arrays are type-checked in bulk; the
+    error message on invalid data is the one jsonschema.validate reports.
+
     :param data: The request data to validate
     :param schema: The schema to validate against
     :raises BadRequest: If the data does not match the schema
     """
-    try:
-        jsonschema.validate(instance=data, schema=schema)
-    except jsonschema.exceptions.ValidationError as validation_error:
+    with stage_timer("validate"):
+        validation_error = validate_instance(data, schema)
+    if validation_error is not None:
         raise BadRequest(f"Invalid request data: {validation_error}")
+
+def parse_query_parameters(args: Mapping[str, str], schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert query string parameters to the types declared for them in a request schema.
+
+    Used for binary uploads, whose options cannot travel in the body. Array parameters are given
+    as comma-separated values, and parameters in RESERVED_QUERY_PARAMETERS are skipped.
+
+    :param args: The query string parameters
+    :param schema: The request schema declaring the parameter types
+    :returns: A dictionary of typed parameters
+    :raises BadRequest: If a parameter is unknown or cannot be converted
+    """
+    converters: Dict[str, Callable[[str], Any]] = {
+        "integer": int,
+        "number": float,
+        "string": str,
+        "boolean": lambda value: value.lower() in ("1", "true", "yes")
+    }
+    properties = schema.get("properties", {})
+    parameters: Dict[str, Any] = {}
+    for name, value in args.items():
+        if name in RESERVED_QUERY_PARAMETERS:
+            continue
+        declared = properties.get(name)
+        if declared is None or name == "data":
+            raise BadRequest(f"Unknown query parameter: {name}")
+        try:
+            if declared.get("type") == "array":
+                item_type = declared.get("items", {}).get("type", "string")
+                parameters[name] = [converters[item_type](item) for item in value.split(",") if item]
+            else:
+                parameters[name] = converters[declared.get("type", "string")](value)
+        except (KeyError, ValueError):
+            raise BadRequest(f"Invalid value for query parameter {name}: {value}")
+
+    return parameters
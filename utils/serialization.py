@@ -0,0 +1,159 @@
+import json
+from typing import Any, Dict, List, Optional
+import numpy as np
+from flask import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+RESPONSE_FORMATS = ("records", "columns", "msgpack", "arrow")
+FORMAT_MIMETYPES = {
+    "columns": "application/json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream"
+}
+
+class NotAcceptableError(Exception):
+    """
+    Raised when a requested response format cannot be produced.
+    """
+
+def negotiate_response_format(requested: Optional[str], accept_mimetypes: Any = None) -> str:
+    """
+    Choose the response format from the format query parameter or, failing that, the Accept header.
+
+    :param requested: Value of the format query parameter, if any
+    :param accept_mimetypes: The request's parsed Accept header
+    :returns: One of RESPONSE_FORMATS, "records" unless a compact format was asked for
+    :raises NotAcceptableError: If the requested format is unknown
+    """
+    if requested is not None:
+        if requested not in RESPONSE_FORMATS:
+            raise NotAcceptableError(f"Unknown response format: {requested}")
+        return requested
+
+    if accept_mimetypes is not None:
+        for response_format in ("arrow", "msgpack"):
+            if FORMAT_MIMETYPES[response_format] in accept_mimetypes.values():
+                return response_format
+
+    return "records"
+
+def records_to_columns(records: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    Turn a list of records into column lists, lifting the fields of nested dictionaries to the top level.
+
+    :param records: List of dictionaries sharing the same keys
+    :returns: Dictionary mapping each field to the list of its values
+    """
+    columns: Dict[str, List[Any]] = {}
+    for record in records:
+        for key, value in record.items():
+            if isinstance(value, dict):
+                for nested_key, nested_value in value.items():
+                    columns.setdefault(nested_key, []).append(nested_value)
+            else:
+                columns.setdefault(key, []).append(value)
+
+    return columns
+
+def to_builtin(value: Any) -> Any:
+    """
+    Convert NumPy arrays and scalars inside a payload to Python objects, with NaN as None.
+
+    :param value: Payload to convert
+    :returns: The payload made of dicts, lists, strings, numbers, booleans and None
+    """
+    if isinstance(value, dict):
+        return {key: to_builtin(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_builtin(item) for item in value]
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == "f":
+            return np.where(np.isnan(value), None, value).tolist()
+        return [to_builtin(item) for item in value.tolist()] if value.dtype == object else value.tolist()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+
+    return value
+
+def encode_json(payload: Any) -> bytes:
+    """
+    Serialize a payload containing NumPy arrays to JSON, writing NaN as null.
+
+    Numeric arrays are serialized straight from their buffers by orjson when it is installed;
+    otherwise the payload is converted with to_builtin and encoded by the standard library.
+
+    :param payload: Payload to serialize
+    :returns: UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        def default(value: Any) -> Any:
+            if isinstance(value, np.ndarray):
+                return to_builtin(value)
+            if isinstance(value, np.generic):
+                return value.item()
+            raise TypeError
+        return orjson.dumps(payload, default=default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+    return json.dumps(to_builtin(payload), separators=(",", ":")).encode()
+
+def encode_arrow(columns: Dict[str, Any], metadata: Dict[str, Any]) -> bytes:
+    """
+    Serialize column arrays to an Arrow IPC stream, with the remaining fields as schema metadata.
+
+    :param columns: Dictionary mapping column names to arrays or lists of equal length
+    :param metadata: JSON-serializable fields stored under the "metadata" key of the schema metadata
+    :returns: Arrow IPC stream bytes
+    :raises NotAcceptableError: If pyarrow is not installed
+    """
+    if pa is None:
+        raise NotAcceptableError("Arrow responses require the pyarrow package")
+
+    arrays = {name: to_builtin(values) if isinstance(values, np.ndarray) and values.dtype == object else values for name, values in columns.items()}
+    table = pa.table(arrays).replace_schema_metadata({"metadata": encode_json(metadata)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    return sink.getvalue().to_pybytes()
+
+def encode_response(payload: Dict[str, Any], response_format: str, table_key: Optional[str] = None) -> Response:
+    """
+    Build a compact response in the negotiated format.
+
+    :param payload: Response payload, holding column arrays for the columnar formats
+    :param response_format: One of "columns", "msgpack" or "arrow"
+    :param table_key: Key of the column dictionary sent as the Arrow table, None if the payload has no single table
+    :returns: A Flask response with the matching content type
+    :raises NotAcceptableError: If the format needs a missing optional package or does not fit the payload
+    """
+    if response_format == "columns":
+        body = encode_json(payload)
+    elif response_format == "msgpack":
+        if msgpack is None:
+            raise NotAcceptableError("MessagePack responses require the msgpack package")
+        body = msgpack.packb(to_builtin(payload), use_bin_type=True)
+    elif response_format == "arrow":
+        if table_key is None:
+            raise NotAcceptableError("Arrow responses are not available for this endpoint")
+        body = encode_arrow(payload[table_key], {key: value for key, value in payload.items() if key != table_key})
+    else:
+        raise NotAcceptableError(f"Unsupported response format: {response_format}")
+
+    return Response(body, status=200, mimetype=FORMAT_MIMETYPES[response_format])
@@ -3,8 +3,12 @@ import pandas as pd
 from scipy.stats import linregress
 from statsmodels.tsa.stattools import adfuller
 from statsmodels.regression.linear_model import OLS
-from hurst import compute_Hc
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Iterable, Optional
+
+from utils.batch_stats import compute_hedge_ratios, compute_half_lives, compute_mean_crossings, compute_pair_correlations, compute_residual_matrix
+from utils.cointegration import adfuller_batch
+from utils.hurst_exponent import compute_hurst_exponents
+from utils.parallel import SharedArraySpec, attach_shared_array, chunked, get_process_pool, imap_ordered, share_array, worker_limit
 
 
 def compute_spread_statistics(df: pd.DataFrame, ticker_1: str, ticker_2: str) -> Tuple[float, float, pd.Series]:
@@ -39,12 +43,14 @@ def compute_hurst_exponent(residuals: pd.Series) -> float:
     """
     Compute the Hurst exponent for the given residuals.
 
+    Matches hurst.compute_Hc(residuals, kind='random_walk', simplified=True).
+
     :param residuals: Series of residuals
     :return: Hurst exponent
     """
-    H_val, _, _ = compute_Hc(residuals)
+    H_val = compute_hurst_exponents(np.asarray(residuals, dtype=float))[0]
 
-    return H_val
+    return float(H_val)
 
 def compute_half_life(residuals: pd.Series) -> float:
     """
@@ -77,46 +83,226 @@ def calculate_mean_crossing_frequency(residuals: pd.Series) -> int:
 
     return mean_crossings
 
+CRITERIA_STATISTICS = {
+    "correlation": "correlation",
+    "mean_crossings": "mean_crossings",
+    "half_life": "half_life",
+    "hurst_exponent": "hurst_exponent",
+    "cointegration": "cointegration_critical_value"
+}
+
+DEFAULT_CRITERIA_ORDER = ("correlation", "mean_crossings", "half_life", "hurst_exponent", "cointegration")
+
+def resolve_criteria_order(criteria_order: Optional[Iterable[str]] = None) -> Tuple[str, ...]:
+    """
+    Complete a requested criteria evaluation order with the default order of the criteria it leaves out.
+
+    :param criteria_order: Criteria to evaluate first, in order
+    :return: Tuple of every criterion in evaluation order
+    :raises ValueError: If a criterion is unknown or repeated
+    """
+    requested = list(criteria_order or [])
+    unknown = [criterion for criterion in requested if criterion not in CRITERIA_STATISTICS]
+    if unknown:
+        raise ValueError(f"Unknown criteria: {', '.join(unknown)}. Valid criteria are {', '.join(DEFAULT_CRITERIA_ORDER)}")
+    if len(set(requested)) != len(requested):
+        raise ValueError("Criteria order must not repeat a criterion")
+
+    return tuple(requested) + tuple(criterion for criterion in DEFAULT_CRITERIA_ORDER if criterion not in requested)
+
+def evaluate_pairs(
+        pairs: List[Tuple[str, str]],
+        prices: np.ndarray,
+        columns: List[str],
+        criteria: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Run the statistical criteria tests for a chunk of pairs, stopping each pair at the first criterion it fails.
+
+    Hedge ratios and residuals of the whole chunk are computed as matrix operations, and so are the
+    correlation, half-life and mean crossing criteria. The remaining criteria run per pair, only for
+    the pairs that are still accepted when their turn comes.
+
+    :param pairs: Ticker pairs to evaluate
+    :param prices: Price matrix of shape (days, tickers)
+    :param columns: Tickers of the price matrix columns
+    :param criteria: Keyword arguments with the thresholds, minimum correlation and criteria order
+    :return: Tuple of the list of valid pairs with their statistics and the number of pairs rejected by each criterion
+    """
+    rejection_counts = dict.fromkeys(criteria["criteria_order"], 0)
+    if not pairs:
+        return [], rejection_counts
+
+    column_positions = {column: position for position, column in enumerate(columns)}
+    pair_indices = np.array([[column_positions[pair[0]], column_positions[pair[1]]] for pair in pairs])
+    slope, intercept = compute_hedge_ratios(prices, pair_indices)
+    residuals = compute_residual_matrix(prices, pair_indices, slope, intercept)
+
+    accepted = np.ones(len(pairs), dtype=bool)
+    statistics = {}
+    for criterion in criteria["criteria_order"]:
+        if criterion == "correlation" and criteria["min_correlation"] is None:
+            continue
+
+        candidates = np.flatnonzero(accepted)
+        if criterion == "correlation":
+            values = compute_pair_correlations(prices, pair_indices[candidates])
+            passed = values >= criteria["min_correlation"]
+        elif criterion == "mean_crossings":
+            values = compute_mean_crossings(residuals[:, candidates])
+            passed = values > criteria["mean_crossings_threshold"]
+        elif criterion == "half_life":
+            values = compute_half_lives(residuals[:, candidates])
+            passed = values < criteria["half_life_threshold"]
+        elif criterion == "hurst_exponent":
+            values = compute_hurst_exponents(residuals[:, candidates])
+            passed = values < criteria["hurst_exponent_threshold"]
+        else:
+            _, values, _ = adfuller_batch(residuals[:, candidates], regression="c", autolag="AIC")
+            passed = values < criteria["cointegration_threshold"]
+
+        rejection_counts[criterion] += int(len(candidates) - passed.sum())
+        accepted[candidates[~passed]] = False
+        statistics[criterion] = dict(zip(candidates[passed].tolist(), values[passed].tolist()))
+        if not accepted.any():
+            break
+
+    valid_pairs = []
+    for position in np.flatnonzero(accepted).tolist():
+        result = {
+            "ticker_1": pairs[position][0],
+            "ticker_2": pairs[position][1],
+            "spread_statistics": {
+                "slope": float(slope[position]),
+                "intercept": float(intercept[position]),
+            },
+            "cointegration_critical_value": statistics["cointegration"][position],
+            "hurst_exponent": statistics["hurst_exponent"][position],
+            "half_life": statistics["half_life"][position],
+            "mean_crossings": statistics["mean_crossings"][position]
+        }
+        if "correlation" in statistics:
+            result["correlation"] = statistics["correlation"][position]
+        valid_pairs.append(result)
+
+    return valid_pairs, rejection_counts
+
+def evaluate_pairs_on_shared_prices(
+        prices_spec: SharedArraySpec,
+        columns: List[str],
+        pairs: List[Tuple[str, str]],
+        criteria: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Worker entry point evaluating a chunk of pairs against a price matrix held in shared memory.
+
+    :param prices_spec: Spec of the shared price matrix, with one column per ticker
+    :param columns: Tickers of the price matrix columns
+    :param pairs: Ticker pairs to evaluate
+    :param criteria: Keyword arguments with the thresholds, minimum correlation and criteria order
+    :return: Tuple of the valid pairs of the chunk with their statistics and the number of pairs rejected by each criterion
+    """
+    with attach_shared_array(prices_spec) as prices:
+        results = evaluate_pairs(pairs, prices, columns, criteria)
+        del prices
+
+    return results
+
+def evaluate_pairs_in_parallel(
+        pairs: Iterable[Tuple[str, str]],
+        df: pd.DataFrame,
+        criteria: Dict[str, Any],
+        n_jobs: Optional[int] = None,
+        chunk_size: int = 256
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Run the statistical criteria tests for several pairs on the persistent process pool.
+
+    Pairs are consumed lazily in chunks, the workers map the price matrix from shared memory, and
+    valid pairs are returned in the order they were given.
+
+    :param pairs: Ticker pairs to evaluate
+    :param df: DataFrame containing price data
+    :param criteria: Keyword arguments with the thresholds, minimum correlation and criteria order
+    :param n_jobs: Number of workers of the shared pool to use, capped by its size; None uses all of them
+    :param chunk_size: Number of pairs sent to a worker at a time
+    :return: Tuple of the list of valid pairs with their statistics and the number of pairs rejected by each criterion
+    """
+    workers = worker_limit(n_jobs)
+    pool = get_process_pool()
+    columns = list(df.columns)
+
+    valid_pairs = []
+    rejection_counts = dict.fromkeys(criteria["criteria_order"], 0)
+    with share_array(df.to_numpy(dtype=float)) as prices_spec:
+        chunk_arguments = ((prices_spec, columns, chunk, criteria) for chunk in chunked(pairs, chunk_size))
+        for chunk_valid_pairs, chunk_rejection_counts in imap_ordered(pool, evaluate_pairs_on_shared_prices, chunk_arguments, max_pending=2 * workers):
+            valid_pairs.extend(chunk_valid_pairs)
+            for criterion, count in chunk_rejection_counts.items():
+                rejection_counts[criterion] += count
+
+    return valid_pairs, rejection_counts
+
 def run_statistical_criteria_tests_for_pairs(
-        pairs_to_eval: List[Tuple[str, str]],
+        pairs_to_eval: Iterable[Tuple[str, str]],
         df: pd.DataFrame,
         cointegration_threshold: float = 0.05,
         hurst_exponent_threshold: float = 0.5,
         half_life_threshold: float = 260,
-        mean_crossings_threshold: int = 12
+        mean_crossings_threshold: int = 12,
+        min_correlation: Optional[float] = None,
+        criteria_order: Optional[Iterable[str]] = None,
+        rejection_counts: Optional[Dict[str, int]] = None,
+        n_jobs: int = 1,
+        chunk_size: int = 256
     ) -> List[Dict[str, Any]]:
     """
     Run statistical criteria tests for the given pairs and return valid pairs.
 
-    :param pairs_to_eval: List of ticker pairs to evaluate
+    Pairs are evaluated in chunks of chunk_size with evaluate_pairs. Criteria are evaluated one at a
+    time in criteria_order and a pair is rejected at the first threshold it fails, so the expensive
+    tests only run for pairs that pass the cheap ones.
+
+    When n_jobs allows more than one worker the pairs are evaluated by evaluate_pairs_in_parallel.
+    Valid pairs are returned in the order they were given either way.
+
+    :param pairs_to_eval: Iterable of ticker pairs to evaluate
     :param df: DataFrame containing price data
     :param cointegration_threshold: Threshold for cointegration test
     :param hurst_exponent_threshold: Threshold for Hurst exponent
     :param half_life_threshold: Threshold for half-life of mean reversion
     :param mean_crossings_threshold: Threshold for mean crossing frequency
+    :param min_correlation: Minimum price correlation of a pair, no correlation check when None
+    :param criteria_order: Criteria to evaluate first, the remaining ones follow in the default cheapest-first order
+    :param rejection_counts: Optional dictionary that receives the number of pairs rejected by each criterion
+    :param n_jobs: Number of workers of the shared pool to use, capped by its size; 1 evaluates in the calling process and None uses the whole pool
+    :param chunk_size: Number of pairs evaluated together
     :return: List of dictionaries containing valid pairs and their statistics
     """
-    criteria_valid_pairs = []
-    for pair in pairs_to_eval:
-        slope, intercept, residuals = compute_spread_statistics(df, pair[0], pair[1])
-        cointegration_critical_value = compute_cointegration_critical_value(residuals)
-        hurst_exponent = compute_hurst_exponent(residuals)
-        half_life = compute_half_life(residuals)
-        mean_crossings = calculate_mean_crossing_frequency(residuals)
-
-        if cointegration_critical_value < cointegration_threshold and hurst_exponent < hurst_exponent_threshold and half_life < half_life_threshold and mean_crossings > mean_crossings_threshold:
-            criteria_valid_pairs.append({
-                "ticker_1": pair[0],
-                "ticker_2": pair[1],
-                "spread_statistics": {
-                    "slope": slope,
-                    "intercept": intercept,
-                },
-                "cointegration_critical_value": cointegration_critical_value,
-                "hurst_exponent": hurst_exponent,
-                "half_life": half_life,
-                "mean_crossings": mean_crossings
-            })
+    criteria = {
+        "cointegration_threshold": cointegration_threshold,
+        "hurst_exponent_threshold": hurst_exponent_threshold,
+        "half_life_threshold": half_life_threshold,
+        "mean_crossings_threshold": mean_crossings_threshold,
+        "min_correlation": min_correlation,
+        "criteria_order": resolve_criteria_order(criteria_order)
+    }
+
+    if worker_limit(n_jobs) != 1:
+        criteria_valid_pairs, totals = evaluate_pairs_in_parallel(pairs_to_eval, df, criteria, n_jobs, chunk_size)
+    else:
+        prices = df.to_numpy(dtype=float)
+        columns = list(df.columns)
+        criteria_valid_pairs = []
+        totals = dict.fromkeys(criteria["criteria_order"], 0)
+        for chunk in chunked(pairs_to_eval, chunk_size):
+            chunk_valid_pairs, chunk_rejection_counts = evaluate_pairs(chunk, prices, columns, criteria)
+            criteria_valid_pairs.extend(chunk_valid_pairs)
+            for criterion, count in chunk_rejection_counts.items():
+                totals[criterion] += count
+
+    if rejection_counts is not None:
+        rejection_counts.update(totals)
     
     return criteria_valid_pairs
 
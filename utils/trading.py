@@ -1,11 +1,14 @@
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 from scipy.stats import linregress
-from sklearn.metrics import r2_score
-from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import MinMaxScaler
 
+from utils.parallel import get_process_pool, imap_ordered, worker_limit
+from utils.rolling import sliding_window_regression
+
+
+R2_TIE_TOLERANCE = 1e-12
 
 def rolling_regression_trend_with_confidence(
     data: np.ndarray, 
@@ -16,50 +19,141 @@ def rolling_regression_trend_with_confidence(
     """
     Compute rolling regression trend and confidence for given data.
 
+    All windows are fitted at once in closed form, since the regressor of every window is arange(window_size).
+    The closed form can round R-squared differently from sklearn's r2_score in the last bits, so a
+    value within R2_TIE_TOLERANCE of the threshold counts as reaching it and both paths agree on ties.
+
     :param data: Input data array
     :param window_size: Size of the rolling window
     :param forecast_days: Number of days to forecast
     :param r2_threshold: R-squared threshold for trend determination
     :return: Tuple of trend array and confidence array
     """
-    
-    trends = []
-    confidences = []
-    for i in range(window_size, len(data) - forecast_days + 1):
-        X = np.arange(window_size).reshape(-1, 1)
-        y = data[i-window_size:i]
-        model = LinearRegression()
-        model.fit(X, y)
-        
-        r2 = r2_score(y, model.predict(X))
-        
-        if r2 > r2_threshold:
-            trend = 1 if model.coef_[0] > 0 else -1 if model.coef_[0] < 0 else 0
-        else:
-            trend = 0
-        
-        trends.append(trend)
-        confidences.append(r2)
-    return np.array(trends), np.array(confidences)
-
-def trade_pair_using_model(df: pd.DataFrame, ticker_1: str, ticker_2: str) -> Dict[str, Any]:
+    n_windows = len(data) - forecast_days - window_size + 1
+    if n_windows <= 0:
+        return np.array([]), np.array([])
+
+    values = np.asarray(data[:window_size + n_windows - 1], dtype=float)
+    slope, _, _, ss_tot, ss_res = sliding_window_regression(values, window_size)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        confidences = 1 - ss_res / ss_tot
+    constant_windows = ss_tot == 0
+    confidences[constant_windows] = np.where(ss_res[constant_windows] == 0, 1.0, 0.0)
+
+    trends = np.where(confidences >= r2_threshold - R2_TIE_TOLERANCE, np.sign(slope), 0).astype(int)
+
+    return trends, confidences
+
+SIGNAL_NONE, SIGNAL_SHORT, SIGNAL_LONG, SIGNAL_EXIT_SHORT, SIGNAL_EXIT_LONG = range(5)
+SIGNAL_LABELS = np.array(["None", "Short", "Long", "Exit Short", "Exit Long"], dtype=object)
+
+def compute_expanding_mean_and_std(data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the expanding mean and population standard deviation of a series in O(n).
+
+    :param data: Input data array
+    :return: Tuple of expanding mean array and expanding standard deviation array
+    """
+    data = np.asarray(data, dtype=float)
+    if len(data) == 0:
+        return np.zeros(0), np.zeros(0)
+
+    shifted = data - data[0]
+    counts = np.arange(1, len(data) + 1)
+    shifted_mean = np.cumsum(shifted) / counts
+    variance = np.cumsum(shifted ** 2) / counts - shifted_mean ** 2
+
+    return shifted_mean + data[0], np.sqrt(np.clip(variance, 0, None))
+
+def run_backtest_kernel(
+    data: np.ndarray,
+    trends: np.ndarray,
+    prices_1: np.ndarray,
+    prices_2: np.ndarray,
+    window_size: int = 10,
+    initial_budget: float = 100000
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run the RLRT trading state machine over a whole spread series with array operations.
+
+    :param data: Scaled spread values
+    :param trends: Predicted trend for each day, 0 where no prediction is available
+    :param prices_1: Prices of the first ticker
+    :param prices_2: Prices of the second ticker
+    :param window_size: Number of initial days without trading
+    :param initial_budget: Starting budget
+    :return: Tuple of signal codes, positions and budgets, one entry per day
+    """
+    n = len(data)
+    mean, std = compute_expanding_mean_and_std(data)
+
+    short_zone = data > mean + std
+    long_zone = ~short_zone & (data < mean - std)
+    neutral_zone = ~short_zone & ~long_zone
+
+    signals = np.full(n, SIGNAL_NONE, dtype=np.int8)
+    signals[short_zone & (trends <= 0)] = SIGNAL_SHORT
+    signals[long_zone & (trends >= 0)] = SIGNAL_LONG
+    signals[neutral_zone & (trends == 1)] = SIGNAL_EXIT_SHORT
+    signals[neutral_zone & (trends == -1)] = SIGNAL_EXIT_LONG
+    signals[:window_size] = SIGNAL_NONE
+
+    days = np.arange(n)
+    entries = (signals == SIGNAL_SHORT) | (signals == SIGNAL_LONG)
+    last_entry = np.maximum.accumulate(np.where(entries, days, -1))
+    last_exit_short = np.maximum.accumulate(np.where(signals == SIGNAL_EXIT_SHORT, days, -1))
+    last_exit_long = np.maximum.accumulate(np.where(signals == SIGNAL_EXIT_LONG, days, -1))
+
+    entry_positions = np.where(signals == SIGNAL_SHORT, -1, 1).astype(np.int8)
+    positions = np.where(last_entry >= 0, entry_positions[np.maximum(last_entry, 0)], 0).astype(np.int8)
+    exited = ((positions == -1) & (last_exit_short > last_entry)) | ((positions == 1) & (last_exit_long > last_entry))
+    positions[exited] = 0
+
+    prices_1 = np.asarray(prices_1)
+    prices_2 = np.asarray(prices_2)
+    growth = np.ones(n)
+    if n > 1:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return_differential = (prices_2[1:] / prices_2[:-1] - 1) - (prices_1[1:] / prices_1[:-1] - 1)
+        previous_positions = positions[:-1]
+        growth[1:] = np.where(previous_positions != 0, 1 + previous_positions * return_differential, 1.0)
+    growth[0] = initial_budget
+    budgets = np.multiply.accumulate(growth)
+
+    return signals, positions, budgets
+
+def compute_scaled_spread(ticker_series_1: pd.Series, ticker_series_2: pd.Series) -> Tuple[float, float, MinMaxScaler, np.ndarray]:
+    """
+    Compute the regression spread of a pair and scale it to the [0, 1] range.
+
+    :param ticker_series_1: Prices of the first ticker
+    :param ticker_series_2: Prices of the second ticker
+    :return: Tuple of slope, intercept, the fitted scaler and the scaled spread
+    """
+    slope, intercept, _, _, _ = linregress(ticker_series_1, ticker_series_2)
+    spread = ticker_series_2 - (slope * ticker_series_1 + intercept)
+
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    data = scaler.fit_transform(spread.values.reshape(-1, 1)).reshape(-1)
+
+    return slope, intercept, scaler, data
+
+def trade_pair_using_model(df: pd.DataFrame, ticker_1: str, ticker_2: str, orient: str = "records") -> Dict[str, Any]:
     """
     Perform pairs trading using RLRT and compute trade statistics.
 
     :param df: DataFrame containing price data for both tickers
     :param ticker_1: First ticker symbol
     :param ticker_2: Second ticker symbol
+    :param orient: "records" for one dictionary per day, "columns" for one array per field
     :return: Dictionary containing trading results and statistics
     """
 
     ticker_series_1 = df[ticker_1]
     ticker_series_2 = df[ticker_2]
 
-    slope, intercept, _, _, _ = linregress(ticker_series_1, ticker_series_2)
-    spread = ticker_series_2 - (slope * ticker_series_1 + intercept)
-
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    data = scaler.fit_transform(spread.values.reshape(-1, 1)).reshape(-1)
+    _, _, _, data = compute_scaled_spread(ticker_series_1, ticker_series_2)
 
     predicted_trends, _ = rolling_regression_trend_with_confidence(data, r2_threshold=0.6)
 
@@ -68,85 +162,29 @@ def trade_pair_using_model(df: pd.DataFrame, ticker_1: str, ticker_2: str) -> Di
 
     window_size = 10
 
-    signals = ['None'] * len(data)
-    positions = [0] * len(data)
-    budgets = [initial_budget] * len(data)
+    padded_predictions = np.full(len(data), np.nan)
+    padded_predictions[window_size:window_size + len(predicted_trends)] = predicted_trends
 
-    cumulative_mean = np.zeros(len(data))
-    cumulative_std = np.zeros(len(data))
+    signal_codes, positions, budgets = run_backtest_kernel(
+        data,
+        np.nan_to_num(padded_predictions),
+        ticker_series_1.to_numpy(),
+        ticker_series_2.to_numpy(),
+        window_size=window_size,
+        initial_budget=initial_budget
+    )
+    signals = SIGNAL_LABELS[signal_codes]
+    if not positions[:-1].any():
+        budgets = np.full(len(data), initial_budget)
 
-    padded_predictions = [None] * window_size + list(predicted_trends)
-    if len(padded_predictions) < len(data):
-        padded_predictions.extend([None] * (len(data) - len(padded_predictions)))
-    else:
-        padded_predictions = padded_predictions[:len(data)]
-
-    for i in range(len(data)):
-        if i < window_size:
-            cumulative_mean[i] = np.mean(data[:i+1])
-            cumulative_std[i] = np.std(data[:i+1]) if i > 0 else 0
-            continue
-        
-        cumulative_mean[i] = np.mean(data[:i+1])
-        cumulative_std[i] = np.std(data[:i+1])
-        
-        spread_value = data[i]
-        trend_prediction = padded_predictions[i] if padded_predictions[i] is not None else 0
-        
-        if spread_value > cumulative_mean[i] + cumulative_std[i]:
-            if trend_prediction <= 0:
-                signals[i] = "Short"
-            else:
-                signals[i] = "None"
-        elif spread_value < cumulative_mean[i] - cumulative_std[i]:
-            if trend_prediction >= 0:
-                signals[i] = "Long"
-            else:
-                signals[i] = "None"
-        else:
-            if trend_prediction == 1:
-                signals[i] = "Exit Short"
-            elif trend_prediction == -1:
-                signals[i] = "Exit Long"
-            else:
-                signals[i] = "None"
-        
-        current_position = positions[i-1]
-        if signals[i] == "Short" and current_position != -1:
-            if current_position == 1:
-                returns = (ticker_series_2.iloc[i] / ticker_series_2.iloc[i-1] - 1) - \
-                        (ticker_series_1.iloc[i] / ticker_series_1.iloc[i-1] - 1)
-                budgets[i] = budgets[i-1] * (1 + returns)
-            positions[i] = -1
-        elif signals[i] == "Long" and current_position != 1:
-            if current_position == -1:
-                returns = -((ticker_series_2.iloc[i] / ticker_series_2.iloc[i-1] - 1) - \
-                            (ticker_series_1.iloc[i] / ticker_series_1.iloc[i-1] - 1))
-                budgets[i] = budgets[i-1] * (1 + returns)
-            positions[i] = 1
-        elif (signals[i] == "Exit Short" and current_position == -1) or (signals[i] == "Exit Long" and current_position == 1):
-            returns = current_position * ((ticker_series_2.iloc[i] / ticker_series_2.iloc[i-1] - 1) - \
-                                        (ticker_series_1.iloc[i] / ticker_series_1.iloc[i-1] - 1))
-            budgets[i] = budgets[i-1] * (1 + returns)
-            positions[i] = 0
-        else:
-            positions[i] = current_position
-            
-        if current_position != 0:
-            returns = current_position * ((ticker_series_2.iloc[i] / ticker_series_2.iloc[i-1] - 1) - \
-                                        (ticker_series_1.iloc[i] / ticker_series_1.iloc[i-1] - 1))
-            budgets[i] = budgets[i-1] * (1 + returns)
-        else:
-            budgets[i] = budgets[i-1]
-    
     date_strings = [date.strftime('%Y-%m-%d') for date in dates]
 
     results_df = pd.DataFrame({
         'date': date_strings,
         'spread': data,
-        'predicted_trend': padded_predictions,
+        'predicted_trend': padded_predictions if len(predicted_trends) else [None] * len(data),
         'signal': signals,
-        'position': positions,
+        'position': positions.astype(int),
         'budget': budgets,
         'ticker_1': ticker_series_1,
         'ticker_2': ticker_series_2
@@ -168,11 +206,65 @@ def trade_pair_using_model(df: pd.DataFrame, ticker_1: str, ticker_2: str) -> Di
 
     annualized_return = 0 if (years == 0) else ((1 + total_return) ** (1 / years) - 1)
 
-    results_list = results_df.to_dict(orient='records')
+    if orient == "columns":
+        results = {column: results_df[column].to_numpy() for column in results_df.columns}
+    else:
+        results = results_df.to_dict(orient='records')
 
     return {
-        "results": results_list,
+        "results": results,
         "max_drawdown": max_drawdown,
         "total_return": total_return,
         "annualized_return": annualized_return
-    }
\ No newline at end of file
+    }
+
+def trade_pairs_using_model(
+    df: pd.DataFrame,
+    pairs: List[Tuple[str, str]],
+    max_workers: Optional[int] = None,
+    orient: str = "records"
+) -> List[Dict[str, Any]]:
+    """
+    Backtest several pairs drawn from one price DataFrame, spreading the pairs over a process pool.
+
+    :param df: DataFrame containing price data for all tickers in the pairs
+    :param pairs: List of (ticker_1, ticker_2) pairs to backtest
+    :param max_workers: Number of backtests run at the same time on the shared process pool, capped by its size; 1 runs them in the calling process
+    :param orient: Layout of the daily results, see trade_pair_using_model
+    :return: List of backtest results in the order of the given pairs, each tagged with its tickers
+    """
+    workers = worker_limit(max_workers)
+    if workers == 1 or len(pairs) <= 1:
+        results = [trade_pair_using_model(df, ticker_1, ticker_2, orient) for ticker_1, ticker_2 in pairs]
+    else:
+        arguments = ((df[[ticker_1, ticker_2]], ticker_1, ticker_2, orient) for ticker_1, ticker_2 in pairs)
+        results = list(imap_ordered(get_process_pool(), trade_pair_using_model, arguments, max_pending=workers))
+
+    return [
+        {"ticker_1": ticker_1, "ticker_2": ticker_2, **result}
+        for (ticker_1, ticker_2), result in zip(pairs, results)
+    ]
+
+def summarize_backtests(backtests: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Aggregate the headline statistics of several pair backtests.
+
+    :param backtests: List of results as returned by trade_pairs_using_model
+    :return: Dictionary containing the number of pairs, average returns, worst drawdown and the best pair
+    """
+    if not backtests:
+        return {"pairs": 0}
+
+    best = max(backtests, key=lambda backtest: backtest["total_return"])
+
+    return {
+        "pairs": len(backtests),
+        "mean_total_return": float(np.mean([backtest["total_return"] for backtest in backtests])),
+        "mean_annualized_return": float(np.mean([backtest["annualized_return"] for backtest in backtests])),
+        "worst_max_drawdown": float(np.min([backtest["max_drawdown"] for backtest in backtests])),
+        "best_pair": {
+            "ticker_1": best["ticker_1"],
+            "ticker_2": best["ticker_2"],
+            "total_return": best["total_return"]
+        }
+    }
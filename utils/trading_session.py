@@ -0,0 +1,199 @@
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Dict, List
+import numpy as np
+import pandas as pd
+
+from utils.trading import (
+    SIGNAL_EXIT_LONG,
+    SIGNAL_EXIT_SHORT,
+    SIGNAL_LABELS,
+    SIGNAL_LONG,
+    SIGNAL_NONE,
+    SIGNAL_SHORT,
+    compute_scaled_spread,
+    rolling_regression_trend_with_confidence,
+    run_backtest_kernel
+)
+
+
+@dataclass
+class TradingSessionState:
+    """
+    State of the RLRT strategy for one pair, advanced one bar at a time.
+
+    The hedge ratio and MinMax scaling bounds are frozen at initialization, the expanding mean and
+    standard deviation of the scaled spread are kept with Welford's algorithm, and the last
+    window_size scaled spreads feed the rolling regression, so each bar costs O(window_size).
+    """
+    ticker_1: str
+    ticker_2: str
+    slope: float
+    intercept: float
+    scale: float
+    offset: float
+    last_date: str
+    last_price_1: float
+    last_price_2: float
+    window_size: int = 10
+    r2_threshold: float = 0.6
+    initial_budget: float = 100000
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    window: List[float] = field(default_factory=list)
+    position: int = 0
+    budget: float = 100000
+    signal: str = "None"
+
+    @classmethod
+    def from_prices(
+        cls,
+        df: pd.DataFrame,
+        ticker_1: str,
+        ticker_2: str,
+        window_size: int = 10,
+        r2_threshold: float = 0.6,
+        initial_budget: float = 100000
+    ) -> "TradingSessionState":
+        """
+        Initialize a session by replaying the strategy over the price history, as trade_pair_using_model does.
+
+        :param df: DataFrame containing price data for both tickers indexed by date
+        :param ticker_1: First ticker symbol
+        :param ticker_2: Second ticker symbol
+        :param window_size: Size of the rolling regression window and number of initial days without trading
+        :param r2_threshold: R-squared threshold for trend determination
+        :param initial_budget: Starting budget
+        :return: State after the last day of the history
+        """
+        ticker_series_1 = df[ticker_1]
+        ticker_series_2 = df[ticker_2]
+        if len(df) < window_size + 1:
+            raise ValueError(f"At least {window_size + 1} data points are required to start a session")
+
+        slope, intercept, scaler, data = compute_scaled_spread(ticker_series_1, ticker_series_2)
+        predicted_trends, _ = rolling_regression_trend_with_confidence(data, window_size=window_size, r2_threshold=r2_threshold)
+        padded_predictions = np.zeros(len(data))
+        padded_predictions[window_size:window_size + len(predicted_trends)] = predicted_trends
+
+        signals, positions, budgets = run_backtest_kernel(
+            data,
+            padded_predictions,
+            ticker_series_1.to_numpy(),
+            ticker_series_2.to_numpy(),
+            window_size=window_size,
+            initial_budget=initial_budget
+        )
+
+        return cls(
+            ticker_1=ticker_1,
+            ticker_2=ticker_2,
+            slope=float(slope),
+            intercept=float(intercept),
+            scale=float(scaler.scale_[0]),
+            offset=float(scaler.min_[0]),
+            last_date=df.index[-1].strftime('%Y-%m-%d'),
+            last_price_1=float(ticker_series_1.iloc[-1]),
+            last_price_2=float(ticker_series_2.iloc[-1]),
+            window_size=window_size,
+            r2_threshold=r2_threshold,
+            initial_budget=initial_budget,
+            count=len(data),
+            mean=float(data.mean()),
+            m2=float(((data - data.mean()) ** 2).sum()),
+            window=data[-window_size:].tolist(),
+            position=int(positions[-1]),
+            budget=float(budgets[-1]),
+            signal=str(SIGNAL_LABELS[signals[-1]])
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TradingSessionState":
+        """
+        Restore a state serialized with to_dict.
+
+        :param data: Serialized state
+        :return: The restored state
+        :raises ValueError: If fields are missing or unknown
+        """
+        names = {state_field.name for state_field in fields(cls)}
+        unknown = set(data) - names
+        if unknown:
+            raise ValueError(f"Unknown state fields: {', '.join(sorted(unknown))}")
+        try:
+            return cls(**data)
+        except TypeError as e:
+            raise ValueError(f"Incomplete state: {str(e)}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the state to JSON-compatible values.
+
+        :return: Dictionary of the state fields
+        """
+        return asdict(self)
+
+    def update(self, date: str, price_1: float, price_2: float) -> Dict[str, Any]:
+        """
+        Advance the strategy by one bar.
+
+        The trend of the bar comes from the regression over the previous window_size scaled spreads,
+        the same window the historical replay uses for that day.
+
+        :param date: Date of the bar in YYYY-MM-DD format, later than last_date
+        :param price_1: Price of the first ticker
+        :param price_2: Price of the second ticker
+        :return: Dictionary containing the date, scaled spread, predicted trend, signal, position and budget of the bar
+        """
+        spread = price_2 - (self.slope * price_1 + self.intercept)
+        value = spread * self.scale + self.offset
+
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        std = np.sqrt(max(self.m2 / self.count, 0.0))
+
+        trend = 0
+        if len(self.window) == self.window_size:
+            trends, _ = rolling_regression_trend_with_confidence(
+                np.array(self.window), window_size=self.window_size, forecast_days=0, r2_threshold=self.r2_threshold
+            )
+            trend = int(trends[0])
+
+        signal = SIGNAL_NONE
+        if self.count > self.window_size:
+            if value > self.mean + std:
+                signal = SIGNAL_SHORT if trend <= 0 else SIGNAL_NONE
+            elif value < self.mean - std:
+                signal = SIGNAL_LONG if trend >= 0 else SIGNAL_NONE
+            elif trend == 1:
+                signal = SIGNAL_EXIT_SHORT
+            elif trend == -1:
+                signal = SIGNAL_EXIT_LONG
+
+        if self.position != 0:
+            return_differential = (price_2 / self.last_price_2 - 1) - (price_1 / self.last_price_1 - 1)
+            self.budget *= 1 + self.position * return_differential
+
+        if signal == SIGNAL_SHORT:
+            self.position = -1
+        elif signal == SIGNAL_LONG:
+            self.position = 1
+        elif (signal == SIGNAL_EXIT_SHORT and self.position == -1) or (signal == SIGNAL_EXIT_LONG and self.position == 1):
+            self.position = 0
+
+        self.window = (self.window + [float(value)])[-self.window_size:]
+        self.last_date = date
+        self.last_price_1 = float(price_1)
+        self.last_price_2 = float(price_2)
+        self.signal = str(SIGNAL_LABELS[signal])
+
+        return {
+            "date": date,
+            "spread": float(value),
+            "predicted_trend": trend,
+            "signal": self.signal,
+            "position": self.position,
+            "budget": float(self.budget)
+        }
@@ -0,0 +1,185 @@
+from operator import itemgetter
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import jsonschema
+import numpy as np
+import pandas as pd
+from jsonschema.exceptions import ValidationError, best_match
+
+
+BULK_TYPES = {
+    "string": {str},
+    "number": {int, float},
+    "integer": {int},
+    "boolean": {bool}
+}
+BULK_ITEM_KEYWORDS = {"type", "properties", "required", "additionalProperties"}
+BULK_PROPERTY_KEYWORDS = {"type", "format"}
+
+_compiled: Dict[int, Tuple[Dict[str, Any], Any, Optional[Dict[str, Any]]]] = {}
+_compiled_lock = threading.Lock()
+
+def compile_schema(schema: Dict[str, Any]) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """
+    Return the compiled validator and bulk validation plan of a schema, checking and compiling it on first use.
+
+    Entries are cached by schema identity and keep a reference to the schema, so the module-level
+    schemas of the routes are compiled once per process.
+
+    :param schema: The schema to validate against
+    :returns: A tuple of the jsonschema validator instance and the plan built by plan_bulk_validation
+    """
+    entry = _compiled.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        with _compiled_lock:
+            validator_class = jsonschema.validators.validator_for(schema)
+            validator_class.check_schema(schema)
+            entry = (schema, validator_class(schema), plan_bulk_validation(schema))
+            _compiled[id(schema)] = entry
+
+    return entry[1], entry[2]
+
+def compile_schemas(*schemas: Dict[str, Any]) -> None:
+    """
+    Compile request schemas ahead of the first request.
+
+    :param schemas: The schemas to compile
+    """
+    for schema in schemas:
+        compile_schema(schema)
+
+def is_bulk_item_schema(item_schema: Dict[str, Any]) -> bool:
+    """
+    Check whether an array item schema only uses keywords the bulk record check understands.
+
+    Formats are accepted because jsonschema.validate does not enforce them without a format checker.
+
+    :param item_schema: Schema of the array items
+    :returns: True if every item can be checked by bulk_records_valid
+    """
+    if item_schema.get("type") != "object" or not set(item_schema) <= BULK_ITEM_KEYWORDS:
+        return False
+    if item_schema.get("additionalProperties", True) is not True:
+        return False
+
+    return all(
+        set(property_schema) <= BULK_PROPERTY_KEYWORDS and property_schema.get("type") in BULK_TYPES
+        for property_schema in item_schema.get("properties", {}).values()
+    )
+
+def plan_bulk_validation(schema: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Split a request schema into an envelope schema and the top-level record arrays that can be checked in bulk.
+
+    :param schema: The request schema
+    :returns: A dictionary with the envelope validator and the item schema of each bulk array, or None if no array qualifies
+    """
+    properties = schema.get("properties", {})
+    bulk_arrays = {
+        name: property_schema["items"]
+        for name, property_schema in properties.items()
+        if property_schema.get("type") == "array" and isinstance(property_schema.get("items"), dict) and is_bulk_item_schema(property_schema["items"])
+    }
+    if not bulk_arrays:
+        return None
+
+    envelope = {
+        **schema,
+        "properties": {
+            name: {key: value for key, value in property_schema.items() if key != "items"} if name in bulk_arrays else property_schema
+            for name, property_schema in properties.items()
+        }
+    }
+
+    return {"envelope": jsonschema.validators.validator_for(schema)(envelope), "arrays": bulk_arrays}
+
+def bulk_records_valid(records: List[Any], item_schema: Dict[str, Any]) -> bool:
+    """
+    Check a list of records against a flat object schema column by column.
+
+    Types are compared as sets over each column, so a million records cost a few passes of C-level
+    iteration instead of a walk through the validator per item. Integral floats are left to the
+    full validator, which accepts them as integers.
+
+    :param records: The array to check
+    :param item_schema: Flat object schema accepted by is_bulk_item_schema
+    :returns: True if every record is valid, False if the full validator has to report an error
+    """
+    if set(map(type, records)) - {dict}:
+        return False
+
+    required = set(item_schema.get("required", []))
+    properties = item_schema.get("properties", {})
+    for key in required - set(properties):
+        if not all(key in record for record in records):
+            return False
+
+    for key, property_schema in properties.items():
+        if key in required:
+            try:
+                values = list(map(itemgetter(key), records))
+            except KeyError:
+                return False
+        else:
+            values = [record[key] for record in records if key in record]
+        if set(map(type, values)) - BULK_TYPES[property_schema["type"]]:
+            return False
+
+    return True
+
+def validate_instance(data: Any, schema: Dict[str, Any]) -> Optional[ValidationError]:
+    """
+    Validate data against a schema with its compiled validator, checking large record arrays in bulk.
+
+    Any failure is reported by running the full validator, so the error is the one jsonschema.validate would raise.
+
+    :param data: The data to validate
+    :param schema: The schema to validate against
+    :returns: The best matching validation error, or None if the data is valid
+    """
+    validator, plan = compile_schema(schema)
+
+    if plan is not None and isinstance(data, dict):
+        envelope_valid = plan["envelope"].is_valid(data)
+        arrays_valid = envelope_valid and all(
+            bulk_records_valid(data[name], item_schema)
+            for name, item_schema in plan["arrays"].items()
+            if isinstance(data.get(name), list)
+        )
+        if arrays_valid:
+            return None
+
+    return best_match(validator.iter_errors(data))
+
+def validate_price_columns(dates: Any, tickers: Any, prices: np.ndarray) -> pd.DatetimeIndex:
+    """
+    Check the arrays of a columnar price upload in bulk and parse its dates.
+
+    Prices must be numeric and finite, with NaN marking a missing price; dates must parse and be
+    unique, and tickers must be unique.
+
+    :param dates: Dates of the rows, as datetime64 values or YYYY-MM-DD strings
+    :param tickers: Ticker symbols of the columns
+    :param prices: Price matrix of shape (dates, tickers)
+    :returns: The parsed dates
+    :raises ValueError: If any check fails
+    """
+    if prices.dtype.kind not in "iuf":
+        raise ValueError(f"Prices must be numeric, got dtype {prices.dtype}")
+    if prices.dtype.kind == "f" and np.isinf(prices).any():
+        raise ValueError("Prices must be finite")
+
+    try:
+        index = pd.DatetimeIndex(pd.to_datetime(dates, format="ISO8601"), name="date")
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Dates must be ISO 8601 dates: {str(e)}")
+    if index.hasnans:
+        raise ValueError("Dates must not be missing")
+    if index.has_duplicates:
+        raise ValueError(f"Duplicate dates in upload: {', '.join(index[index.duplicated()].strftime('%Y-%m-%d')[:5])}")
+
+    ticker_index = pd.Index(tickers)
+    if ticker_index.has_duplicates:
+        raise ValueError(f"Duplicate tickers in upload: {', '.join(map(str, ticker_index[ticker_index.duplicated()][:5]))}")
+
+    return index